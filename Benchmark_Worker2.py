@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 08:30:12 2026
+
+@author: Jeff Barton
+         Electrical Engineer
+         Transmission Long Term Planning
+         Bonneville Power Administration
+         jgbarton@bpa.gov
+
+Change log:
+v0:
+    Benchmark for the worker2 workload ("run_cases"/"sum_of_squares").
+
+    Each case count is run once in a single process (the baseline), then
+    through the pool supervisor for each worker count.  The results are saved
+    as JSON: elapsed time, speedup over the single process run, parallel
+    efficiency (speedup / workers), and per-case run time percentiles.
+
+    If a baseline benchmark file is given, the new results are compared with
+    it and any case count / worker count that got slower than the tolerance
+    is flagged.  Use this to check pool changes before handing them out.
+
+'''*************************************************************************'''
+"""
+import logging
+from inspect import currentframe as cf # Used to identify the current function -- avoids some copy-paste issues when making new defs
+
+# Replaced by "main" with the logger from "setup_logging"
+logger = logging.getLogger(__name__)
+
+
+'''*************************************************************************'''
+def print_exception():
+    # Return line number data from the last exception
+    from linecache import getline, checkcache
+    from sys import exc_info
+    exc_type, exc_obj, tb = exc_info()
+    f = tb.tb_frame
+    lineno = tb.tb_lineno
+    filename = f.f_code.co_filename
+    checkcache(filename)
+    line = getline(filename, lineno, f.f_globals)
+    return[f'LINE {lineno} "{line.strip()}"']
+
+
+'''*************************************************************************'''
+def percentile(values, pct):
+    # Nearest-rank percentile of "values" (pct from 0 to 100)
+    import math
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+'''*************************************************************************'''
+def summarize_run(num_cases, workers, elapsed_times, case_times, serial_elapsed):
+    # Returns the benchmark record for one case count / worker count.
+    # The fastest repeat is used for the elapsed time.  Workers = 0 is the
+    #   single process run.
+    elapsed = min(elapsed_times)
+    speedup = serial_elapsed / elapsed if elapsed > 0 else None
+    return {'num_cases' : num_cases,
+            'workers' : workers,
+            'elapsed' : elapsed,
+            'elapsed_repeats' : elapsed_times,
+            'speedup' : speedup,
+            'efficiency' : speedup / max(workers, 1) if speedup is not None else None,
+            'processor_time' : sum(case_times),
+            'case_time_p50' : percentile(case_times, 50),
+            'case_time_p90' : percentile(case_times, 90),
+            'case_time_p99' : percentile(case_times, 99),
+            'case_time_max' : max(case_times) if len(case_times) > 0 else None}
+
+
+'''*************************************************************************'''
+def run_benchmark(benchmark_data_dict):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Returns [err, action, report]
+
+    try:
+        logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}', extra = extra)
+
+        import timeit
+        from datetime import datetime
+
+        import Multiprocess_Functions
+        Multiprocess_Functions.logger = logger
+        from Multiprocess_Functions import pool_supervisor, get_machine_resources, Pool_Service
+        # "run_cases" uses the module "logger" and "logging" set by its "main"
+        import Template_Multiprocess_Function_v0 as worker2_module
+        worker2_module.logging = logging
+        worker2_module.logger = logger
+        from Template_Multiprocess_Function_v0 import run_cases
+
+        start_level = int(benchmark_data_dict['start_level'])
+        case_counts = [int(__e) for __e in benchmark_data_dict['case_counts']]
+        worker_counts = [int(__e) for __e in benchmark_data_dict['worker_counts']]
+        repeats = max(1, int(benchmark_data_dict['repeats']))
+        warm_pool = benchmark_data_dict['warm_pool']
+
+        report = {'created' : datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                  'machine' : get_machine_resources()[2],
+                  'settings' : {'start_level' : start_level,
+                                'case_counts' : case_counts,
+                                'worker_counts' : worker_counts,
+                                'repeats' : repeats,
+                                'warm_pool' : warm_pool},
+                  'runs' : []}
+
+        # A warm pool keeps process start up out of the timings.  Each run
+        #   limits the cases in flight to its worker count.
+        pool_service = None
+        if warm_pool:
+            pool_service = Pool_Service(logger, max(worker_counts), preload_modules = ['Template_Multiprocess_Function_v0'])
+            result = pool_service.start()
+            if result[0:2] != ['', '']:
+                return [result[0], result[1], report]
+
+        try:
+            for num_cases in case_counts:
+                # Same cases as "worker2_function"
+                cases_array = [[__e, start_level + __e, True] for __e in range(num_cases)]
+
+                extra = {'qThreadName': f'Benchmark {num_cases} cases, single process'}
+                logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+                elapsed_times = []
+                for repeat in range(repeats):
+                    case_times = []
+                    start = timeit.default_timer()
+                    for case in cases_array:
+                        result = run_cases(case)
+                        if result[0:2] != ['', '']:
+                            return [f'Case {case[0]} failed in the single process run. {result[0]}', 'Exception', report]
+                        case_times += [result[2][1]]
+                    elapsed_times += [timeit.default_timer() - start]
+                serial_elapsed = min(elapsed_times)
+                report['runs'] += [summarize_run(num_cases, 0, elapsed_times, case_times, serial_elapsed)]
+                logger.log(logging.INFO, f'{num_cases} cases, single process: {serial_elapsed:.3f} s', extra = extra)
+
+                for workers in worker_counts:
+                    extra = {'qThreadName': f'Benchmark {num_cases} cases, {workers} workers'}
+                    logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+                    elapsed_times = []
+                    for repeat in range(repeats):
+                        start = timeit.default_timer()
+                        result = pool_supervisor(run_cases, cases_array, workers, pool_service = pool_service)
+                        elapsed_times += [timeit.default_timer() - start]
+                        if result[0:2] != ['', '']:
+                            return [f'Pool run failed ({num_cases} cases, {workers} workers). {result[0]}', 'Exception', report]
+                        case_times = [__e[2][1] for __e in result[2]]
+                    run = summarize_run(num_cases, workers, elapsed_times, case_times, serial_elapsed)
+                    report['runs'] += [run]
+                    logger.log(logging.INFO, f'{num_cases} cases, {workers} workers: {run["elapsed"]:.3f} s, speedup {run["speedup"]:.2f}, efficiency {run["efficiency"]:.0%}', extra = extra)
+        finally:
+            if pool_service is not None:
+                pool_service.shutdown()
+
+        return ['', '', report]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, None]
+
+
+'''*************************************************************************'''
+def save_benchmark(report, results_file):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Returns [err, action]
+
+    try:
+        import json
+        import os
+        results_dir = os.path.dirname(results_file)
+        if results_dir != '' and not os.path.exists(results_dir):
+            os.makedirs(results_dir)
+        with open(results_file, 'w') as results:
+            json.dump(report, results, indent = 2)
+        logger.log(logging.INFO, f'Benchmark saved to {results_file}', extra = extra)
+        return ['', '']
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action]
+
+
+'''*************************************************************************'''
+def compare_benchmarks(baseline_file, current_file, tolerance = 0.10):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Compare two saved benchmarks run by run (same case count and worker count).
+    # A run is a regression when its elapsed time grew, or its parallel
+    #   efficiency fell, by more than "tolerance" (0.10 = 10%).
+    # Returns [err, action, regressions]
+
+    try:
+        import json
+        with open(baseline_file, 'r') as baseline:
+            baseline_report = json.load(baseline)
+        with open(current_file, 'r') as current:
+            current_report = json.load(current)
+
+        if baseline_report['machine'] != current_report['machine']:
+            logger.log(logging.WARNING, f'The benchmarks were run on different machines: {baseline_report["machine"]} vs. {current_report["machine"]}', extra = extra)
+
+        baseline_runs = {(__e['num_cases'], __e['workers']) : __e for __e in baseline_report['runs']}
+        table = [f'{"Cases":>6} {"Workers":>8} {"Base (s)":>10} {"Now (s)":>10} {"Change":>8} {"Base Eff":>9} {"Now Eff":>8}']
+        regressions = []
+        for run in current_report['runs']:
+            key = (run['num_cases'], run['workers'])
+            if key not in baseline_runs:
+                continue
+            base = baseline_runs[key]
+            change = run['elapsed'] / base['elapsed'] - 1
+            flags = []
+            if change > tolerance:
+                flags += ['slower']
+            if base['efficiency'] and run['efficiency'] < base['efficiency'] * (1 - tolerance):
+                flags += ['less efficient']
+            workers = run['workers'] if run['workers'] > 0 else 'single'
+            table += [f'{run["num_cases"]:>6} {workers:>8} {base["elapsed"]:>10.3f} {run["elapsed"]:>10.3f} {change:>+8.1%} {base["efficiency"]:>9.0%} {run["efficiency"]:>8.0%}  {", ".join(flags)}']
+            if len(flags) > 0:
+                regressions += [{'num_cases' : run['num_cases'], 'workers' : run['workers'], 'elapsed_change' : change,
+                                 'baseline_efficiency' : base['efficiency'], 'efficiency' : run['efficiency'], 'flags' : flags}]
+
+        logger.log(logging.INFO, f'Benchmark comparison ({baseline_file} -> {current_file}):\n' + '\n'.join(table), extra = extra)
+        if len(regressions) > 0:
+            err = f'{len(regressions)} benchmark runs regressed by more than {tolerance:.0%}.'
+            action = 'Warning Only'
+            logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, regressions]
+        return ['', '', regressions]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, []]
+
+
+'''*************************************************************************'''
+def main():
+    '''****************************************************************************
+    *******************************************************************************
+    ****                                                                       ****
+    ****                                                                       ****
+    ****                            User Variables                             ****
+    ****                                                                       ****
+    ****                                                                       ****
+    *******************************************************************************
+    ****************************************************************************'''
+    global logger
+    # "setup_logging" expects the "logging" global that its own "main" sets
+    import Template_Multiprocess_Function_v0 as worker2_module
+    worker2_module.logging = logging
+    logger = worker2_module.setup_logging()
+    # Per-case logging from the pool makes the timings noisy
+    logger.setLevel(logging.INFO)
+    for handler in logger.handlers:
+        handler.setLevel(logging.INFO)
+
+    benchmark_data_dict = {
+                        'start_level' : 10000000, # About 1 second per case
+                        'case_counts' : [8, 16], # Number of cases in each benchmark
+                        'worker_counts' : [1, 2, 4], # Pool sizes to compare with the single process run
+                        'repeats' : 1, # The fastest of the repeats is kept
+                        'warm_pool' : True, # When true, the pool is started before the timings
+                        'results_file' : './Results/worker2_benchmark.json',
+                        'baseline_file' : '', # A saved benchmark to compare against ('' to skip)
+                        'tolerance' : 0.10, # Slowdown (fraction) flagged as a regression
+                        }
+
+    result = run_benchmark(benchmark_data_dict)
+    if result[0:2] != ['', '']:
+        return None
+    report = result[2]
+
+    result = save_benchmark(report, benchmark_data_dict['results_file'])
+    if result[0:2] != ['', '']:
+        return None
+
+    if benchmark_data_dict['baseline_file']:
+        compare_benchmarks(benchmark_data_dict['baseline_file'], benchmark_data_dict['results_file'], benchmark_data_dict['tolerance'])
+
+    return None
+
+if __name__ == '__main__':
+
+    # creating a dummy variable ("m") to accept the
+    # object returned from "main" will prevent problems
+    # with the kernal dying while running under Spyder.
+    m = main()
@@ -33,4 +33,45 @@ def starbox_msg(msg, num_stars, num_spaces, num_space_lines):
     # Build the lines above and below the message lines that contain empty space
     space_lines = (num_stars * '*' + ' ' * (max_len + num_spaces*2) + num_stars * '*' + '\n') * num_space_lines
     # return the Starboxed message
-    return ('\n' + sborder + space_lines + mult_msg + space_lines + sborder)
\ No newline at end of file
+    return ('\n' + sborder + space_lines + mult_msg + space_lines + sborder)
+
+class Cancel_Token():
+    # Shared by the GUI and a running worker so the worker can be stopped or
+    #   paused without killing the process.  The worker calls "checkpoint"
+    #   between cases; it waits there while paused and returns True once the
+    #   run has been cancelled.
+    # A token made with a "parent" is also paused and cancelled by the parent,
+    #   but cancelling it leaves the parent running (e.g. to stop one pool run
+    #   inside a study).
+    def __init__(self, parent = None):
+        import threading
+        self.parent = parent
+        self.cancel_event = threading.Event()
+        # Set while running, cleared while paused
+        self.run_event = threading.Event()
+        self.run_event.set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        # Wake a paused worker so it sees the cancel
+        self.run_event.set()
+
+    def pause(self):
+        if not self.cancel_event.is_set():
+            self.run_event.clear()
+
+    def resume(self):
+        self.run_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set() or (self.parent is not None and self.parent.is_cancelled())
+
+    def is_paused(self):
+        return not self.run_event.is_set() or (self.parent is not None and self.parent.is_paused())
+
+    def checkpoint(self):
+        # Wait here while paused.  Returns True if the run was cancelled.
+        if self.parent is not None and self.parent.checkpoint():
+            return True
+        self.run_event.wait()
+        return self.is_cancelled()
@@ -0,0 +1,697 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:20:44 2026
+
+@author: Jeff Barton
+         Electrical Engineer
+         Transmission Long Term Planning
+         Bonneville Power Administration
+         jgbarton@bpa.gov
+
+Change log:
+v0:
+    Local stand-in for the Powerworld SimAuto COM object, so the study code
+    can be run, benchmarked and load tested where Simulator is not installed
+    (our Linux build boxes).
+
+    "Local_Simulator" answers the SimAuto calls used by the study code with
+    the same ('error', (data ...)) tuples.  Each case opened is a synthetic
+    two area network (buses, gens, loads, branches, shunts, tie lines and
+    injection groups) built from the case name, so a case always opens the
+    same way.  The powerflow "solve" is a simple balance: the slack
+    injection group (or the system slack gen) picks up load, losses and
+    interchange.  It is meant to exercise the code paths and the call
+    pattern, not to give real results.
+
+    Each call can be given a latency (seconds, by method name or script verb,
+    e.g. {'OpenCase': 0.5, 'SolvePowerFlow': 0.2}) so a study run here takes
+    time where a real run would.
+
+    "SaveCase" writes the network to the named file (pickled), and
+    "OpenCase" of such a file reads it back, so saved cases can be copied
+    and opened in other processes like real case files.
+
+    Use: Powerworld_Functions.dispatch_simulator('local')
+
+'''*************************************************************************'''
+"""
+import logging
+from inspect import currentframe as cf # Used to identify the current function -- avoids some copy-paste issues when making new defs
+
+# The calling worker function replaces this with its own logger
+logger = logging.getLogger(__name__)
+
+# First bytes of a case file written by "SaveCase"
+case_file_tag = b'Local_Simulator case'
+
+
+'''*************************************************************************'''
+def print_exception():
+    # Return line number data from the last exception
+    from linecache import getline, checkcache
+    from sys import exc_info
+    exc_type, exc_obj, tb = exc_info()
+    f = tb.tb_frame
+    lineno = tb.tb_lineno
+    filename = f.f_code.co_filename
+    checkcache(filename)
+    line = getline(filename, lineno, f.f_globals)
+    return[f'LINE {lineno} "{line.strip()}"']
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                            Script Parsing                             ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+def split_top_level(text, separator):
+    # Split "text" on "separator" where it is not inside quotes, () or []
+    parts = []
+    depth = 0
+    quote = ''
+    current = ''
+    for char in text:
+        if quote != '':
+            if char == quote:
+                quote = ''
+        elif char in ['"', "'"]:
+            quote = char
+        elif char in ['(', '[']:
+            depth += 1
+        elif char in [')', ']']:
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts += [current]
+            current = ''
+            continue
+        current += char
+    if current.strip() != '':
+        parts += [current]
+    return parts
+
+
+'''*************************************************************************'''
+def parse_value(text):
+    # Script argument to a python value: [lists] to lists, quotes removed
+    text = text.strip()
+    if text.startswith('[') and text.endswith(']'):
+        return [parse_value(__e) for __e in split_top_level(text[1:-1], ',')]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in ['"', "'"]:
+        return text[1:-1]
+    return text
+
+
+'''*************************************************************************'''
+def parse_script(script):
+    # Returns [[verb, [args]], ...] for the commands in a script string
+    commands = []
+    for statement in split_top_level(script, ';'):
+        statement = statement.strip()
+        if statement == '':
+            continue
+        if '(' in statement and statement.endswith(')'):
+            verb = statement[0:statement.index('(')].strip()
+            args = [parse_value(__e) for __e in split_top_level(statement[statement.index('(') + 1:-1], ',')]
+        else:
+            verb = statement
+            args = []
+        commands += [[verb, args]]
+    return commands
+
+
+'''*************************************************************************'''
+def same_value(a, b):
+    # Compare two field values the way a key lookup would: numbers by value,
+    #   text without case or surrounding spaces
+    a = f'{a}'.strip()
+    b = f'{b}'.strip()
+    try:
+        return float(a) == float(b)
+    except ValueError:
+        return a.lower() == b.lower()
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                           Local Simulator                             ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+class Local_Simulator():
+    # Key fields for each object type (first match wins for lookups)
+    key_fields = {'Bus': ['BusNum'],
+                  'Gen': ['BusNum', 'GenID'],
+                  'Load': ['BusNum', 'LoadID'],
+                  'Shunt': ['BusNum', 'ID'],
+                  'Branch': ['BusNumFrom', 'BusNumTo', 'Circuit'],
+                  'Area': ['Number'],
+                  'InjectionGroup': ['Name'],
+                  'PartPointGen': ['GroupName', 'BusNum', 'GenID'],
+                  'Filter': ['ObjectType', 'FilterName'],
+                  'Condition': ['ObjectType', 'FilterName', 'ConditionNumber'],
+                  'Scale_Options_Value': ['VariableName']}
+    # Other names used for the same field
+    field_aliases = {'Number': {'Bus': 'BusNum'},
+                     'InjGrpName': {'InjectionGroup': 'Name'},
+                     'Scale': {'Area': 'BGScale'}}
+
+    def __init__(self, options = None):
+        # options (all optional):
+        #   'buses_per_area': buses in each of the two areas (default 50)
+        #   'latency': {method or script verb: seconds}, 'default' for the rest
+        #   'loss_pct': losses as a fraction of load (default 0.02)
+        #   'diverge_above_mw': a solve fails when the load changed more than
+        #       this since the last solve (default None, never)
+        if options is None:
+            options = {}
+        self.options = options
+        self.latency = options.get('latency', {})
+        self.case_file = None
+        self.network = None
+        self.saved_state = None
+        self.num_calls = 0
+
+    '''*********************************************************************'''
+    # Synthetic network
+
+    def build_network(self, case_file):
+        # Two areas, "buses_per_area" buses each.  Sizes are taken from a
+        #   random generator seeded by the case name, so each name opens the same way.
+        import random
+        rng = random.Random(case_file)
+        buses_per_area = int(self.options.get('buses_per_area', 50))
+        network = {__e: [] for __e in self.key_fields}
+        network['Filter'] = []
+        network['Condition'] = []
+        network['Scale_Options_Value'] = [{'VariableName': 'EnforceAGC', 'ValueField': 'NO'}]
+        network['changed_mw'] = 0.0
+        network['solved'] = False
+
+        for area_num in [1, 2]:
+            network['Area'] += [{'Number': area_num, 'Name': f'Area {area_num:02d}', 'AGC': 'Off AGC', 'SlackInjectionGroup': '',
+                                 'ExportMWSched': 0.0, 'BGScale': 'NO', 'EconDispLambda': round(rng.uniform(20, 40), 2)}]
+            area_gen_idx = 0
+            for idx in range(buses_per_area):
+                bus_num = area_num * 1000 + idx + 1
+                network['Bus'] += [{'BusNum': bus_num, 'BusName': f'BUS_{bus_num}', 'AreaNumber': area_num,
+                                    'OwnerNumber': 100 + rng.randint(1, 4), 'NomkV': rng.choice([115.0, 230.0, 500.0])}]
+                network['Load'] += [{'BusNum': bus_num, 'LoadID': '1', 'LoadMW': round(rng.uniform(10, 100), 1), 'Status': 'Closed', 'AGC': 'YES'}]
+                if idx % 4 == 0:
+                    gen_max = round(rng.uniform(150, 500), 1)
+                    network['Gen'] += [{'BusNum': bus_num, 'GenID': '1', 'GenMW': round(0.5 * gen_max, 1), 'GenMWMax': gen_max,
+                                        'GenMWMin': 0.0, 'Status': 'Closed', 'Part': area_gen_idx % 3}]
+                    area_gen_idx += 1
+                if idx % 10 == 5:
+                    mvar_nom = rng.choice([-50.0, -25.0, 25.0, 50.0])
+                    network['Shunt'] += [{'BusNum': bus_num, 'ID': '1', 'RegBusNum': bus_num, 'Status': 'Closed',
+                                          'ShuntMode': 'Fixed', 'RegulationType': 'Volt', 'MvarNom': mvar_nom, 'Mvar': mvar_nom}]
+                if idx > 0:
+                    from_num = area_num * 1000 + rng.randint(1, idx)
+                    network['Branch'] += [{'BusNumFrom': from_num, 'BusNumTo': bus_num, 'Circuit': '1', 'Status': 'Closed',
+                                           'IsXF': rng.choice(['NO', 'NO', 'NO', 'YES']), 'Weight': rng.uniform(0.05, 0.3), 'R': rng.uniform(1e-5, 1e-4)}]
+        # Tie lines between the areas
+        for idx in range(3):
+            network['Branch'] += [{'BusNumFrom': 1000 + 1 + 4 * idx, 'BusNumTo': 2000 + 2 + 4 * idx, 'Circuit': '1', 'Status': 'Closed',
+                                   'IsXF': 'NO', 'Weight': 0.0, 'R': 1e-5, 'Tie': True}]
+
+        # Injection groups: area gens split in three, plus all gens of each area
+        for area_num in [1, 2]:
+            gen_keys = [[__e['BusNum'], __e['GenID'], __e['Part']] for __e in network['Gen'] if __e['BusNum'] // 1000 == area_num]
+            network['InjectionGroup'] += [{'Name': f'Area_{area_num:02d}_Gens', 'Members': [__e[0:2] for __e in gen_keys], 'BGScale': 'NO', 'EnforceGenMWLimits': 'YES'}]
+        area_1_gens = [[__e['BusNum'], __e['GenID'], __e['Part']] for __e in network['Gen'] if __e['BusNum'] // 1000 == 1]
+        for name, part in [['Censored Total Gen', 0], ['Inj_Grp_1', 1], ['Inj_Grp_2', 2]]:
+            network['InjectionGroup'] += [{'Name': name, 'Members': [__e[0:2] for __e in area_1_gens if __e[2] == part], 'BGScale': 'NO', 'EnforceGenMWLimits': 'YES'}]
+
+        # The system slack: the first gen in area 2
+        network['system_slack'] = [network['Gen'][-1]['BusNum'] // 1000 * 1000 + 1, '1']
+        network['base_area_load'] = {__e: self.area_load(network, __e) for __e in [1, 2]}
+        self.solve_network(network)
+        network['solved'] = True
+        return network
+
+    def bus_record(self, network, bus_num):
+        # Bus lookup by number through an index kept with the network
+        if len(network.get('bus_index', {})) != len(network['Bus']):
+            network['bus_index'] = {int(float(__e['BusNum'])): __e for __e in network['Bus']}
+        try:
+            return network['bus_index'].get(int(float(bus_num)), None)
+        except ValueError:
+            return None
+
+    def area_of_bus(self, network, bus_num):
+        bus = self.bus_record(network, bus_num)
+        if bus is not None:
+            return int(float(bus['AreaNumber']))
+        return int(float(bus_num)) // 1000
+
+    def area_load(self, network, area_num):
+        return sum([float(__e['LoadMW']) for __e in network['Load'] if __e['Status'] == 'Closed' and self.area_of_bus(network, __e['BusNum']) == area_num])
+
+    def group_gens(self, network, group):
+        return [__g for __g in network['Gen'] if [__g['BusNum'], __g['GenID']] in group['Members'] and __g['Status'] == 'Closed']
+
+    def find_group(self, network, name):
+        for group in network['InjectionGroup']:
+            if same_value(group['Name'], name):
+                return group
+        return None
+
+    '''*********************************************************************'''
+    # "Powerflow"
+
+    def solve_network(self, network):
+        # Balance the network.  Losses are "loss_pct" of load, split over the
+        #   branches by weight; flows scale with the area load.
+        # An area on 'IG Slack' AGC covers its own load, losses and scheduled
+        #   export with its slack injection group; the system slack gen
+        #   covers what is left.
+        loss_pct = float(self.options.get('loss_pct', 0.02))
+        for area in network['Area']:
+            area_num = int(area['Number'])
+            load_mw = self.area_load(network, area_num)
+            area['LoadMW'] = load_mw
+            area['LossMW'] = loss_pct * load_mw
+            area['ShuntMW'] = 0.0
+            if area['AGC'] == 'IG Slack':
+                group = self.find_group(network, area['SlackInjectionGroup'])
+                if group is not None:
+                    slack_gens = self.group_gens(network, group)
+                    slack_ids = [id(__g) for __g in slack_gens]
+                    other_gen = sum([float(__g['GenMW']) for __g in network['Gen'] if __g['Status'] == 'Closed' and self.area_of_bus(network, __g['BusNum']) == area_num and id(__g) not in slack_ids])
+                    needed = load_mw + area['LossMW'] + float(area['ExportMWSched']) - other_gen
+                    total_max = sum([float(__g['GenMWMax']) for __g in slack_gens])
+                    for gen in slack_gens:
+                        gen['GenMW'] = needed * float(gen['GenMWMax']) / total_max if total_max > 0 else 0.0
+
+        # System slack covers the rest
+        total_load = sum([__e['LoadMW'] + __e['LossMW'] for __e in network['Area']])
+        slack_gen = [__g for __g in network['Gen'] if same_value(__g['BusNum'], network['system_slack'][0])][0]
+        other_gen = sum([float(__g['GenMW']) for __g in network['Gen'] if __g['Status'] == 'Closed' and __g is not slack_gen])
+        slack_gen['GenMW'] = total_load - other_gen
+
+        for area in network['Area']:
+            area_num = int(area['Number'])
+            area['GenMW'] = sum([float(__g['GenMW']) for __g in network['Gen'] if __g['Status'] == 'Closed' and self.area_of_bus(network, __g['BusNum']) == area_num])
+            area['ExportMW'] = area['GenMW'] - area['LoadMW'] - area['LossMW']
+            area['ACE'] = area['ExportMW'] - float(area['ExportMWSched'])
+            group = self.find_group(network, area['SlackInjectionGroup'])
+            area['SlacIGMW'] = sum([float(__g['GenMW']) for __g in self.group_gens(network, group)]) if group is not None else 0.0
+
+        # Branch flows
+        area_2_export = [__e['ExportMW'] for __e in network['Area'] if int(__e['Number']) == 2][0]
+        ties = [__e for __e in network['Branch'] if __e.get('Tie', False)]
+        for branch in network['Branch']:
+            if branch.get('Tie', False):
+                mw_from = -area_2_export / len(ties)
+            else:
+                area_num = self.area_of_bus(network, branch['BusNumFrom'])
+                base_load = network['base_area_load'].get(area_num, 1.0)
+                mw_from = branch['Weight'] * self.area_load(network, area_num) * (self.area_load(network, area_num) / base_load if base_load > 0 else 1.0)
+            loss_mw = branch['R'] * mw_from**2 if branch['Status'] == 'Closed' else 0.0
+            branch['MWFrom'] = mw_from if branch['Status'] == 'Closed' else 0.0
+            branch['MWTo'] = -(branch['MWFrom'] - loss_mw)
+            branch['LossMW'] = loss_mw
+
+        # Mismatch left by the solve grows with how far the case moved
+        residual = 1e-4 * network['changed_mw']
+        for bus in network['Bus']:
+            bus['BusMismatchP'] = residual
+            bus['BusMismatchQ'] = residual / 2
+        network['changed_mw'] = 0.0
+
+    '''*********************************************************************'''
+    # Field access
+
+    def field_name(self, obj_type, field):
+        return self.field_aliases.get(field, {}).get(obj_type, field)
+
+    def get_field(self, network, obj_type, record, field):
+        # Stored fields, then fields worked out from the network
+        field = self.field_name(obj_type, field)
+        if field in record:
+            return record[field]
+        if obj_type == 'Bus' and field == 'AreaNumber':
+            return self.area_of_bus(network, record['BusNum'])
+        if obj_type == 'InjectionGroup':
+            gens = self.group_gens(network, record)
+            if field == 'MW':
+                return sum([float(__g['GenMW']) for __g in gens])
+            if field == 'GenMWMin':
+                return sum([float(__g['GenMWMin']) for __g in gens])
+            if field == 'GenMWMax':
+                return sum([float(__g['GenMWMax']) for __g in gens])
+        if obj_type == 'Filter' and field == 'NumElements':
+            return len([__c for __c in network['Condition'] if same_value(__c['ObjectType'], record['ObjectType']) and same_value(__c['FilterName'], record['FilterName'])])
+        if 'BusNum' in record:
+            bus = self.bus_record(network, record['BusNum'])
+            if bus is not None:
+                if field == 'BusName':
+                    return bus['BusName']
+                if field == 'AreaNumber':
+                    return self.area_of_bus(network, record['BusNum'])
+                if field == 'OwnerNum1':
+                    return bus['OwnerNumber']
+        if obj_type == 'Branch':
+            side = 'From' if field.endswith('From') else 'To' if field.endswith('To') else ''
+            bus = self.bus_record(network, record[f'BusNum{side}']) if side != '' else None
+            if bus is not None:
+                if field.startswith('BusName'):
+                    return bus['BusName']
+                if field.startswith('AreaName'):
+                    return f'Area {self.area_of_bus(network, bus["BusNum"]):02d}'
+                if field.startswith('NomkV'):
+                    return bus['NomkV']
+            if field == 'OwnerNum1':
+                return self.bus_record(network, record['BusNumFrom'])['OwnerNumber']
+            if field == 'OwnerName1':
+                return f'Owner {self.bus_record(network, record["BusNumFrom"])["OwnerNumber"]}'
+        if obj_type == 'Shunt' and field == 'RegName':
+            return f'BUS_{record["RegBusNum"]}'
+        return ''
+
+    def format_value(self, value):
+        # SimAuto returns every value as a string
+        if type(value) == float:
+            return f'{value:.4f}'
+        return f'{value}'
+
+    def records(self, network, obj_type, filter_name = ''):
+        # Objects of "obj_type" that meet the named advanced filter ('' for all)
+        if obj_type == 'PartPointGen':
+            all_records = []
+            for group in network['InjectionGroup']:
+                for gen in self.group_gens(network, group):
+                    all_records += [dict(gen, GroupName = group['Name'])]
+        elif obj_type == 'AreaTieLine':
+            all_records = []
+            for branch in [__e for __e in network['Branch'] if __e.get('Tie', False)]:
+                for near, far in [['From', 'To'], ['To', 'From']]:
+                    near_area = self.area_of_bus(network, branch[f'BusNum{near}'])
+                    far_area = self.area_of_bus(network, branch[f'BusNum{far}'])
+                    all_records += [{'TieType': 'Branch', 'AreaNumNear': near_area, 'AreaNameNear': f'Area {near_area:02d}',
+                                     'BusNumNear': branch[f'BusNum{near}'], 'BusNameNear': f'BUS_{branch[f"BusNum{near}"]}',
+                                     'AreaNumFar': far_area, 'AreaNameFar': f'Area {far_area:02d}',
+                                     'BusNumFar': branch[f'BusNum{far}'], 'BusNameFar': f'BUS_{branch[f"BusNum{far}"]}',
+                                     'Circuit': branch['Circuit'], 'MWMeter': branch['MWFrom'] if near == 'From' else branch['MWTo']}]
+        else:
+            all_records = network.get(obj_type, [])
+        if filter_name in ['', None]:
+            return all_records
+        filter_record = self.find(network, 'Filter', ['ObjectType', 'FilterName'], [obj_type, filter_name])
+        if filter_record is None:
+            # Unknown filters select everything (the stand-in has no filter file)
+            return all_records
+        conditions = [__c for __c in network['Condition'] if same_value(__c['ObjectType'], obj_type) and same_value(__c['FilterName'], filter_name)]
+        if len(conditions) == 0:
+            return all_records
+        selected = []
+        for record in all_records:
+            meets = [self.meets_condition(network, obj_type, record, __c) for __c in conditions]
+            if (all(meets) if f'{filter_record.get("FilterLogic", "AND")}'.upper() == 'AND' else any(meets)):
+                selected += [record]
+        return selected
+
+    def meets_condition(self, network, obj_type, record, condition):
+        value = self.get_field(network, obj_type, record, condition.get('VariableName', ''))
+        condition_type = f'{condition.get("ConditionType", "=")}'.replace(' ', '').lower()
+        target = f'{condition.get("ConditionValue", "")}'
+        try:
+            value = float(value)
+            if f'{condition.get("ConditionCaseAbs", "NO")}'.upper() == 'YES':
+                value = abs(value)
+            if condition_type == 'inrange':
+                targets = [float(__e) for __e in target.split(',') if __e.strip() != '']
+                return value in targets
+            target = float(target)
+        except ValueError:
+            value = f'{value}'.lower()
+            target = target.lower()
+            if condition_type == 'inrange':
+                return value in [__e.strip() for __e in target.split(',')]
+        if condition_type == '=':
+            return value == target
+        if condition_type in ['<>', '!=']:
+            return value != target
+        if condition_type == '<':
+            return value < target
+        if condition_type == '>':
+            return value > target
+        if condition_type == '<=':
+            return value <= target
+        if condition_type == '>=':
+            return value >= target
+        # Unknown condition types do not narrow the selection
+        return True
+
+    def find(self, network, obj_type, fields, values):
+        # First object matching the key fields given (blank values are not keys)
+        keys = [[self.field_name(obj_type, __f), __v] for __f, __v in zip(fields, values) if self.field_name(obj_type, __f) in self.key_fields.get(obj_type, []) and f'{__v}'.strip() != '']
+        if len(keys) == 0:
+            return None
+        for record in self.records(network, obj_type):
+            if all([same_value(record.get(__f, ''), __v) for __f, __v in keys]):
+                return record
+        return None
+
+    def set_fields(self, network, obj_type, record, fields, values):
+        for field, value in zip(fields, values):
+            field = self.field_name(obj_type, field)
+            if field in self.key_fields.get(obj_type, []):
+                continue
+            if obj_type == 'Load' and field == 'LoadMW':
+                network['changed_mw'] += abs(float(value) - float(record.get('LoadMW', 0.0)))
+            if obj_type == 'Gen' and field == 'GenMW':
+                network['changed_mw'] += abs(float(value) - float(record.get('GenMW', 0.0)))
+            record[field] = value
+        network['solved'] = False
+
+    def create(self, network, obj_type, fields, values):
+        record = self.find(network, obj_type, fields, values)
+        if record is None:
+            record = {self.field_name(obj_type, __f): __v for __f, __v in zip(fields, values)}
+            network.setdefault(obj_type, []).append(record)
+        else:
+            self.set_fields(network, obj_type, record, fields, values)
+
+    '''*********************************************************************'''
+    # SimAuto calls
+
+    def wait(self, name):
+        import time
+        seconds = self.latency.get(name, self.latency.get('default', 0.0))
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def no_case(self):
+        return ('No case open',)
+
+    def OpenCase(self, case_file):
+        self.num_calls += 1
+        self.wait('OpenCase')
+        self.case_file = case_file
+        # A case file saved by "SaveCase" opens as saved; other names get a new network
+        self.network = self.read_case(case_file)
+        if self.network is None:
+            self.network = self.build_network(case_file)
+        self.saved_state = None
+        return ('',)
+
+    def read_case(self, case_file):
+        # Network from a "SaveCase" file, or None if it isn't one
+        import os
+        import pickle
+        if not os.path.isfile(case_file):
+            return None
+        with open(case_file, 'rb') as f:
+            if f.read(len(case_file_tag)) != case_file_tag:
+                return None
+            return pickle.load(f)
+
+    def write_case(self, case_file, network):
+        import pickle
+        with open(case_file, 'wb') as f:
+            f.write(case_file_tag)
+            pickle.dump(network, f)
+
+    def CloseCase(self):
+        self.num_calls += 1
+        self.wait('CloseCase')
+        self.case_file = None
+        self.network = None
+        self.saved_state = None
+        return ('',)
+
+    def SaveState(self):
+        import copy
+        self.num_calls += 1
+        self.wait('SaveState')
+        if self.network is None:
+            return self.no_case()
+        self.saved_state = copy.deepcopy(self.network)
+        return ('',)
+
+    def LoadState(self):
+        import copy
+        self.num_calls += 1
+        self.wait('LoadState')
+        if self.saved_state is None:
+            return ('No saved state',)
+        self.network = copy.deepcopy(self.saved_state)
+        return ('',)
+
+    def GetParametersSingleElement(self, obj_type, fields, values):
+        self.num_calls += 1
+        self.wait('GetParametersSingleElement')
+        if self.network is None:
+            return (self.no_case()[0], None)
+        record = self.find(self.network, obj_type, fields, values)
+        if record is None:
+            return (f'GetParametersSingleElement: {obj_type} {values} not found', None)
+        # Sized like the value list passed in, as SimAuto does
+        values_out = [self.format_value(self.get_field(self.network, obj_type, record, __f)) for __f in fields]
+        return ('', tuple(values_out + [''] * (len(values) - len(values_out))))
+
+    def GetParametersMultipleElement(self, obj_type, fields, filter_name):
+        # Column per field
+        result = self.GetParametersMultipleElementRect(obj_type, fields, filter_name)
+        if result[0] != '' or result[1] is None:
+            return result
+        return ('', tuple([tuple([__r[__i] for __r in result[1]]) for __i in range(len(fields))]))
+
+    def GetParametersMultipleElementRect(self, obj_type, fields, filter_name):
+        # Row per object
+        self.num_calls += 1
+        self.wait('GetParametersMultipleElementRect')
+        if self.network is None:
+            return (self.no_case()[0], None)
+        records = self.records(self.network, obj_type, filter_name)
+        if len(records) == 0:
+            return ('', None)
+        return ('', tuple([tuple([self.format_value(self.get_field(self.network, obj_type, __r, __f)) for __f in fields]) for __r in records]))
+
+    def ChangeParametersSingleElement(self, obj_type, fields, values):
+        self.num_calls += 1
+        self.wait('ChangeParametersSingleElement')
+        if self.network is None:
+            return self.no_case()
+        record = self.find(self.network, obj_type, fields, values)
+        if record is None:
+            return (f'ChangeParametersSingleElement: {obj_type} {values} not found',)
+        self.set_fields(self.network, obj_type, record, fields, values)
+        return ('',)
+
+    def ChangeParametersMultipleElementRect(self, obj_type, fields, rows):
+        self.num_calls += 1
+        self.wait('ChangeParametersMultipleElementRect')
+        if self.network is None:
+            return self.no_case()
+        for values in rows:
+            record = self.find(self.network, obj_type, fields, values)
+            if record is None:
+                return (f'ChangeParametersMultipleElementRect: {obj_type} {values} not found',)
+            self.set_fields(self.network, obj_type, record, fields, values)
+        return ('',)
+
+    def ChangeParameters(self, obj_type, fields, values):
+        return self.ChangeParametersSingleElement(obj_type, fields, values)
+
+    def RunScriptCommand(self, script):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        self.num_calls += 1
+        if self.network is None:
+            return self.no_case()
+        try:
+            for verb, args in parse_script(script):
+                self.wait(verb)
+                result = self.run_command(verb, args)
+                if result[0] != '':
+                    return result
+            return ('',)
+        except Exception as e:
+            err = f'Script error ({script[0:80]}): {e}, {print_exception()}'
+            logger.log(logging.DEBUG, err, extra = extra)
+            return (err,)
+
+    def run_command(self, verb, args):
+        network = self.network
+        key = verb.lower()
+        if key == 'solvepowerflow':
+            limit = self.options.get('diverge_above_mw', None)
+            if limit is not None and network['changed_mw'] > float(limit):
+                network['changed_mw'] = 0.0
+                return ('SolvePowerFlow: power flow did not converge',)
+            self.solve_network(network)
+            network['solved'] = True
+        elif key == 'createdata':
+            obj_type, fields, values = args[0:3]
+            self.create(network, obj_type, fields, values)
+        elif key == 'setdata':
+            obj_type, fields, values = args[0:3]
+            where = args[3] if len(args) > 3 else ''
+            if where == '':
+                record = self.find(network, obj_type, fields, values)
+                if record is None:
+                    return (f'SetData: {obj_type} {values} not found',)
+                targets = [record]
+            elif f'{where}'.upper() == 'ALL':
+                targets = self.records(network, obj_type)
+            elif '<DEVICE>InjectionGroup' in f'{where}':
+                group = self.find_group(network, f'{where}'.split("'")[1])
+                targets = self.group_gens(network, group) if group is not None else []
+            else:
+                targets = self.records(network, obj_type, where)
+            for record in targets:
+                # "@Field" copies another field of the same object
+                self.set_fields(network, obj_type, record, fields, [record.get(__v[1:], '') if f'{__v}'.startswith('@') else __v for __v in values])
+        elif key == 'scale':
+            self.scale(network, f'{args[0]}'.upper(), float(args[2][0]))
+        elif key == 'injectiongroupcreate':
+            name = args[0]
+            area_num = int(f'{args[3]}'.split('"')[1]) if '"' in f'{args[3]}' else 0
+            members = [[__g['BusNum'], __g['GenID']] for __g in network['Gen'] if self.area_of_bus(network, __g['BusNum']) == area_num]
+            self.create(network, 'InjectionGroup', ['Name', 'Members', 'BGScale', 'EnforceGenMWLimits'], [name, members, 'NO', 'YES'])
+        elif key == 'savecase':
+            try:
+                self.write_case(args[0], network)
+            except OSError as e:
+                return (f'SaveCase: could not write {args[0]}: {e}',)
+        elif key == 'savedata':
+            # SaveData("file", CSV, ObjectType, [fields], [], "filter"): header lines
+            #   of object type and field names, then a row per object
+            import csv
+            export_file, obj_type, fields = args[0], args[2], args[3]
+            filter_name = args[5] if len(args) > 5 else ''
+            with open(export_file, 'w', newline = '') as f:
+                writer = csv.writer(f)
+                writer.writerow([obj_type])
+                writer.writerow(fields)
+                for record in self.records(network, obj_type, filter_name):
+                    writer.writerow([self.format_value(self.get_field(network, obj_type, record, __f)) for __f in fields])
+        # Anything else (LoadAux, AutoInsertTieLineTransactions, ResetToFlatStart, ...) is accepted as done
+        return ('',)
+
+    def scale(self, network, obj_type, total_mw):
+        # Scale(LOAD, MW, [x]): loads in the areas set to scale, to x MW in all
+        # Scale(INJECTIONGROUP, MW, [x]): gens of the groups set to scale, to x MW
+        if obj_type == 'LOAD':
+            areas = [int(__e['Number']) for __e in network['Area'] if f'{__e.get("BGScale", "NO")}'.upper() == 'YES']
+            loads = [__e for __e in network['Load'] if __e['Status'] == 'Closed' and self.area_of_bus(network, __e['BusNum']) in areas]
+            current = sum([float(__e['LoadMW']) for __e in loads])
+            for load in loads:
+                self.set_fields(network, 'Load', load, ['LoadMW'], [float(load['LoadMW']) * total_mw / current if current > 0 else 0.0])
+        elif obj_type == 'INJECTIONGROUP':
+            for group in [__e for __e in network['InjectionGroup'] if f'{__e.get("BGScale", "NO")}'.upper() == 'YES']:
+                gens = self.group_gens(network, group)
+                total_max = sum([float(__g['GenMWMax']) for __g in gens])
+                for gen in gens:
+                    gen_mw = total_mw * float(gen['GenMWMax']) / total_max if total_max > 0 else 0.0
+                    if f'{group.get("EnforceGenMWLimits", "YES")}'.upper() == 'YES':
+                        gen_mw = min(max(gen_mw, float(gen['GenMWMin'])), float(gen['GenMWMax']))
+                    self.set_fields(network, 'Gen', gen, ['GenMW'], [gen_mw])
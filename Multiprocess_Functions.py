@@ -0,0 +1,1156 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:41 2026
+
+@author: Jeff Barton
+         Electrical Engineer
+         Transmission Long Term Planning
+         Bonneville Power Administration
+         jgbarton@bpa.gov
+
+Change log:
+v0:
+    Pool supervisor for running a case array on a multiprocessing pool.
+    The supervisor can be called from the headless "main()" or from a
+    worker hosted in a QThread.  Per-case completions are streamed back
+    through a callback so the GUI can be updated with "progress_report"
+    signals while the pool is working.
+    
+    Log forwarding: pool workers put compact log records on a queue and
+    a single listener thread in the parent passes them to the parent
+    logger, so they reach the "QtHandler" and the console handler.
+    
+    Pool sizing: the pool size is picked from the physical/logical cores
+    and available RAM, then adjusted after the first few cases have been
+    measured (runtime, CPU time, and peak memory per case).
+    
+    Pool service: a warm pool created once by the application, with the
+    worker modules imported in advance, and leased to each run.
+    
+    Case journal: an append-only file of completed case results used to
+    resume a run after a crash without repeating the finished cases.
+    
+    Runtime history: case runtimes saved from previous runs are used to
+    dispatch the longest cases first and to predict the run time.
+    
+    Case timeout: pool workers report when they start a case.  When a case
+    is still running after "case_timeout" seconds it is recorded as timed
+    out, the whole pool is terminated and joined (killing one worker could
+    leave a shared queue locked), and a new pool with new queues runs the
+    other cases that were in the old one again.
+    
+    Cancel and pause: with a "Cancel_Token" (General_Functions.py) the
+    supervisor stops handing cases to the pool while paused or cancelled.
+    A cancelled run waits for the cases already running and returns them.
+    
+    Reorder buffer: results finish out of order; the buffer releases them in
+    case order as soon as every earlier case is done, so results can be
+    written while the pool is still running.
+    
+    Process setup: a function run once in each pool process when it starts
+    (e.g. "Powerworld_Functions.simulator_process_setup" to give every
+    process its own long-lived simulator).
+
+'''*************************************************************************'''
+"""
+import logging
+import logging.handlers
+from inspect import currentframe as cf # Used to identify the current function -- avoids some copy-paste issues when making new defs
+
+# The calling worker function replaces this with its own logger
+logger = logging.getLogger(__name__)
+
+# In a pool process, the logger that forwards records to the parent process
+pool_worker_logger = None
+
+# In a pool process, the queue used to tell the parent when a case starts
+pool_event_queue = None
+
+# The application's warm pool (see "get_pool_service")
+pool_service = None
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                         Basic Functions                               ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+def print_exception():
+    # Return line number data from the last exception
+    from linecache import getline, checkcache
+    from sys import exc_info
+    exc_type, exc_obj, tb = exc_info()
+    f = tb.tb_frame
+    lineno = tb.tb_lineno
+    filename = f.f_code.co_filename
+    checkcache(filename)
+    line = getline(filename, lineno, f.f_globals)
+    return[f'LINE {lineno} "{line.strip()}"']
+
+
+'''*************************************************************************'''
+def make_progress_report(last_update, case_name, num_done, num_cases):
+    # Build a list in the form expected by "My_Application.report_progress":
+    # [last_update, case_name, case_num, case_pct, model_name, model_num, model_pct]
+    if num_cases > 0:
+        case_pct = int(100 * num_done / num_cases)
+    else:
+        case_pct = 0
+    return [last_update, case_name, f'{num_done} of {num_cases}', case_pct, 'none', '0 of 0', 0]
+
+
+'''*************************************************************************'''
+def case_hash(case, key_params = None):
+    # Hash of a case's parameters ("key_params" picks them; default: the whole
+    #   case).  Used by "Case_Journal" and "Runtime_History" to match cases across runs.
+    import hashlib
+    import json
+    if key_params is not None:
+        case = key_params(case)
+    case_text = json.dumps(case, sort_keys = True, default = str)
+    return hashlib.sha1(case_text.encode('utf-8')).hexdigest()
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                           Log Forwarding                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+# Only these LogRecord attributes are sent from the pool workers to the parent.
+#   The message is formatted in the worker, so "args" and "exc_info" are not sent.
+LOG_RECORD_FIELDS = ['name', 'levelno', 'levelname', 'msg', 'lineno', 'pathname', 'filename',
+                     'module', 'funcName', 'created', 'msecs', 'processName', 'qThreadName']
+
+# Custom logging levels used by the worker functions: [name, level]
+CUSTOM_LOG_LEVELS = [['SUBINFO', 15], ['DATA', 6], ['SUBDATA', 5]]
+
+
+class Compact_Queue_Handler(logging.handlers.QueueHandler):
+    # Puts a small dict on the queue instead of the full LogRecord
+    def prepare(self, record):
+        message = record.getMessage()
+        if record.exc_info:
+            message += '\n' + logging.Formatter().formatException(record.exc_info)
+        compact = {field: getattr(record, field, None) for field in LOG_RECORD_FIELDS}
+        compact['msg'] = message
+        # Label the record with the pool process that made it
+        compact['qThreadName'] = f'{record.processName}: {getattr(record, "qThreadName", record.funcName)}'
+        return compact
+
+
+class Forward_Handler(logging.Handler):
+    # Used by the listener in the parent process.  Rebuilds the LogRecord and
+    #   passes it to the parent logger, which sends it to all of its handlers.
+    def __init__(self, target_logger):
+        super(Forward_Handler, self).__init__()
+        self.target_logger = target_logger
+
+    def handle(self, record):
+        # The listener hands over the compact dict from the queue
+        if type(record) == dict:
+            record = logging.makeLogRecord(record)
+        self.target_logger.handle(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+
+'''*************************************************************************'''
+def add_custom_log_levels():
+    # Register SUBINFO, DATA, and SUBDATA in this process if they are missing.
+    #   Spawned pool processes do not run the GUI or "main()" logging setup.
+    for level_name, level_num in CUSTOM_LOG_LEVELS:
+        if not hasattr(logging, level_name):
+            logging.addLevelName(level_num, level_name)
+            setattr(logging, level_name, level_num)
+
+
+'''*************************************************************************'''
+def start_log_listener(target_logger):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Create the queue used by the pool workers and start one listener thread in
+    #   this process that feeds "target_logger".
+    # Returns [err, action, [log_queue, listener]]
+
+    try:
+        import multiprocessing
+
+        log_queue = multiprocessing.Queue()
+        listener = logging.handlers.QueueListener(log_queue, Forward_Handler(target_logger))
+        listener.start()
+        logger.log(logging.DEBUG, 'Log listener started', extra = extra)
+        return ['', '', [log_queue, listener]]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, [None, None]]
+
+
+'''*************************************************************************'''
+def stop_log_listener(listener, timeout = None):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Flush any queued records to the parent logger and stop the listener thread.
+    # With "timeout" (seconds), give up waiting after that long: a pool process
+    #   killed while writing to the queue can leave it locked, so the stop
+    #   message would never arrive.  The queue is then abandoned.
+    if listener is None:
+        return
+    if timeout is None:
+        listener.stop()
+        return
+    listener.enqueue_sentinel()
+    listener._thread.join(timeout)
+    if listener._thread.is_alive():
+        logger.log(logging.WARNING, f'Log listener did not stop in {timeout} s; its queue is abandoned', extra = extra)
+        # Don't wait on the queue's feeder thread when this process exits
+        listener.queue.cancel_join_thread()
+    listener._thread = None
+
+
+'''*************************************************************************'''
+def pool_worker_initializer(log_queue, log_level, module_names, event_queue = None, process_setup = None):
+    # Runs once in each pool process when it starts.
+    # The worker modules use a module level "logger".  Point it at a logger that
+    #   only puts records on "log_queue" so the parent can log them.
+    # "module_names" are imported here, so a warm pool has them loaded before
+    #   the first case arrives.
+    # "event_queue" receives a message each time this process starts a case
+    #   (used by the case timeout watchdog).
+    # "process_setup" (a module level function or a functools.partial of one) is
+    #   called last, once for the life of the process.
+    add_custom_log_levels()
+
+    worker_logger = logging.getLogger('pool_worker')
+    worker_logger.handlers = []
+    worker_logger.propagate = False
+    worker_logger.setLevel(log_level)
+    if log_queue is not None:
+        worker_logger.addHandler(Compact_Queue_Handler(log_queue))
+
+    global logger
+    global pool_worker_logger
+    global pool_event_queue
+    logger = worker_logger
+    pool_worker_logger = worker_logger
+    pool_event_queue = event_queue
+    for module_name in module_names:
+        prepare_worker_module(module_name)
+    if process_setup is not None:
+        process_setup()
+
+
+'''*************************************************************************'''
+def prepare_worker_module(module_name):
+    # Runs in the pool process.  Import "module_name" if needed and point its
+    #   "logger" at the forwarding logger set up by "pool_worker_initializer".
+    import sys
+    if pool_worker_logger is None:
+        return
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = __import__(module_name)
+    if getattr(module, 'logger', None) is not pool_worker_logger:
+        # The worker modules also expect "logging" as a global (normally set in "main()")
+        module.logging = logging
+        module.logger = pool_worker_logger
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                             Pool Sizing                               ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+# Default settings for "choose_pool_size".  Any of these can be overridden with
+#   the "sizing_options" dict passed to "pool_supervisor".
+POOL_SIZING_DEFAULTS = {
+    'reserve_cores' : 2,        # Cores left free for the GUI, Excel, etc. (I used to set the pool to two less than my cores)
+    'ram_fraction' : 0.8,       # Fraction of the available RAM the pool may use
+    'probe_cases' : 3,          # Number of completed cases measured before the pool size is adjusted
+    'io_bound_cpu_ratio' : 0.5, # Below this CPU/wall time ratio, cases are waiting on something else and can use logical cores
+    }
+
+
+'''*************************************************************************'''
+def get_machine_resources():
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Detect the physical cores, logical cores, and available RAM (bytes) of this machine.
+    # "psutil" is used when it is installed.  Otherwise this falls back to what
+    #   the operating system provides.  Unknown values are returned as None.
+    # Returns [err, action, {'physical_cores': , 'logical_cores': , 'available_ram': }]
+
+    try:
+        import os
+        import sys
+
+        logical_cores = os.cpu_count() or 1
+        if hasattr(os, 'sched_getaffinity'):
+            # Respect any CPU affinity limit placed on this process
+            logical_cores = len(os.sched_getaffinity(0)) or logical_cores
+        physical_cores = None
+        available_ram = None
+
+        try:
+            import psutil
+            physical_cores = psutil.cpu_count(logical = False)
+            available_ram = psutil.virtual_memory().available
+        except ImportError:
+            if sys.platform.startswith('linux'):
+                # Count unique (physical id, core id) pairs
+                with open('/proc/cpuinfo', 'r') as cpuinfo:
+                    core_ids = set()
+                    physical_id = ''
+                    for line in cpuinfo:
+                        if line.startswith('physical id'):
+                            physical_id = line.split(':')[1].strip()
+                        elif line.startswith('core id'):
+                            core_ids.add((physical_id, line.split(':')[1].strip()))
+                if len(core_ids) > 0:
+                    physical_cores = len(core_ids)
+                with open('/proc/meminfo', 'r') as meminfo:
+                    for line in meminfo:
+                        if line.startswith('MemAvailable'):
+                            available_ram = int(line.split()[1]) * 1024
+                            break
+            elif sys.platform.startswith('win'):
+                import ctypes
+                class MEMORYSTATUSEX(ctypes.Structure):
+                    _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                                ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                                ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                                ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                                ('sullAvailExtendedVirtual', ctypes.c_ulonglong)]
+                memory_status = MEMORYSTATUSEX()
+                memory_status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+                if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(memory_status)):
+                    available_ram = memory_status.ullAvailPhys
+
+        if physical_cores is None:
+            # Assume no hyperthreading
+            physical_cores = logical_cores
+        physical_cores = min(physical_cores, logical_cores)
+
+        resources = {'physical_cores' : physical_cores, 'logical_cores' : logical_cores, 'available_ram' : available_ram}
+        logger.log(logging.DATA, f'resources = {resources}', extra = extra)
+        return ['', '', resources]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, {'physical_cores' : 1, 'logical_cores' : 1, 'available_ram' : None}]
+
+
+'''*************************************************************************'''
+def choose_pool_size(resources, num_cases, case_stats = None, sizing_options = None):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Pick the number of cases to run at once.
+    #   Before any cases are measured, use the physical cores less "reserve_cores".
+    #   After cases are measured ("case_stats" from "measured_call"):
+    #     - If the cases mostly wait (low CPU/wall ratio), allow the logical cores.
+    #     - Limit the count so the peak memory of the workers fits in the available RAM.
+    # Returns [err, action, [pool_size, reason]]
+
+    try:
+        if case_stats is None:
+            case_stats = []
+        options = dict(POOL_SIZING_DEFAULTS)
+        if sizing_options is not None:
+            options.update(sizing_options)
+
+        cpu_limit = max(1, resources['physical_cores'] - options['reserve_cores'])
+        reason = f'{resources["physical_cores"]} physical cores less {options["reserve_cores"]} reserved'
+
+        if len(case_stats) > 0:
+            wall_time = sum([__e['wall_time'] for __e in case_stats])
+            cpu_time = sum([__e['cpu_time'] for __e in case_stats])
+            if wall_time > 0 and cpu_time / wall_time < options['io_bound_cpu_ratio']:
+                cpu_limit = max(1, resources['logical_cores'] - options['reserve_cores'])
+                reason = f'cases are not CPU bound (cpu/wall = {cpu_time / wall_time:.2f}), using logical cores'
+
+            peak_mem = max([__e['peak_mem'] or 0 for __e in case_stats])
+            if peak_mem > 0 and resources['available_ram'] is not None:
+                mem_limit = max(1, int(options['ram_fraction'] * resources['available_ram'] / peak_mem))
+                if mem_limit < cpu_limit:
+                    cpu_limit = mem_limit
+                    reason = f'limited by RAM ({peak_mem/2**20:.0f} MB per worker, {resources["available_ram"]/2**20:.0f} MB available)'
+
+        pool_size = max(1, min(cpu_limit, num_cases))
+        logger.log(logging.DATA, f'pool_size = {pool_size}, reason = {reason}', extra = extra)
+        return ['', '', [pool_size, reason]]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, [1, 'exception']]
+
+
+'''*************************************************************************'''
+def get_peak_memory():
+    # Peak memory (bytes) used by the current process, or None if unknown
+    try:
+        import psutil
+        memory_info = psutil.Process().memory_info()
+        # "peak_wset" is only reported on Windows
+        return getattr(memory_info, 'peak_wset', memory_info.rss)
+    except ImportError:
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        if sys.platform == 'darwin':
+            return peak
+        return peak * 1024
+    except ImportError:
+        return None
+
+
+'''*************************************************************************'''
+def measured_call(worker_func, case, log_level = None, case_idx = None):
+    # Runs in the pool process.  Call "worker_func" and measure it.
+    # "log_level" is the parent's current level.  A warm pool outlives the
+    #   run that started it, so the level is sent with every case.
+    # "case_idx" is sent back with this process id when the case starts so
+    #   the parent can time the case (see "case_timeout").
+    # Returns [result, case_stats]
+    import os
+    import time
+    if pool_worker_logger is not None:
+        if log_level is not None:
+            pool_worker_logger.setLevel(log_level)
+        prepare_worker_module(worker_func.__module__)
+    if pool_event_queue is not None and case_idx is not None:
+        pool_event_queue.put(['start', case_idx, os.getpid(), time.time()])
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    result = worker_func(case)
+    case_stats = {'wall_time' : time.perf_counter() - start_wall,
+                  'cpu_time' : time.process_time() - start_cpu,
+                  'peak_mem' : get_peak_memory(),
+                  'pid' : os.getpid()}
+    return [result, case_stats]
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                             Pool Service                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+# Building a pool costs a process spawn and a re-import of the worker modules
+#   for every worker (seconds per worker on Windows).  The pool service builds
+#   the pool once and leases it to each run.
+class Pool_Service():
+    def __init__(self, target_logger, num_processes = None, preload_modules = None, process_setup = None):
+        # "target_logger" receives the log records from the pool processes
+        # "num_processes" defaults to the logical cores (the most "pool_supervisor" will use)
+        # "preload_modules" are imported by every worker when it starts
+        # "process_setup" is run once by every worker when it starts (see "pool_worker_initializer")
+        self.target_logger = target_logger
+        self.num_processes = num_processes
+        self.preload_modules = list(preload_modules) if preload_modules is not None else []
+        self.process_setup = process_setup
+        self.pool = None
+        self.log_queue = None
+        self.event_queue = None
+        self.listener = None
+        import threading
+        self.lease_lock = threading.Lock()
+
+    def start(self):
+        extra = {"qThreadName": 'def Pool_Service.start'}
+        # Create the pool and the log listener if they are not already running
+        # Returns [err, action, pool]
+        try:
+            if self.pool is not None:
+                return ['', '', self.pool]
+
+            import multiprocessing
+
+            if self.num_processes is None:
+                result = get_machine_resources()
+                self.num_processes = result[2]['logical_cores']
+
+            if self.listener is None:
+                result = start_log_listener(self.target_logger)
+                if result[0:2] != ['', '']:
+                    return [result[0], result[1], None]
+                self.log_queue, self.listener = result[2]
+                self.event_queue = multiprocessing.Queue()
+
+            self.pool = multiprocessing.Pool(self.num_processes, initializer = pool_worker_initializer,
+                                             initargs = (self.log_queue, self.target_logger.getEffectiveLevel(), self.preload_modules, self.event_queue,
+                                                         self.process_setup))
+            logger.log(logging.INFO, f'Warm pool started with {self.num_processes} processes. Preloaded modules: {self.preload_modules}', extra = extra)
+            return ['', '', self.pool]
+
+        except Exception as e:
+            err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+            action = 'Exception'
+            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, None]
+
+    def lease(self):
+        extra = {"qThreadName": 'def Pool_Service.lease'}
+        # Give the pool to one run at a time.  Call "release" when the run is done.
+        # Returns [err, action, pool]
+        if not self.lease_lock.acquire(blocking = False):
+            err = 'The warm pool is already leased to another run.'
+            action = 'Error'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, None]
+        result = self.start()
+        if result[0:2] != ['', '']:
+            self.lease_lock.release()
+        return result
+
+    def release(self):
+        if self.lease_lock.locked():
+            self.lease_lock.release()
+
+    def discard_pool(self):
+        # Throw away the pool (e.g. after a case timed out, the pool still waits
+        #   on the hung case and would never join).  The workers are terminated
+        #   and joined.  A terminated worker may have been holding the lock of the
+        #   log or event queue, so they are replaced too; the next "start" (or
+        #   "lease") starts a new pool with new queues and a new log listener.
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        stop_log_listener(self.listener, timeout = 5)
+        self.listener = None
+        self.log_queue = None
+        self.event_queue = None
+
+    def shutdown(self):
+        # Stop the workers and the log listener.  Called when the application closes.
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        stop_log_listener(self.listener)
+        self.listener = None
+        self.log_queue = None
+        self.event_queue = None
+
+
+'''*************************************************************************'''
+def get_pool_service(target_logger, num_processes = None, preload_modules = None):
+    # Return the application's pool service, creating and starting it on the first call
+    global pool_service
+    if pool_service is None:
+        pool_service = Pool_Service(target_logger, num_processes, preload_modules)
+        pool_service.start()
+    return pool_service
+
+
+'''*************************************************************************'''
+def shutdown_pool_service():
+    # Shut down the application's pool service if there is one
+    global pool_service
+    if pool_service is not None:
+        pool_service.shutdown()
+        pool_service = None
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                             Case Journal                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+# An append-only file with one JSON line per completed case:
+#   {"idx": case index, "hash": hash of the case parameters, "result": [err, action, result], "time": ...}
+# Each line is flushed to disk as soon as the case finishes, so a crash or
+#   reboot only loses the cases that were running.  On resume, cases with a
+#   matching index and hash and no error are not run again.
+class Case_Journal():
+    def __init__(self, journal_file, resume = False, key_params = None):
+        # "key_params" picks the case parameters that are hashed.  The default
+        #   hashes the whole case.  Leave out run options that don't change the
+        #   result (e.g. "use_multi_proc") so a resumed run can use other options.
+        self.journal_file = journal_file
+        self.resume = resume
+        self.key_params = key_params
+        self.entries = {}
+        self.journal = None
+
+    def open(self):
+        extra = {"qThreadName": 'def Case_Journal.open'}
+        # Load the journal if resuming, otherwise move any old journal aside.
+        #   Then open the journal for appending.
+        # Returns [err, action, number of journaled cases]
+        try:
+            import json
+            import os
+
+            journal_dir = os.path.dirname(self.journal_file)
+            if journal_dir != '' and not os.path.exists(journal_dir):
+                os.makedirs(journal_dir)
+
+            if os.path.isfile(self.journal_file):
+                if self.resume:
+                    with open(self.journal_file, 'r') as journal:
+                        for line_num, line in enumerate(journal):
+                            try:
+                                entry = json.loads(line)
+                            except ValueError:
+                                # A line cut short by a crash; that case will be run again
+                                logger.log(logging.WARNING, f'Skipping unreadable journal line {line_num + 1}', extra = extra)
+                                continue
+                            self.entries[(entry['idx'], entry['hash'])] = entry['result']
+                    logger.log(logging.INFO, f'Resuming from {self.journal_file}: {len(self.entries)} cases journaled', extra = extra)
+                else:
+                    os.replace(self.journal_file, self.journal_file + '.prev')
+                    logger.log(logging.DEBUG, f'Previous journal moved to {self.journal_file}.prev', extra = extra)
+
+            self.journal = open(self.journal_file, 'a')
+            if self.journal.tell() > 0:
+                # End a line cut short by a crash so the next entry starts on its own line
+                with open(self.journal_file, 'rb') as journal:
+                    journal.seek(-1, os.SEEK_END)
+                    if journal.read(1) != b'\n':
+                        self.journal.write('\n')
+            return ['', '', len(self.entries)]
+
+        except Exception as e:
+            err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+            action = 'Exception'
+            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, 0]
+
+    def completed(self, idx, case):
+        # The journaled result of a case that finished without an error, or None
+        result = self.entries.get((idx, case_hash(case, self.key_params)), None)
+        if result is not None and result[0:2] == ['', '']:
+            return result
+        return None
+
+    def record(self, idx, case, result):
+        # Append one completed case and force it to disk
+        import json
+        import os
+        from datetime import datetime
+        entry = {'idx' : idx, 'hash' : case_hash(case, self.key_params), 'result' : result, 'time' : datetime.now().isoformat()}
+        self.journal.write(json.dumps(entry, default = str) + '\n')
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.entries[(idx, entry['hash'])] = result
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                       Runtime History and LPT                         ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+# Cases are dispatched longest first ("Longest Processing Time" scheduling) so the
+#   slow cases don't end up running alone at the end of the study.  The runtime
+#   of each case is estimated from the runtimes saved by previous runs.
+class Runtime_History():
+    def __init__(self, history_file, key_params = None, feature = None):
+        # "key_params" picks the case parameters that identify a case (default: the whole case)
+        # "feature" returns a number that the runtime grows with (e.g. the size of
+        #   the case).  It is used to estimate the runtime of cases not run before.
+        self.history_file = history_file
+        self.key_params = key_params
+        self.feature = feature
+        self.entries = {}
+        # Filled in by "pool_supervisor": {'cores': , 'predicted': , 'actual': }
+        self.last_makespan = None
+
+    def load(self):
+        extra = {"qThreadName": 'def Runtime_History.load'}
+        # Returns [err, action, number of cases in the history]
+        try:
+            import json
+            import os
+            if os.path.isfile(self.history_file):
+                with open(self.history_file, 'r') as history:
+                    self.entries = json.load(history)
+            logger.log(logging.DEBUG, f'{len(self.entries)} case runtimes loaded from {self.history_file}', extra = extra)
+            return ['', '', len(self.entries)]
+
+        except Exception as e:
+            # A bad history only costs the schedule, so start over
+            err = f'Could not read runtime history {self.history_file}: {e}'
+            action = 'Warning Only'
+            logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+            self.entries = {}
+            return [err, action, 0]
+
+    def save(self):
+        extra = {"qThreadName": 'def Runtime_History.save'}
+        # Returns [err, action]
+        try:
+            import json
+            import os
+            history_dir = os.path.dirname(self.history_file)
+            if history_dir != '' and not os.path.exists(history_dir):
+                os.makedirs(history_dir)
+            # Write a temporary file and replace so a crash can't leave half a file
+            with open(self.history_file + '.tmp', 'w') as history:
+                json.dump(self.entries, history)
+            os.replace(self.history_file + '.tmp', self.history_file)
+            return ['', '']
+
+        except Exception as e:
+            err = f'Could not save runtime history {self.history_file}: {e}'
+            action = 'Warning Only'
+            logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action]
+
+    def record(self, case, runtime):
+        # Save the runtime of a completed case.  Repeat runs are averaged with the old value.
+        key = case_hash(case, self.key_params)
+        entry = self.entries.get(key, None)
+        if entry is None:
+            feature = float(self.feature(case)) if self.feature is not None else None
+            self.entries[key] = {'runtime' : runtime, 'feature' : feature, 'count' : 1}
+        else:
+            entry['runtime'] = 0.5 * entry['runtime'] + 0.5 * runtime
+            entry['count'] += 1
+
+    def estimate(self, cases):
+        # Estimate the runtime of each case:
+        #   1) the saved runtime of the same case,
+        #   2) a straight line fit of runtime against "feature" over all saved cases,
+        #   3) the average saved runtime,
+        #   4) 1.0 for every case when there is no history (keeps the case order).
+        # Returns a list of estimates in the order of "cases"
+        runtimes = [__e['runtime'] for __e in self.entries.values()]
+        points = [[__e['feature'], __e['runtime']] for __e in self.entries.values() if __e['feature'] is not None]
+
+        slope = None
+        if self.feature is not None and len(set([__e[0] for __e in points])) >= 2:
+            # Least squares fit
+            n = len(points)
+            mean_x = sum([__e[0] for __e in points]) / n
+            mean_y = sum([__e[1] for __e in points]) / n
+            sxx = sum([(__e[0] - mean_x)**2 for __e in points])
+            sxy = sum([(__e[0] - mean_x) * (__e[1] - mean_y) for __e in points])
+            slope = sxy / sxx
+            intercept = mean_y - slope * mean_x
+
+        estimates = []
+        for case in cases:
+            entry = self.entries.get(case_hash(case, self.key_params), None)
+            if entry is not None:
+                estimates += [entry['runtime']]
+            elif slope is not None:
+                estimates += [max(0.0, slope * float(self.feature(case)) + intercept)]
+            elif len(runtimes) > 0:
+                estimates += [sum(runtimes) / len(runtimes)]
+            else:
+                estimates += [1.0]
+        return estimates
+
+
+'''*************************************************************************'''
+def lpt_order(estimates):
+    # Indexes of "estimates" from the longest to the shortest.
+    #   Ties keep their original order.
+    return sorted(range(len(estimates)), key = lambda __i: -estimates[__i])
+
+
+'''*************************************************************************'''
+def predict_makespan(estimates, cores):
+    # Simulate handing the cases (in list order) to "cores" workers, each case
+    #   going to the first worker that frees up.  Returns the total run time.
+    import heapq
+    worker_free = [0.0] * max(1, cores)
+    for estimate in estimates:
+        start = heapq.heappop(worker_free)
+        heapq.heappush(worker_free, start + estimate)
+    return max(worker_free)
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                           Reorder Buffer                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+class Reorder_Buffer():
+    # The pool finishes cases in any order.  Results are held here until every
+    #   earlier case is done and then passed to "release_callback(idx, result)"
+    #   in case-index order.
+    def __init__(self, release_callback, first_idx = 0):
+        self.release_callback = release_callback
+        self.next_idx = first_idx
+        self.pending = {}
+
+    def add(self, idx, result):
+        # Returns the number of results released
+        self.pending[idx] = result
+        num_released = 0
+        while self.next_idx in self.pending:
+            self.release_callback(self.next_idx, self.pending.pop(self.next_idx))
+            self.next_idx += 1
+            num_released += 1
+        return num_released
+
+    def flush(self):
+        # Release whatever is left in case-index order, skipping the cases that
+        #   never finished (e.g. a cancelled run).  Returns the number released.
+        num_released = 0
+        for idx in sorted(self.pending):
+            self.release_callback(idx, self.pending.pop(idx))
+            self.next_idx = idx + 1
+            num_released += 1
+        return num_released
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                           Pool Supervisor                             ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+def pool_supervisor(worker_func, cases_array, cores = 'auto', progress_callback = None, poll_interval = 0.5, sizing_options = None, pool_service = None, journal = None, runtime_history = None, case_timeout = None, cancel_token = None, ordered_callback = None, process_setup = None):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Run "worker_func" on every case in "cases_array" using a multiprocessing pool.
+    #
+    # The supervisor owns the pool.  Cases are handed to the pool as workers free
+    #   up ("cores" cases in flight at a time) and each completion is collected in
+    #   this process as soon as it is ready.
+    # If "cores" is 'auto', the number of cases in flight is picked from the
+    #   machine resources and adjusted once "probe_cases" cases have been measured
+    #   (see "choose_pool_size").  An integer "cores" fixes the count.
+    # If "pool_service" is passed, its warm pool is leased for this run instead of
+    #   building (and tearing down) a new pool.
+    # "process_setup" is run once in each process of a pool built for this run
+    #   (a leased pool uses the "process_setup" of its service).
+    # If an opened "Case_Journal" is passed, every completion is journaled and
+    #   cases already in the journal are not run again.
+    # If a loaded "Runtime_History" is passed, the cases are dispatched longest
+    #   first, the runtimes of this run are added to the history, and the predicted
+    #   and actual run times are saved in "runtime_history.last_makespan".
+    # If "case_timeout" is passed, a case still running after that many seconds is
+    #   recorded with the action 'Timed Out'.  The pool is terminated, joined and
+    #   started again (a leased pool is replaced in its service), and the other
+    #   cases that were running are queued again.  The remaining cases keep running.
+    # If a "Cancel_Token" is passed, no new cases are handed to the pool while it
+    #   is paused.  Once cancelled, the cases not yet handed out are dropped, the
+    #   running cases are collected, and the action 'Cancelled' is returned with
+    #   the finished results.
+    # If "ordered_callback" is passed, it is called as "ordered_callback(idx, result)"
+    #   in case-index order, each result as soon as every earlier case is done
+    #   (see "Reorder_Buffer").
+    # If "progress_callback" is passed, it is called with a "progress_report" list
+    #   after every completion.  From the GUI, pass "self.progress_report.emit";
+    #   Qt queues the signal to the main thread, so the event loop stays responsive
+    #   while this function waits on the pool.
+    # "worker_func" must be importable by the pool processes (a module level def)
+    #   and must return [err, action, result].
+    # Log records made in the pool processes by the "logger" of the module
+    #   containing "worker_func" are forwarded to this process's logger.
+    # Returns [err, action, results] with results in completion order (not case order!)
+
+    try:
+        logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}', extra = extra)
+
+        import multiprocessing
+        import queue
+        import time
+        import timeit
+
+        num_cases = len(cases_array)
+        if sizing_options is None:
+            sizing_options = {}
+        options = dict(POOL_SIZING_DEFAULTS)
+        options.update(sizing_options)
+        auto_size = (cores == 'auto')
+        if auto_size:
+            result = get_machine_resources()
+            resources = result[2]
+            # Enough processes to grow into if the measured cases allow it
+            num_processes = max(1, min(resources['logical_cores'], num_cases))
+        else:
+            cores = max(1, min(int(cores), max(num_cases, 1)))
+            num_processes = cores
+
+        def run_pool():
+            # A pool built for this run, with its own log listener and event queue
+            # Returns [err, action, [pool, listener, event_queue]]
+            result = start_log_listener(logger)
+            if result[0:2] != ['', '']:
+                return [result[0], result[1], [None, None, None]]
+            log_queue, listener = result[2]
+            event_queue = multiprocessing.Queue()
+            pool = multiprocessing.Pool(num_processes, initializer = pool_worker_initializer,
+                                        initargs = (log_queue, logger.getEffectiveLevel(), [worker_func.__module__], event_queue, process_setup))
+            return ['', '', [pool, listener, event_queue]]
+
+        # Get a pool: lease the warm pool or build one for this run
+        if pool_service is not None:
+            result = pool_service.lease()
+            if result[0:2] != ['', '']:
+                return [result[0], result[1], []]
+            pool = result[2]
+            listener = None
+            event_queue = pool_service.event_queue
+            num_processes = min(num_processes, pool_service.num_processes)
+            if not auto_size:
+                cores = min(cores, num_processes)
+            logger.log(logging.DEBUG, f'Leased warm pool ({pool_service.num_processes} processes)', extra = extra)
+        else:
+            # Forward log records from the pool processes to this process
+            result = run_pool()
+            if result[0:2] != ['', '']:
+                return [result[0], result[1], []]
+            pool, listener, event_queue = result[2]
+
+        if auto_size:
+            result = choose_pool_size(resources, num_processes, sizing_options = sizing_options)
+            cores, reason = result[2]
+            logger.log(logging.INFO, f'Starting with {cores} cases in flight ({reason})', extra = extra)
+        logger.log(logging.DATA, f'num_cases = {num_cases}, cores = {cores}, num_processes = {num_processes}', extra = extra)
+
+        # Completed cases are put on this queue by the pool's result-handler thread
+        done_queue = queue.Queue()
+
+        def on_done(measured_result, idx):
+            done_queue.put([idx] + measured_result)
+
+        def on_error(e, idx):
+            # An exception escaped "worker_func", report it like the worker functions do
+            err = f'Exception (pool worker, case index {idx}) = {e}'
+            done_queue.put([idx, [err, 'Exception', []], None])
+
+        results = []
+        case_stats = []
+        log_level = logger.getEffectiveLevel()
+        reorder_buffer = Reorder_Buffer(ordered_callback) if ordered_callback is not None else None
+        # Case index: [pid, start time] for the cases running in the pool
+        running = {}
+        # Case indexes handed to the current pool and not collected yet
+        dispatched = set()
+        # Case indexes already collected (a case may still report late from a replaced pool)
+        settled = set()
+        num_restarts = 0
+        try:
+            # Start messages left over from an earlier run of a warm pool
+            while True:
+                try:
+                    event_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            # Cases already in the journal are done
+            todo_idxs = []
+            for idx, case in enumerate(cases_array):
+                journaled = journal.completed(idx, case) if journal is not None else None
+                if journaled is not None:
+                    results += [journaled]
+                    if reorder_buffer is not None:
+                        reorder_buffer.add(idx, journaled)
+                else:
+                    todo_idxs += [idx]
+            if len(results) > 0:
+                logger.log(logging.INFO, f'Skipping {len(results)} cases found in the journal', extra = extra)
+
+            # Dispatch the longest cases first
+            if runtime_history is not None:
+                estimates = runtime_history.estimate([cases_array[__i] for __i in todo_idxs])
+                lpt_idxs = lpt_order(estimates)
+                todo_idxs = [todo_idxs[__i] for __i in lpt_idxs]
+                estimates = [estimates[__i] for __i in lpt_idxs]
+                predicted_makespan = predict_makespan(estimates, cores)
+                predicted_cores = cores
+                logger.log(logging.INFO, f'Predicted run time with {cores} cases in flight: {predicted_makespan:.3f} s', extra = extra)
+                logger.log(logging.DATA, f'Dispatch order = {todo_idxs}', extra = extra)
+            start_time = timeit.default_timer()
+            end_time = start_time
+
+            next_todo = 0
+            num_done = len(results)
+            cancelled = False
+            while num_done < num_cases:
+                if cancel_token is not None and cancel_token.is_cancelled():
+                    if not cancelled:
+                        cancelled = True
+                        logger.log(logging.WARNING, f'Run cancelled. {len(todo_idxs) - next_todo} cases not started, waiting on {len(dispatched)} running cases.', extra = extra)
+                    if len(dispatched) == 0:
+                        break
+                # Keep "cores" cases in the pool (none while paused or cancelled)
+                paused = cancel_token is not None and (cancel_token.is_paused() or cancelled)
+                while not paused and len(dispatched) < cores and next_todo < len(todo_idxs):
+                    next_idx = todo_idxs[next_todo]
+                    next_todo += 1
+                    if next_idx in settled:
+                        # Collected from the replaced pool after it was queued again
+                        continue
+                    pool.apply_async(measured_call, (worker_func, cases_array[next_idx], log_level, next_idx),
+                                     callback = lambda r, idx=next_idx: on_done(r, idx),
+                                     error_callback = lambda e, idx=next_idx: on_error(e, idx))
+                    dispatched.add(next_idx)
+
+                # Watchdog: note the cases that have started and replace the pool
+                #   when a case has run too long
+                while True:
+                    try:
+                        event = event_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if event[0] == 'start' and event[1] not in settled:
+                        running[event[1]] = event[2:4]
+                if case_timeout:
+                    now = time.time()
+                    timed_out = [__i for __i, [__p, __s] in running.items() if now - __s > case_timeout]
+                    if len(timed_out) > 0:
+                        # Killing one worker could leave the pool's task and result
+                        #   queues, or the log and event queues, locked.  The whole
+                        #   pool is terminated and joined instead, a new pool is
+                        #   started with new queues, and the other cases that were
+                        #   in the pool are run again.
+                        for run_idx in timed_out:
+                            err = f'Case index {run_idx} ran longer than {case_timeout} s. The pool was restarted.'
+                            logger.log(logging.ERROR, f'{err} \n *********** Timed Out ***********', extra = extra)
+                            done_queue.put([run_idx, [err, 'Timed Out', []], None])
+                        rerun_idxs = [__i for __i in dispatched if __i not in timed_out]
+                        todo_idxs[next_todo:next_todo] = rerun_idxs
+                        dispatched = set()
+                        running = {}
+                        num_restarts += 1
+                        if pool_service is not None:
+                            pool_service.discard_pool()
+                            result = pool_service.start()
+                            pool = result[2]
+                            event_queue = pool_service.event_queue
+                        else:
+                            pool.terminate()
+                            pool.join()
+                            stop_log_listener(listener, timeout = 5)
+                            result = run_pool()
+                            pool, listener, event_queue = result[2]
+                        if result[0:2] != ['', '']:
+                            raise RuntimeError(f'Could not restart the pool. {result[0]}')
+                        logger.log(logging.WARNING, f'Pool restarted; {len(rerun_idxs)} running cases queued again', extra = extra)
+
+                # Wait for the next completion.  The timeout keeps this loop from
+                #   blocking forever so the watchdog gets to run.
+                try:
+                    idx, result, stats = done_queue.get(timeout = poll_interval)
+                except queue.Empty:
+                    continue
+                if idx in settled:
+                    # Finished just as it timed out (the timeout was already
+                    #   recorded), or a case run again that was collected first
+                    continue
+                settled.add(idx)
+                running.pop(idx, None)
+                dispatched.discard(idx)
+                end_time = timeit.default_timer()
+                num_done += 1
+                results += [result]
+                logger.log(logging.DATA, f'case index {idx} result = {result}', extra = extra)
+                if journal is not None:
+                    journal.record(idx, cases_array[idx], result)
+                if reorder_buffer is not None:
+                    reorder_buffer.add(idx, result)
+                if runtime_history is not None and stats is not None and result[0:2] == ['', '']:
+                    runtime_history.record(cases_array[idx], stats['wall_time'])
+
+                # Adjust the pool size once the first cases have been measured
+                if stats is not None:
+                    case_stats += [stats]
+                    logger.log(logging.SUBDATA, f'case index {idx} stats = {stats}', extra = extra)
+                    if auto_size and len(case_stats) == options['probe_cases']:
+                        size_result = choose_pool_size(resources, num_processes, case_stats, sizing_options)
+                        new_cores, reason = size_result[2]
+                        if new_cores != cores:
+                            logger.log(logging.INFO, f'Adjusting cases in flight from {cores} to {new_cores} ({reason})', extra = extra)
+                            cores = new_cores
+
+                if progress_callback is not None:
+                    if result[0:2] != ['', '']:
+                        last_update = f'Case index {idx}: {result[1]}'
+                    else:
+                        last_update = f'Case index {idx} done'
+                    progress_callback(make_progress_report(last_update, f'Case index {idx}', num_done, num_cases))
+        finally:
+            if pool_service is not None:
+                # The warm pool stays up for the next run, unless it was restarted
+                #   (a case run again may still be running in it after its result
+                #   was collected from the old pool)
+                if num_restarts > 0:
+                    pool_service.discard_pool()
+                pool_service.release()
+            elif pool is not None:
+                if num_restarts > 0:
+                    pool.terminate()
+                else:
+                    # Join after all results are collected
+                    pool.close()
+                pool.join()
+                # Stop the listener last so records from exiting workers are not lost
+                stop_log_listener(listener, timeout = 5 if num_restarts > 0 else None)
+
+        if reorder_buffer is not None:
+            # Only a cancelled run leaves gaps
+            reorder_buffer.flush()
+
+        if runtime_history is not None:
+            actual_makespan = end_time - start_time
+            runtime_history.last_makespan = {'cores' : predicted_cores, 'predicted' : predicted_makespan, 'actual' : actual_makespan}
+            logger.log(logging.INFO, f'Run time: predicted {predicted_makespan:.3f} s, actual {actual_makespan:.3f} s', extra = extra)
+            runtime_history.save()
+
+        if cancelled:
+            err = f'Run cancelled after {len(results)} of {num_cases} cases.'
+            action = 'Cancelled'
+            logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, results]
+
+        if True in [result[0:2] != ['', ''] for result in results]:
+            err = 'One or more cases returned an error.'
+            action = 'Warning Only'
+            logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, results]
+
+        return ['', '', results]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, []]
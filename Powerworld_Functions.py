@@ -0,0 +1,931 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:37 2026
+
+@author: Jeff Barton
+         Electrical Engineer
+         Transmission Long Term Planning
+         Bonneville Power Administration
+         jgbarton@bpa.gov
+
+Change log:
+v0:
+    Simulator connection: "dispatch_simulator" returns the Powerworld
+    SimAuto COM object, or a stub that stands in for it where Simulator
+    (or win32com) is not available, e.g. on Linux.  'local' gives the
+    synthetic network stand-in from Local_Simulator.py.
+
+    Simulator pool: starting SimAuto is slow, so a pool process creates one
+    simulator when it starts ("simulator_process_setup", passed to the pool
+    as "process_setup") and keeps it for the life of the process.  Tasks
+    run through "simulator_call" get that simulator, and the case is closed
+    after each task so the next task starts clean.
+
+    Solve engine: "Solve_Engine" replaces the unconditional double solve.
+    The second solve runs only when the bus mismatch after the first is too
+    large, fallback methods are tried when a solve fails, and solve counts
+    and times are kept per case.
+
+    COM profiler: "Com_Profiler" wraps the simulator object and times every
+    call per method, per script verb and per study stage, for a summary
+    table in the log and a JSON file next to the results.
+
+    Record and replay: "Recording_Simulator" writes every simulator call and
+    its response to a session file; "Replay_Simulator" (use_stub = 'replay')
+    serves a recorded session back, at recorded speed or as fast as possible,
+    so the Python side of a study can be timed without Simulator.
+
+    Result decoding: "decode_rect" turns a multiple element response into
+    typed NumPy columns (types from "field_schema") in one pass per column,
+    in place of row by row float() conversions.  It needs numpy (imported
+    when called).
+
+    Bulk export: "get_columns" reads a table as typed columns, and can bring
+    a large table back through a SaveData CSV export that is parsed through
+    a memory map in chunks ("read_export") and decoded chunk by chunk,
+    instead of marshalling every row over COM.  Recorded sessions keep the
+    export files, so a replay writes them again.
+
+    Query cache: "Query_Cache" answers repeated reads within one solved
+    state from memory, merges the fields asked of an object into one read,
+    reads small object types (areas, injection groups) whole so one call
+    answers the reads of all of them, and is emptied by any call that can
+    change the case.
+
+'''*************************************************************************'''
+"""
+import logging
+from inspect import currentframe as cf # Used to identify the current function -- avoids some copy-paste issues when making new defs
+
+# The calling worker function replaces this with its own logger
+logger = logging.getLogger(__name__)
+
+# In a pool process, the simulator kept for the life of the process
+pw_com_object = None
+
+# In a pool process, the [use_stub, simulator_options, cache_reads] the process setup was given,
+#   so a simulator started later ("simulator_call") is of the same kind
+simulator_choice = [False, None, False]
+
+
+'''*************************************************************************'''
+def print_exception():
+    # Return line number data from the last exception
+    from linecache import getline, checkcache
+    from sys import exc_info
+    exc_type, exc_obj, tb = exc_info()
+    f = tb.tb_frame
+    lineno = tb.tb_lineno
+    filename = f.f_code.co_filename
+    checkcache(filename)
+    line = getline(filename, lineno, f.f_globals)
+    return[f'LINE {lineno} "{line.strip()}"']
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                         Simulator Connection                          ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+class Stub_Simulator():
+    # Stands in for the SimAuto COM object where Simulator is not installed.
+    # Every call succeeds and returns a SimAuto style tuple: ('', None).
+    #   No powerflow is solved, but the study code and the pools can be run
+    #   and debugged end to end.
+    def __init__(self):
+        self.case_file = None
+        self.num_calls = 0
+
+    def OpenCase(self, case_file):
+        self.num_calls += 1
+        self.case_file = case_file
+        return ('',)
+
+    def CloseCase(self):
+        self.num_calls += 1
+        self.case_file = None
+        return ('',)
+
+    def __getattr__(self, name):
+        # Any other SimAuto method
+        if name.startswith('_'):
+            raise AttributeError(name)
+        def call(*args):
+            self.num_calls += 1
+            return ('', None)
+        return call
+
+
+'''*************************************************************************'''
+def dispatch_simulator(use_stub = False, simulator_options = None):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Connect to Simulator.  With "use_stub", a "Stub_Simulator" is returned
+    #   instead.  Where win32com can't be imported (not Windows) and a real
+    #   simulator was asked for, an Error is returned.
+    # With use_stub = 'local', a "Local_Simulator.Local_Simulator" (synthetic
+    #   network, see Local_Simulator.py) made with "simulator_options" is returned.
+    # With use_stub = 'replay', a "Replay_Simulator" of the session file
+    #   simulator_options['replay_file'] is returned (speed: simulator_options['replay_speed']).
+    # Returns [err, action, pw_com_object]
+
+    try:
+        if use_stub == 'local':
+            import Local_Simulator
+            Local_Simulator.logger = logger
+            return ['', '', Local_Simulator.Local_Simulator(simulator_options)]
+
+        if use_stub == 'replay':
+            return ['', '', Replay_Simulator(simulator_options['replay_file'], simulator_options.get('replay_speed', 'fast'))]
+
+        if not use_stub:
+            try:
+                import win32com.client # loads a suite of tools access to windows routines
+            except ImportError as e:
+                err = f'win32com is not available, so Simulator can not be started ({e}).  Set use_stub_simulator to \'local\' to run without Simulator.'
+                action = 'Error'
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                return [err, action, None]
+
+        if use_stub:
+            return ['', '', Stub_Simulator()]
+
+        # win32com.client.dispatch is a function that returns a Powerworld case object
+        return ['', '', win32com.client.Dispatch('pwrworld.SimulatorAuto')]
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, None]
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                            Simulator Pool                             ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+def simulator_process_setup(use_stub = False, simulator_options = None, cache_reads = False):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Runs once in each pool process (pass as "process_setup", with
+    #   functools.partial for "use_stub" and "simulator_options", as for
+    #   "dispatch_simulator").  Starts this process's simulator.
+    #   With "cache_reads", the simulator is wrapped in a "Query_Cache".
+    import atexit
+    import os
+    global pw_com_object
+    global simulator_choice
+    simulator_choice = [use_stub, simulator_options, cache_reads]
+
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+
+    result = dispatch_simulator(use_stub, simulator_options)
+    if result[0:2] != ['', '']:
+        # "get_simulator" will try again on the first task
+        logger.log(logging.ERROR, f'Process {os.getpid()} could not start a simulator. {result[0]}', extra = extra)
+        return
+    pw_com_object = Query_Cache(result[2]) if cache_reads else result[2]
+    logger.log(logging.DEBUG, f'Process {os.getpid()} started a simulator', extra = extra)
+    atexit.register(release_simulator)
+
+
+'''*************************************************************************'''
+def release_simulator():
+    # Close the case and drop this process's simulator
+    global pw_com_object
+    if pw_com_object is not None:
+        try:
+            pw_com_object.CloseCase()
+        except Exception:
+            pass
+        pw_com_object = None
+
+
+'''*************************************************************************'''
+def get_simulator(use_stub = False, simulator_options = None, cache_reads = False):
+    # Returns [err, action, pw_com_object] for this process's simulator,
+    #   starting one if the process setup did not
+    global pw_com_object
+    if pw_com_object is None:
+        result = dispatch_simulator(use_stub, simulator_options)
+        if result[0:2] != ['', '']:
+            return result
+        pw_com_object = Query_Cache(result[2]) if cache_reads else result[2]
+    return ['', '', pw_com_object]
+
+
+'''*************************************************************************'''
+def simulator_call(case):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Pool task that runs on this process's simulator.
+    # "case" is [task_func, task_args].  "task_func" must be a module level def;
+    #   it is called as task_func(pw_com_object, *task_args) and must return
+    #   [err, action, result].  The case is closed afterwards so the next
+    #   task starts from a clean simulator.
+    task_func, task_args = case
+
+    try:
+        import Multiprocess_Functions
+        if Multiprocess_Functions.pool_worker_logger is not None:
+            # Forward the task module's log records like the worker's
+            Multiprocess_Functions.prepare_worker_module(task_func.__module__)
+
+        # The kind of simulator the process setup was asked for
+        result = get_simulator(*simulator_choice)
+        if result[0:2] != ['', '']:
+            return [result[0], 'Study Stopped', []]
+        pw = result[2]
+        try:
+            return task_func(pw, *task_args)
+        finally:
+            pw.CloseCase()
+
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, []]
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                             Solve Engine                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+class Solve_Engine():
+    # Solves the powerflow with as few solves as it takes.
+    # The first solve uses "method".  When it converges, the buses with a P or
+    #   Q mismatch above "mismatch_tolerance" (MW/Mvar) are read through the
+    #   advanced filter "mismatch_filter" (usually none, so only a few bytes
+    #   come back), and the same method is run again only if there are any.
+    #   When a solve fails, the "fallbacks" ([name, script] pairs, e.g. a flat
+    #   start or another algorithm) are tried in order before giving up; a
+    #   fallback is kept only if its mismatch is within the tolerance, after
+    #   one more solve with "method" if needed.
+    # The filter is made once per case file ("case_file", else the case name):
+    #   it is saved with the case, and SaveState/LoadState keep it, so the load
+    #   levels opened or restored from a saved base case already have it.
+    # Solve counts and times are kept per case name ("stats").
+    def __init__(self, method = 'RECTNEWT', mismatch_tolerance = 0.5, max_solves = 2, fallbacks = None):
+        self.method = method
+        self.mismatch_tolerance = mismatch_tolerance
+        self.max_solves = max_solves
+        if fallbacks is None:
+            fallbacks = [['Polar Newton', 'SolvePowerFlow(POLARNEWT);'],
+                         ['Flat start', 'ResetToFlatStart; SolvePowerFlow(RECTNEWT);'],
+                         ['Robust', 'SolvePowerFlow(ROBUST);']]
+        self.fallbacks = fallbacks
+        self.mismatch_filter = 'Solve_Engine_Mismatch'
+        # Case files (or case names) the mismatch filter has been made in
+        self.filter_cases = set()
+        # {case_name: {'calls', 'solves', 'seconds', 'fallbacks', 'failures'}}
+        self.stats = {}
+
+    def create_mismatch_filter(self, pw_com_object):
+        # Bus filter: |BusMismatchP| or |BusMismatchQ| above the tolerance
+        name = self.mismatch_filter
+        script = [f'CreateData(Filter, [ObjectType,FilterName,FilterLogic,Number,FilterPre,Enabled], ["Bus", "{name}", "OR", "1", "NO", "YES"]);']
+        for idx, field in enumerate(['BusMismatchP', 'BusMismatchQ']):
+            script += [f'CreateData(Condition, [ObjectType,FilterName,ConditionNumber,VariableName,ConditionType,ConditionValue, ConditionValue:1,ConditionCaseAbs], ["Bus", "{name}", {idx + 1}, "{field}", ">", "{self.mismatch_tolerance}", "", "YES"]);']
+        return pw_com_object.RunScriptCommand(' '.join(script))
+
+    def mismatch_buses(self, pw_com_object):
+        # Returns the number of buses with a mismatch above the tolerance, or
+        #   None if it can't be read.  The filter is made again if the query fails
+        #   (e.g. a case opened that was not saved with it).
+        for attempt in range(2):
+            result = pw_com_object.GetParametersMultipleElementRect('Bus', ['BusNum'], self.mismatch_filter)
+            if result[0] == '':
+                return 0 if result[1] is None else len(result[1])
+            if attempt == 0 and self.create_mismatch_filter(pw_com_object)[0] != '':
+                return None
+        return None
+
+    def within_tolerance(self, pw_com_object, case_name):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        num_buses = self.mismatch_buses(pw_com_object)
+        if num_buses == 0:
+            return True
+        logger.log(logging.DEBUG, f'{case_name}: {num_buses} buses with a mismatch above {self.mismatch_tolerance}', extra = extra)
+        return False
+
+    def solve(self, pw_com_object, case_name = '', case_file = None):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        # Returns [err, action, num_solves]
+        import time
+        case_stats = self.stats.setdefault(case_name, {'calls': 0, 'solves': 0, 'seconds': 0.0, 'fallbacks': 0, 'failures': 0})
+        case_stats['calls'] += 1
+        start_time = time.time()
+        num_solves = 0
+
+        try:
+            filter_case = case_name if case_file is None else case_file
+            if filter_case not in self.filter_cases:
+                self.create_mismatch_filter(pw_com_object)
+                self.filter_cases.add(filter_case)
+            script = f'SolvePowerFlow({self.method});'
+            result = pw_com_object.RunScriptCommand(script)
+            num_solves += 1
+            while result[0] == '' and num_solves < self.max_solves:
+                if self.within_tolerance(pw_com_object, case_name):
+                    break
+                logger.log(logging.DEBUG, f'{case_name}: solving again after solve {num_solves}', extra = extra)
+                result = pw_com_object.RunScriptCommand(script)
+                num_solves += 1
+
+            if result[0] != '':
+                logger.log(logging.WARNING, f'{case_name}: {self.method} solve failed. Result = {result[0]}', extra = extra)
+                for name, fallback_script in self.fallbacks:
+                    case_stats['fallbacks'] += 1
+                    logger.log(logging.INFO, f'{case_name}: trying fallback "{name}"', extra = extra)
+                    result = pw_com_object.RunScriptCommand(fallback_script)
+                    num_solves += 1
+                    if result[0] == '' and not self.within_tolerance(pw_com_object, case_name):
+                        # Converged, but not tightly enough; one more solve from its solution
+                        result = pw_com_object.RunScriptCommand(script)
+                        num_solves += 1
+                        if result[0] == '' and not self.within_tolerance(pw_com_object, case_name):
+                            result = (f'Fallback "{name}" left a mismatch above {self.mismatch_tolerance}',)
+                    if result[0] == '':
+                        break
+
+            if result[0] != '':
+                case_stats['failures'] += 1
+                return [f'No solution for {case_name}. Result = {result[0]}', 'Skipped', num_solves]
+            return ['', '', num_solves]
+
+        finally:
+            case_stats['solves'] += num_solves
+            case_stats['seconds'] += time.time() - start_time
+
+    def log_summary(self, level = logging.INFO):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        # Log the solve counts and times for each case
+        if len(self.stats) == 0:
+            return
+        lines = [f'{"Case":<50}{"Calls":>7}{"Solves":>8}{"Seconds":>10}{"Fallbacks":>11}{"Failures":>10}']
+        for case_name, case_stats in self.stats.items():
+            lines += [f'{case_name[0:49]:<50}{case_stats["calls"]:>7}{case_stats["solves"]:>8}{case_stats["seconds"]:>10.2f}{case_stats["fallbacks"]:>11}{case_stats["failures"]:>10}']
+        total_calls = sum([__e['calls'] for __e in self.stats.values()])
+        total_solves = sum([__e['solves'] for __e in self.stats.values()])
+        lines += [f'{"Total":<50}{total_calls:>7}{total_solves:>8}{sum([__e["seconds"] for __e in self.stats.values()]):>10.2f}']
+        logger.log(level, 'Solve summary:\n' + '\n'.join(lines), extra = extra)
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                             COM Profiler                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+class Stage_Filter(logging.Filter):
+    # Logging filter that follows the study stage: each record's "qThreadName"
+    #   (the extra['qThreadName'] labels) becomes the profiler's current stage.
+    #   Function labels ('def ...') don't change the stage.  Nothing is filtered out.
+    def __init__(self, profiler):
+        super().__init__()
+        self.profiler = profiler
+
+    def filter(self, record):
+        stage = getattr(record, 'qThreadName', None)
+        if stage is not None and not stage.startswith('def '):
+            self.profiler.stage = stage
+        return True
+
+
+class Com_Profiler():
+    # Stands in for the SimAuto COM object and times every call made through it.
+    # Kept per method (per script verb for RunScriptCommand, e.g.
+    #   "RunScriptCommand:SolvePowerFlow"): count, total time, errors (a
+    #   non-empty error string in the returned tuple) and a latency histogram.
+    #   Time is also kept per study stage; add "stage_filter" to the logger so
+    #   the stage follows the extra['qThreadName'] labels.
+    # Use: pw_com_object = Com_Profiler(pw_com_object)
+    histogram_edges_ms = [1, 10, 100, 1000, 10000]
+
+    def __init__(self, pw_com_object):
+        self.pw_com_object = pw_com_object
+        self.stage = 'Start'
+        # {method: {'count', 'seconds', 'errors', 'histogram'}}
+        self.methods = {}
+        # {stage: {'count', 'seconds'}}
+        self.stages = {}
+        self.stage_filter = Stage_Filter(self)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.pw_com_object, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        def call(*args):
+            import time
+            start_time = time.perf_counter()
+            result = None
+            try:
+                result = attribute(*args)
+                return result
+            finally:
+                key = name
+                if name == 'RunScriptCommand' and len(args) > 0:
+                    key = f'{name}:{str(args[0]).strip().split("(")[0].split(";")[0].strip()}'
+                self.record(key, time.perf_counter() - start_time, result)
+        return call
+
+    def record(self, key, seconds, result):
+        import bisect
+        method_stats = self.methods.setdefault(key, {'count': 0, 'seconds': 0.0, 'errors': 0, 'histogram': [0] * (len(self.histogram_edges_ms) + 1)})
+        method_stats['count'] += 1
+        method_stats['seconds'] += seconds
+        if result is None or (type(result) == tuple and len(result) > 0 and result[0] != ''):
+            method_stats['errors'] += 1
+        method_stats['histogram'][bisect.bisect_right(self.histogram_edges_ms, seconds * 1000)] += 1
+        stage_stats = self.stages.setdefault(self.stage, {'count': 0, 'seconds': 0.0})
+        stage_stats['count'] += 1
+        stage_stats['seconds'] += seconds
+
+    def histogram_labels(self):
+        return [f'<{__e}ms' for __e in self.histogram_edges_ms] + [f'>={self.histogram_edges_ms[-1]}ms']
+
+    def summary(self):
+        # Returns the stats as a dict (saved by "save")
+        histogram_labels = self.histogram_labels()
+        methods = {}
+        for key, method_stats in sorted(self.methods.items(), key = lambda __e: -__e[1]['seconds']):
+            methods[key] = {'count': method_stats['count'],
+                            'seconds': round(method_stats['seconds'], 4),
+                            'mean_ms': round(1000 * method_stats['seconds'] / method_stats['count'], 3),
+                            'error_rate': round(method_stats['errors'] / method_stats['count'], 4),
+                            'histogram': dict(zip(histogram_labels, method_stats['histogram']))}
+        stages = {__k: {'count': __v['count'], 'seconds': round(__v['seconds'], 4)} for __k, __v in sorted(self.stages.items(), key = lambda __e: -__e[1]['seconds'])}
+        return {'methods': methods, 'stages': stages}
+
+    def log_summary(self, level = logging.INFO):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        # Log the per method and per stage tables
+        summary = self.summary()
+        lines = [f'{"Method":<45}{"Calls":>8}{"Seconds":>10}{"Mean ms":>10}{"Errors":>8}  Histogram']
+        for key, method_stats in summary['methods'].items():
+            histogram = ' '.join([f'{__v}' for __v in method_stats['histogram'].values()])
+            lines += [f'{key[0:44]:<45}{method_stats["count"]:>8}{method_stats["seconds"]:>10.2f}{method_stats["mean_ms"]:>10.1f}{method_stats["error_rate"]:>8.1%}  {histogram}']
+        lines += ['', f'{"Stage":<70}{"Calls":>8}{"Seconds":>10}']
+        for stage, stage_stats in summary['stages'].items():
+            lines += [f'{stage[0:69]:<70}{stage_stats["count"]:>8}{stage_stats["seconds"]:>10.2f}']
+        logger.log(level, f'COM call profile (histogram buckets {", ".join(self.histogram_labels())}):\n' + '\n'.join(lines), extra = extra)
+
+    def save(self, profile_file):
+        # Write the summary as JSON.  Returns [err, action]
+        import json
+        try:
+            with open(profile_file, 'w') as f:
+                json.dump(self.summary(), f, indent = 2)
+            return ['', '']
+        except OSError as e:
+            return [f'Could not write {profile_file}: {e}', 'Warning Only']
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                           Record and Replay                           ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+def open_session_file(session_file, mode):
+    # Session files are JSON lines, gzipped when the name ends in .gz
+    import gzip
+    if session_file.endswith('.gz'):
+        return gzip.open(session_file, mode + 't', encoding = 'utf-8')
+    return open(session_file, mode, encoding = 'utf-8')
+
+
+'''*************************************************************************'''
+def as_tuples(value):
+    # JSON gives lists back; SimAuto returns tuples
+    if type(value) == list:
+        return tuple([as_tuples(__e) for __e in value])
+    return value
+
+
+class Recording_Simulator():
+    # Stands in for the SimAuto COM object and writes every call to
+    #   "session_file": one JSON line per call with the method, arguments,
+    #   response and latency (seconds).  "Replay_Simulator" plays it back.
+    #   The files a script writes with SaveData are added to its line
+    #   ({file name: contents}) so the replay can write them again.
+    # Use: pw_com_object = Recording_Simulator(pw_com_object, session_file),
+    #   and "close" when the run is done.
+    def __init__(self, pw_com_object, session_file):
+        self.pw_com_object = pw_com_object
+        self.session_file = session_file
+        self.file = open_session_file(session_file, 'w')
+        self.num_calls = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self.pw_com_object, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        def call(*args):
+            import json
+            import time
+            start_time = time.perf_counter()
+            result = attribute(*args)
+            seconds = time.perf_counter() - start_time
+            if self.file is not None:
+                entry = [name, list(args), result, round(seconds, 6)]
+                if name == 'RunScriptCommand' and len(args) > 0:
+                    export_files = self.export_files(f'{args[0]}')
+                    if len(export_files) > 0:
+                        entry += [export_files]
+                self.file.write(json.dumps(entry, separators = (',', ':'), default = str) + '\n')
+                self.num_calls += 1
+            return result
+        return call
+
+    def export_files(self, script):
+        # {file name: contents} of the files written by SaveData in "script"
+        import os
+        import re
+        export_files = {}
+        for export_file in re.findall(r'SaveData\(\s*"([^"]+)"', script, flags = re.IGNORECASE):
+            if os.path.isfile(export_file):
+                with open(export_file, 'r', encoding = 'utf-8', errors = 'replace') as f:
+                    export_files[export_file] = f.read()
+        return export_files
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Replay_Simulator():
+    # Serves the responses of a recorded session ("Recording_Simulator") in
+    #   place of Simulator, so a run can be repeated with no simulator.
+    # Calls are answered in recorded order.  A call that doesn't match the next
+    #   recorded call is answered from the next recorded call with the same
+    #   method and arguments (and logged), or with an error if there is none.
+    # "speed": 'recorded' waits each call's recorded latency; 'fast' does not wait.
+    def __init__(self, session_file, speed = 'fast'):
+        import json
+        self.speed = speed
+        self.calls = []
+        with open_session_file(session_file, 'r') as f:
+            for line in f:
+                if line.strip() != '':
+                    self.calls += [json.loads(line)]
+        self.next_idx = 0
+        self.used = [False] * len(self.calls)
+        self.num_mismatches = 0
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        def call(*args):
+            return self.replay(name, list(args))
+        return call
+
+    def replay(self, name, args):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        import json
+        import time
+        key = json.dumps([name, args], default = str)
+        # Skip calls already served out of order
+        while self.next_idx < len(self.calls) and self.used[self.next_idx]:
+            self.next_idx += 1
+        call_idx = None
+        if self.next_idx < len(self.calls) and json.dumps(self.calls[self.next_idx][0:2], default = str) == key:
+            call_idx = self.next_idx
+        else:
+            for idx in range(self.next_idx, len(self.calls)):
+                if not self.used[idx] and json.dumps(self.calls[idx][0:2], default = str) == key:
+                    call_idx = idx
+                    break
+            self.num_mismatches += 1
+            logger.log(logging.WARNING, f'Replay: call {name}{tuple(args)} is out of recorded order ({"found later" if call_idx is not None else "not recorded"})', extra = extra)
+        if call_idx is None:
+            return (f'Replay: no recorded response for {name}', None)
+        self.used[call_idx] = True
+        method, recorded_args, result, seconds = self.calls[call_idx][0:4]
+        # Files the recorded call wrote (SaveData exports)
+        export_files = self.calls[call_idx][4] if len(self.calls[call_idx]) > 4 else {}
+        for export_file, contents in export_files.items():
+            try:
+                with open(export_file, 'w', encoding = 'utf-8', newline = '') as f:
+                    f.write(contents)
+            except OSError as e:
+                return (f'Replay: could not write {export_file}: {e}',)
+        if self.speed == 'recorded':
+            time.sleep(seconds)
+        return as_tuples(result)
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                            Result Decoding                            ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+# Type of each SimAuto field for "decode_rect" (fields not listed stay text)
+field_schema = {'BusNum': int, 'BusNumFrom': int, 'BusNumTo': int, 'BusNumNear': int, 'BusNumFar': int, 'RegBusNum': int,
+                'Number': int, 'AreaNumber': int, 'OwnerNum1': int, 'OwnerNumber': int,
+                'GenMW': float, 'GenMWMax': float, 'GenMWMin': float, 'LoadMW': float, 'MW': float,
+                'MWFrom': float, 'MWTo': float, 'LossMW': float, 'MWMeter': float, 'NomkVFrom': float, 'NomkVTo': float, 'NomkV': float,
+                'MvarNom': float, 'Mvar': float, 'ShuntMW': float, 'ExportMWSched': float, 'ExportMW': float, 'ACE': float,
+                'EconDispLambda': float, 'SlacIGMW': float, 'BusMismatchP': float, 'BusMismatchQ': float}
+
+
+'''*************************************************************************'''
+def decode_rect(rows, fields, schema = None):
+    # Turn the rows of a GetParametersMultipleElementRect response (tuple of
+    #   tuples of strings) into NumPy columns in one pass per column.
+    # The dtype of each field comes from "schema" ({field: int, float or str}),
+    #   then "field_schema"; other fields stay text.  Blank numbers become NaN
+    #   (int columns with blanks are read as float).
+    # Returns {field: numpy array}, so filtering is a mask, e.g.
+    #   gens['GenMW'][gens['Status'] == 'Closed']
+    import numpy as np
+    if schema is None:
+        schema = {}
+    if rows is None or len(rows) == 0:
+        return {__f: np.array([], dtype = schema.get(__f, field_schema.get(__f, str))) for __f in fields}
+    table = np.char.strip(np.array(rows, dtype = str).reshape(len(rows), len(fields)))
+    columns = {}
+    for idx, field in enumerate(fields):
+        dtype = schema.get(field, field_schema.get(field, str))
+        column = table[:, idx]
+        if dtype in [int, float]:
+            blanks = column == ''
+            values = np.where(blanks, 'nan', column).astype(float)
+            if dtype == int and not blanks.any():
+                values = values.astype(np.int64)
+            columns[field] = values
+        else:
+            columns[field] = column
+    return columns
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                              Bulk Export                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+def read_export(export_file, fields, chunk_bytes = 1 << 20):
+    # Parse a SaveData CSV export through a memory map, "chunk_bytes" at a time
+    #   (cut at line ends), so the whole file is never held as one string.
+    # Yields a list of rows (lists of strings, one per field) per chunk.  The
+    #   header lines (object type and field names) are skipped.  Raises
+    #   ValueError if no line matches the field names (case and spaces ignored),
+    #   rather than reading the rows in an unknown column order.
+    import csv
+    import mmap
+    import os
+    if os.path.getsize(export_file) == 0:
+        raise ValueError(f'{export_file} is empty')
+    with open(export_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+        header = [__f.replace(' ', '').lower() for __f in fields]
+        in_header = True
+        start = 0
+        while start < len(mm):
+            end = mm.find(b'\n', min(start + chunk_bytes, len(mm) - 1))
+            end = len(mm) if end == -1 else end + 1
+            chunk = mm[start:end].decode('utf-8', errors = 'replace')
+            start = end
+            rows = []
+            for row in csv.reader(chunk.splitlines()):
+                row = [__e.strip() for __e in row]
+                if in_header:
+                    # Data starts after the field name line
+                    if [__e.replace(' ', '').lower() for __e in row[0:len(fields)]] == header:
+                        in_header = False
+                    continue
+                if len(row) == 0:
+                    continue
+                rows += [row[0:len(fields)] + [''] * (len(fields) - len(row))]
+            if len(rows) > 0:
+                yield rows
+        if in_header:
+            raise ValueError(f'The field names {fields} were not found in {export_file}')
+
+
+'''*************************************************************************'''
+def read_export_columns(export_file, fields, schema = None, chunk_bytes = 1 << 20):
+    # The export as typed NumPy columns ("decode_rect"), decoded chunk by chunk
+    import numpy as np
+    chunks = [decode_rect(__rows, fields, schema) for __rows in read_export(export_file, fields, chunk_bytes)]
+    if len(chunks) == 0:
+        return decode_rect(None, fields, schema)
+    return {__f: np.concatenate([__c[__f] for __c in chunks]) for __f in fields}
+
+
+'''*************************************************************************'''
+def export_columns(pw_com_object, obj_type, fields, filter_name, export_file, schema = None, chunk_bytes = 1 << 20):
+    # Simulator writes the table to "export_file" with one SaveData script call,
+    #   and it is read back from the file ("read_export_columns") instead of
+    #   over COM.  The export file is removed once it is read.
+    # Returns (err, columns), like "get_columns"
+    import os
+    field_list = ', '.join(fields)
+    result = pw_com_object.RunScriptCommand(f'SaveData("{export_file}", CSV, {obj_type}, [{field_list}], [], "{filter_name}");')
+    if result[0] != '':
+        return (result[0], None)
+    try:
+        return ('', read_export_columns(export_file, fields, schema, chunk_bytes))
+    except (OSError, ValueError) as e:
+        return (f'Cannot read export file {export_file}: {e}', None)
+    finally:
+        try:
+            os.remove(export_file)
+        except OSError:
+            pass
+
+
+'''*************************************************************************'''
+def get_columns(pw_com_object, obj_type, fields, filter_name, transport = 'com', export_file = None, schema = None):
+    # GetParametersMultipleElementRect as typed NumPy columns ("decode_rect"),
+    #   with a choice of transport:
+    #   'com' - the rows come back through COM and are decoded (small tables)
+    #   'file' - the table comes back through a SaveData export that is decoded
+    #            chunk by chunk ("export_columns"), for large tables such as
+    #            every branch in a case
+    # Returns (err, {field: numpy array}); no objects gives zero length columns
+    if transport == 'file' and export_file is not None:
+        return export_columns(pw_com_object, obj_type, fields, filter_name, export_file, schema)
+    result = pw_com_object.GetParametersMultipleElementRect(obj_type, fields, filter_name)
+    if result[0] != '':
+        return (result[0], None)
+    return ('', decode_rect(result[1], fields, schema))
+
+
+'''*************************************************************************'''
+def column_rows(columns, fields):
+    # Typed columns back to rows of python values (for posting); NaN becomes None
+    import math
+    rows = [list(__r) for __r in zip(*[columns[__f].tolist() for __f in fields])]
+    return [[None if type(__e) == float and math.isnan(__e) else __e for __e in __r] for __r in rows]
+
+
+'''****************************************************************************
+*******************************************************************************
+****                                                                       ****
+****                                                                       ****
+****                              Query Cache                              ****
+****                                                                       ****
+****                                                                       ****
+*******************************************************************************
+****************************************************************************'''
+class Query_Cache():
+    # Stands in for the SimAuto COM object and answers repeated reads of the
+    #   same solved state from memory.
+    # GetParametersSingleElement is cached per object (object type and key
+    #   values) and GetParametersMultipleElementRect per object type and filter.
+    #   The fields asked of an object type are remembered, and a read that
+    #   misses asks for all of them in one call, so later reads of other
+    #   fields of the same object are answered from that one call.
+    # A single element read of one of the "table_types" that misses reads
+    #   every object of that type in one GetParametersMultipleElementRect
+    #   call, so the reads of other objects of the type in the same solved
+    #   state are answered too.  In "balance_slack" the slack group read after
+    #   a solve ("solve_and_read_slack") also brings in the balance group that
+    #   "adjust_inj_grp_mw" and "scale_inj_grp_mw" read next, so an iteration
+    #   reaches Simulator with 4 reads instead of 6.
+    # Any other call (solve, Scale, SetData, ChangeParameters*, LoadState,
+    #   OpenCase, ...) empties the cache first: Simulator values such as an
+    #   injection group's MW depend on other objects, so a change to one
+    #   object can't be limited to its own fields.  Scripts made only of the
+    #   "read_only_verbs" leave it alone.
+    # Use: pw_com_object = Query_Cache(pw_com_object)
+    key_fields = {'Area': ['Number'], 'Zone': ['Number'], 'Bus': ['BusNum'], 'Gen': ['BusNum', 'GenID'],
+                  'Load': ['BusNum', 'LoadID'], 'Shunt': ['BusNum', 'ID'], 'Branch': ['BusNumFrom', 'BusNumTo', 'Circuit'],
+                  'InjectionGroup': ['Name'], 'Filter': ['ObjectType', 'FilterName']}
+    read_only_verbs = ['savedata', 'savecase', 'logadd', 'logclear', 'logsave']
+    # Types with few objects (whole table read on a miss)
+    table_types = ['Area', 'Zone', 'InjectionGroup']
+
+    def __init__(self, pw_com_object):
+        self.pw_com_object = pw_com_object
+        # {(obj_type, key values): {field: value}}
+        self.elements = {}
+        # {(obj_type, filter_name): [fields, rows]}
+        self.tables = {}
+        # {obj_type or (obj_type, filter_name): [fields asked for so far]}
+        self.field_sets = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self.pw_com_object, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        def call(*args):
+            if not (name == 'GetParametersMultipleElement' or (name == 'RunScriptCommand' and self.read_only(args[0]))):
+                self.invalidate()
+            return attribute(*args)
+        return call
+
+    def read_only(self, script):
+        verbs = [__e.strip().split('(')[0].strip().lower() for __e in f'{script}'.split(';') if __e.strip() != '']
+        return len(verbs) > 0 and all([__v in self.read_only_verbs for __v in verbs])
+
+    def invalidate(self):
+        if len(self.elements) > 0 or len(self.tables) > 0:
+            self.invalidations += 1
+        self.elements = {}
+        self.tables = {}
+
+    def key_value(self, value):
+        # Key values as Simulator matches them: numbers by value, text without case
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return f'{value}'.strip().lower()
+
+    def merged_fields(self, set_key, fields, first_fields = None):
+        # Fields for one read: "first_fields", then everything asked of "set_key" so far
+        field_set = self.field_sets.setdefault(set_key, [])
+        field_set += [__f for __f in fields if __f not in field_set]
+        first_fields = [] if first_fields is None else first_fields
+        return first_fields + [__f for __f in field_set if __f not in first_fields]
+
+    def GetParametersSingleElement(self, obj_type, fields, values):
+        key_fields = self.key_fields.get(obj_type, None)
+        # Reads that can't be keyed (unknown object, key not in the fields, or
+        #   padded value lists) go straight through
+        if key_fields is None or len(values) != len(fields) or not all([__k in fields for __k in key_fields]):
+            self.misses += 1
+            return self.pw_com_object.GetParametersSingleElement(obj_type, fields, values)
+        key_values = [values[fields.index(__k)] for __k in key_fields]
+        element_key = (obj_type, tuple([self.key_value(__v) for __v in key_values]))
+        element = self.elements.get(element_key, None)
+        if element is not None and all([__f in element for __f in fields]):
+            self.hits += 1
+            return ('', tuple([element[__f] for __f in fields]))
+        self.misses += 1
+        read_fields = self.merged_fields(obj_type, fields, key_fields)
+        if obj_type in self.table_types:
+            # Every object of the type in one call
+            result = self.pw_com_object.GetParametersMultipleElementRect(obj_type, read_fields, '')
+            if result[0] == '' and result[1] is not None:
+                for row in result[1]:
+                    if len(row) >= len(read_fields):
+                        self.elements[(obj_type, tuple([self.key_value(__v) for __v in row[0:len(key_fields)]]))] = dict(zip(read_fields, row))
+                element = self.elements.get(element_key, None)
+                if element is not None:
+                    return ('', tuple([element[__f] for __f in fields]))
+        result = self.pw_com_object.GetParametersSingleElement(obj_type, read_fields, key_values + [''] * (len(read_fields) - len(key_fields)))
+        if result[0] != '' or result[1] is None or len(result[1]) < len(read_fields):
+            # e.g. a field that isn't valid for this object; ask for just these fields
+            return self.pw_com_object.GetParametersSingleElement(obj_type, fields, values)
+        element = dict(zip(read_fields, result[1]))
+        self.elements[element_key] = element
+        return ('', tuple([element[__f] for __f in fields]))
+
+    def GetParametersMultipleElementRect(self, obj_type, fields, filter_name):
+        table_key = (obj_type, filter_name)
+        table = self.tables.get(table_key, None)
+        if table is not None and all([__f in table[0] for __f in fields]):
+            self.hits += 1
+        else:
+            self.misses += 1
+            read_fields = self.merged_fields(table_key, fields)
+            result = self.pw_com_object.GetParametersMultipleElementRect(obj_type, read_fields, filter_name)
+            if result[0] != '':
+                return self.pw_com_object.GetParametersMultipleElementRect(obj_type, fields, filter_name)
+            table = [read_fields, result[1]]
+            self.tables[table_key] = table
+        if table[1] is None:
+            return ('', None)
+        columns = [table[0].index(__f) for __f in fields]
+        return ('', tuple([tuple([__r[__i] for __i in columns]) for __r in table[1]]))
+
+    def log_summary(self, level = logging.INFO):
+        extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+        reads = self.hits + self.misses
+        hit_rate = self.hits / reads if reads > 0 else 0.0
+        logger.log(level, f'Query cache: {reads} reads, {self.hits} answered from the cache ({hit_rate:.1%}), {self.invalidations} invalidations', extra = extra)
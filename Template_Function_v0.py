@@ -14,7 +14,7 @@ v0:
     Created a demonstration function to show how I generally implement
         powerflow study automation.
     Import general functions from "General_Functions.py"
-    Import Powerworld functions from "Powerworld_functions.py"
+    Import Powerworld functions from "Powerworld_Functions.py"
             
     Worker 2 runs a simple dummy function
     
@@ -400,8 +400,6 @@ def Post2Excel(tab_name, obj, Excel_headers, obj_data, fmt_lst, wb):
     try:
         logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}.', extra = extra)
         
-        import xlwings as xw
-        
         if len(tab_name) > 31:
             logger.log(logging.WARNING, f'Warning:  Worksheet name is too long for Excel\n Changing {tab_name} to {tab_name[0:31]}', extra = extra)
             tab_name = tab_name[0:31]
@@ -409,8 +407,9 @@ def Post2Excel(tab_name, obj, Excel_headers, obj_data, fmt_lst, wb):
         logger.log(logging.INFO, f'Posting:  {tab_name}', extra = extra)
         
         #look for an existing sheet.  If not present, create it
-        if tab_name in [xw.sheets[i].name for i in wb.sheets]:
-            sht = xw.sheets[[i.name for i in wb.sheets].index(tab_name)]  #sets the active sheet to tab_name if the sheet name exists
+        # Use the sheets of "wb" (not the active workbook) so parallel seasons with their own Excel don't mix
+        if tab_name in [__e.name for __e in wb.sheets]:
+            sht = wb.sheets[tab_name]  #sets the active sheet to tab_name if the sheet name exists
         else:
             sht = wb.sheets.add(tab_name) #adds a sheet named tab_name if the sheet does not already exist
         sht.activate()
@@ -445,6 +444,30 @@ def Post2Excel(tab_name, obj, Excel_headers, obj_data, fmt_lst, wb):
         action = 'Exception'
         logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
         return [err, action, '']
+
+
+'''*************************************************************************'''
+def Post2Csv(results_dir, tab_name, obj, Excel_headers, obj_data):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Write one table to "{results_dir}{tab_name}.csv" with the same title and
+    #   header rows as "Post2Excel", for runs without Excel (results_format = 'csv')
+    
+    try:
+        import csv
+        csv_file = f'{results_dir}{tab_name}.csv'
+        logger.log(logging.INFO, f'Posting:  {csv_file}', extra = extra)
+        with open(csv_file, 'w', newline = '') as f:
+            writer = csv.writer(f)
+            writer.writerow([obj])
+            writer.writerow(Excel_headers)
+            writer.writerows(obj_data)
+        return ['', '', csv_file]
+    
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, '']
         
     
 '''****************************************************************************
@@ -456,17 +479,29 @@ def Post2Excel(tab_name, obj, Excel_headers, obj_data, fmt_lst, wb):
 ****                                                                       ****
 *******************************************************************************
 ****************************************************************************'''
-def create_filters(filters_data, pw_com_object):
+def create_filters(filters_data, pw_com_object, batch = True):
     extra = {"qThreadName": 'def ' + cf().f_code.co_name}
     # Create multiple filters in the active case using the passed list
+    # With "batch", all filters are made with one script call and checked with
+    #   one query ("create_filters_batch").  If the script call fails, each
+    #   filter is made on its own so the failing filter is reported.
+    # Returns [err, action, results], with one [err, action] in results per filter
     try:
         logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}.', extra = extra)
         
         results = []
+        if batch:
+            result = create_filters_batch(filters_data, pw_com_object)
+            if result[1] != 'Script Failed':
+                results = result[2]
+            else:
+                logger.log(logging.WARNING, f'Batched filter script failed; creating filters one at a time. {result[0]}', extra = extra)
+        
         # Enter EDIT mode
-        for filter_data in filters_data:
-            resultx01 = create_filter(filter_data, pw_com_object)
-            results.append(resultx01)
+        if len(results) == 0:
+            for filter_data in filters_data:
+                resultx01 = create_filter(filter_data, pw_com_object)
+                results.append(resultx01)
         
         if True in [result[0:2] != ['', ''] for result in results]:
             err = f'Failed to create one or more advanced filters.'
@@ -484,6 +519,148 @@ def create_filters(filters_data, pw_com_object):
         return [err, action, []]
 
 
+'''*************************************************************************'''
+def sync_filters(filters_data, pw_com_object):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Filter registry: make the filters in the active case match "filters_data"
+    #   without rewriting the ones already there.
+    # The filters and conditions in the case are read with one query each and
+    #   compared with "filters_data".  Only the missing or changed filters are
+    #   passed to "create_filters", so a reopened study case needs no writes.
+    # Returns [err, action, report], where report is
+    #   {'unchanged': [names], 'created': [names], 'updated': [names], 'results': create_filters results}
+    import csv
+    
+    def fields(text):
+        # Split a filter or condition string into normalized fields
+        values = next(csv.reader([text], skipinitialspace = True))
+        values = [__e.strip() for __e in values]
+        return [f'{float(__e):g}' if is_number(__e) else __e.replace(' ', '').lower() for __e in values]
+    
+    report = {'unchanged': [], 'created': [], 'updated': [], 'results': []}
+    try:
+        logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}.', extra = extra)
+        
+        # Filters and conditions already in the case
+        existing_filters = {}
+        result = pw_com_object.GetParametersMultipleElementRect('Filter', ['ObjectType', 'FilterName', 'FilterLogic', 'Number', 'FilterPre', 'Enabled'], '')
+        if result[0] == '' and result[1] is not None:
+            for __e in result[1]:
+                values = fields(','.join([f'"{__f}"' for __f in __e]))
+                existing_filters[tuple(values[0:2])] = [values, []]
+        result = pw_com_object.GetParametersMultipleElementRect('Condition', ['ObjectType', 'FilterName', 'ConditionNumber', 'VariableName', 'ConditionType', 'ConditionValue', 'ConditionValue:1', 'ConditionCaseAbs'], '')
+        if result[0] == '' and result[1] is not None:
+            for __e in result[1]:
+                values = fields(','.join([f'"{__f}"' for __f in __e]))
+                if tuple(values[0:2]) in existing_filters:
+                    existing_filters[tuple(values[0:2])][1] += [values]
+        logger.log(logging.DEBUG, f'{len(existing_filters)} filters found in the case.', extra = extra)
+        
+        # Compare with the wanted filters
+        to_create = []
+        for filter_data in filters_data:
+            wanted = fields(filter_data[0])
+            wanted_conditions = sorted([fields(__e) for __e in filter_data[1]])
+            f_name = filter_data[0].replace(' ,',',').replace(', ',',').split(',')[1].replace('"','')
+            key = tuple(wanted[0:2])
+            if key not in existing_filters:
+                report['created'] += [f_name]
+                to_create += [filter_data]
+            elif existing_filters[key][0] != wanted or sorted(existing_filters[key][1]) != wanted_conditions:
+                report['updated'] += [f_name]
+                to_create += [filter_data]
+            else:
+                report['unchanged'] += [f_name]
+        
+        logger.log(logging.INFO, f'Filters: {len(report["unchanged"])} unchanged, {len(report["created"])} to create, {len(report["updated"])} to update', extra = extra)
+        logger.log(logging.DEBUG, f'Filters created: {report["created"]}, updated: {report["updated"]}', extra = extra)
+        if len(to_create) == 0:
+            return ['', '', report]
+        
+        result = create_filters(to_create, pw_com_object)
+        report['results'] = result[2]
+        return [result[0], result[1], report]
+        
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, report]
+
+
+'''*************************************************************************'''
+def create_filters_batch(filters_data, pw_com_object):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Create all filters in the active case with one script call, then check
+    #   every filter's condition count with one query.
+    # Returns [err, action, results], with one [err, action] in results per filter.
+    #   action is 'Script Failed' (and results empty) when the script call fails.
+    
+    try:
+        logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}.', extra = extra)
+        
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        
+        def filter_key(f_type, f_name):
+            # Simulator matches filter names without case; compare them the same way ("sync_filters")
+            return (f_type.replace('"','').replace(' ','').lower(), f_name.replace('"','').replace(' ','').lower())
+        
+        # One script holding every filter and condition
+        script = []
+        filter_keys = []
+        for filter_data in filters_data:
+            f_type = filter_data[0].split(',')[0].replace(' ','').replace('"','')
+            f_name = filter_data[0].replace(' ,',',').replace(', ',',').split(',')[1]
+            filter_keys += [[filter_key(f_type, f_name), f_name.replace('"','')]]
+            script += [f'CreateData(Filter, [ObjectType,FilterName,FilterLogic,Number,FilterPre,Enabled], [{filter_data[0]}]);']
+            for condition in filter_data[1]:
+                script += [f'CreateData(Condition, [ObjectType,FilterName,ConditionNumber,VariableName,ConditionType,ConditionValue, ConditionValue:1,ConditionCaseAbs], [{condition}]);']
+        logger.log(logging.DEBUG, f'Creating {len(filters_data)} filters with {len(script)} script commands in one call.', extra = extra)
+        result = pw_com_object.RunScriptCommand(' '.join(script))
+        if result[0] != '':
+            err = f'Error running batched filter script: {result[0]}'
+            action = 'Script Failed'
+            return [err, action, []]
+        
+        # Check filter creation: condition count of every filter in the case
+        result = pw_com_object.GetParametersMultipleElementRect('Filter', ['ObjectType', 'FilterName', 'NumElements'], '')
+        if result[0] != '' or result[1] is None:
+            err = f'Error checking filters: {result[0]}.'
+            action = 'Error'
+            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+            return [err, action, [[err, action] for __e in filters_data]]
+        num_conditions = {filter_key(__e[0], __e[1]): __e[2] for __e in result[1]}
+        
+        results = []
+        for (key, f_name), filter_data in zip(filter_keys, filters_data):
+            if key not in num_conditions:
+                err = f'Error, {f_name} filter was not created.'
+                action = 'Error'
+                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                results += [[err, action]]
+            elif int(float(num_conditions[key])) != len(filter_data[1]):
+                err = f'Error, incorrect quantity of conditions for {f_name} filter.  Should be {len(filter_data[1])}, actual = {num_conditions[key]}'
+                action = 'Error'
+                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                results += [[err, action]]
+            else:
+                results += [['', '']]
+        
+        if True in [__e != ['', ''] for __e in results]:
+            return [f'Failed to create one or more advanced filters.', 'Error', results]
+        return ['', '', results]
+        
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, [[err, action] for __e in filters_data]]
+
+
 '''*************************************************************************'''
 def create_filter(filter_data, pw_com_object):
     extra = {"qThreadName": 'def ' + cf().f_code.co_name}
@@ -492,8 +669,11 @@ def create_filter(filter_data, pw_com_object):
     try:
         logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}.', extra = extra)
         
-        import pythoncom
-        pythoncom.CoInitialize()
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
         
         f_type = filter_data[0].split(',')[0].replace(' ','').replace('"','')
         f_name = filter_data[0].replace(' ,',',').replace(', ',',').split(',')[1]
@@ -544,8 +724,11 @@ def change_filter_conditionvalue(filter_data, pw_com_object):
     # Change an existing filter condition according to the passed filter data
     
     try:
-        import pythoncom
-        pythoncom.CoInitialize()
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
         object_type, filter_name, condition_num, condition_value = filter_data
     
         result = pw_com_object.ChangeParametersSingleElement('Condition', ['ObjectType', 'FilterName', 'ConditionNumber', 'ConditionValue'], filter_data)
@@ -559,24 +742,39 @@ def change_filter_conditionvalue(filter_data, pw_com_object):
 
 
 '''*************************************************************************'''
-def solve_twice(calling_thread, pw_com_object):
+# Settings for the solve engine ("Powerworld_Functions.Solve_Engine").  Set by
+#   "worker1_function" and passed on to the season and load level processes.
+solve_options = {}
+# The solve engine for this process, made on the first solve
+solve_engine = None
+
+
+'''*************************************************************************'''
+def solve_twice(calling_thread, pw_com_object, case_name = None, case_file = None):
     extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Solve the case.  The name is kept for the callers; the solve engine only
+    #   solves a second time when the first solve leaves too much mismatch, and
+    #   tries its fallback methods when a solve fails.
+    # Solve counts and times are kept under "case_name" (default: the caller's thread name).
+    # "case_file" is the case file the open case was opened or restored from
+    #   (the solve engine's mismatch filter is made once per case file).
+    global solve_engine
     
     try:
-        # Solve the case twice
-        result = pw_com_object.RunScriptCommand('SolvePowerFlow(RECTNEWT);')
-        if result[0] != '':
-            err = f'Error solving first Powerflow. Called by {calling_thread}. Result = {result[0]}'
-            action = 'Skipped'
-            logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
-            return[err, action]
-            
-        result = pw_com_object.RunScriptCommand('SolvePowerFlow(RECTNEWT);')
-        if result[0] != '':
-            err = f'Error solving second Powerflow. Called by {calling_thread}. Result = {result[0]}'
+        if solve_engine is None:
+            import Powerworld_Functions
+            Powerworld_Functions.logger = logger
+            solve_engine = Powerworld_Functions.Solve_Engine(**solve_options)
+        if case_name is None:
+            case_name = calling_thread['qThreadName'] if type(calling_thread) == dict else f'{calling_thread}'
+        
+        result = solve_engine.solve(pw_com_object, case_name, case_file)
+        if result[0:2] != ['', '']:
+            err = f'Error solving Powerflow. Called by {calling_thread}. Result = {result[0]}'
             action = 'Skipped'
             logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
             return[err, action]
+        logger.log(logging.SUBDATA, f'{case_name}: solved with {result[2]} solve(s)', extra = extra)
         
 #        # DEBUG: Gather and report object data for troubleshooting
 #        object_type = ['Interface', 'InjectionGroup']
@@ -628,8 +826,9 @@ def adjust_inj_grp_mw(inj_grp, adj_mw, pw_com_object, enforce_limits = True, res
             limit_mw, limit_txt, limit_sgn = limit
             # Check if adj_mw is outside this limit
             if (limit_sgn * adj_mw > 0) and (limit_sgn * (limit_mw - inj_grp_mw) < .1):
+                # The group is not moved ("scale_inj_grp_mw" returns 'Warning' when it moved and reached a limit)
                 err = f'Injection group alread at {limit_txt} MW.'
-                action = 'Warning'
+                action = 'At Limit'
                 logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
                 return[err, action, [inj_grp_mw, inj_grp__min_mw, inj_grp__max_mw]]
     
@@ -673,6 +872,22 @@ def scale_inj_grp_mw(inj_grp, level, pw_com_object, enforce_limits = True, reset
         if limit_min_to_zero:
             level = max(0, level)
         
+        # Get current injection group MW level, GenMWMin, GenMWMin, and target
+        #   (before the BGScale writes, which don't change them, so a read-through
+        #   cache can answer it from the same read in "adjust_inj_grp_mw")
+        logger.log(logging.DEBUG, f'Gathering {inj_grp} levels: MW, GenMWMin, and GenMWMax ', extra = extra)
+        result = pw_com_object.GetParametersSingleElement('InjectionGroup', ['Name','MW', 'GenMWMin', 'GenMWMax'], [inj_grp, '', '', ''])
+        # Error handling for pw call
+        if result[0] != '':
+            err = f'Could not get data for {inj_grp}. \n result = {result[0]}'
+            action = 'Error'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            return[err, action, [None, None, None, None]]
+        intial_inj_grp_mw = float(result[1][1])
+        inj_grp__min_mw = float(result[1][2])
+        inj_grp__max_mw = float(result[1][3])
+        logger.log(logging.DATA, f'intial_inj_grp_mw = {intial_inj_grp_mw:.1f}, inj_grp__min_mw = {inj_grp__min_mw:.1f}, inj_grp__max_mw = {inj_grp__max_mw:.1f}', extra = extra)
+        
         # set all injection groups BGScale parameter to "NO"
         logger.log(logging.DEBUG, f'Setting all BGScale to "NO"', extra = extra)
         result = pw_com_object.RunScriptCommand('SetData(InjectionGroup, ["BGScale"], ["NO"], ALL);')
@@ -694,20 +909,6 @@ def scale_inj_grp_mw(inj_grp, level, pw_com_object, enforce_limits = True, reset
         # Set scale options?
         pass
         
-        # Get current injection group MW level, GenMWMin, GenMWMin, and target
-        logger.log(logging.DEBUG, f'Gathering {inj_grp} levels: MW, GenMWMin, and GenMWMax ', extra = extra)
-        result = pw_com_object.GetParametersSingleElement('InjectionGroup', ['Name','MW', 'GenMWMin', 'GenMWMax'], [inj_grp, '', '', ''])
-        # Error handling for pw call
-        if result[0] != '':
-            err = f'Could not get data for {inj_grp}. \n result = {result[0]}'
-            action = 'Error'
-            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-            return[err, action, [None, None, None, None]]
-        intial_inj_grp_mw = float(result[1][1])
-        inj_grp__min_mw = float(result[1][2])
-        inj_grp__max_mw = float(result[1][3])
-        logger.log(logging.DATA, f'intial_inj_grp_mw = {intial_inj_grp_mw:.1f}, inj_grp__min_mw = {inj_grp__min_mw:.1f}, inj_grp__max_mw = {inj_grp__max_mw:.1f}', extra = extra)
-        
         # Set Filter partpt filter for this injgrp
         filter_data = ['PartPointGen', f'{G_prefix}_NA_filter_Inj_Grp_Gens', '1', inj_grp]
         result = change_filter_conditionvalue(filter_data, pw_com_object)
@@ -718,18 +919,22 @@ def scale_inj_grp_mw(inj_grp, level, pw_com_object, enforce_limits = True, reset
             return[err, action, [None, None, None, None]]
             
         # Get data for gens in inj_grp
-        result = pw_com_object.GetParametersMultipleElementRect('PartPointGen', ['BusNum', 'GenID', 'GenMW', 'GenMWMax', 'Status'], f'{G_prefix}_NA_filter_Inj_Grp_Gens')
+        PartPointGen_ParamList = ['BusNum', 'GenID', 'GenMW', 'GenMWMax', 'Status']
+        result = pw_com_object.GetParametersMultipleElementRect('PartPointGen', PartPointGen_ParamList, f'{G_prefix}_NA_filter_Inj_Grp_Gens')
         if result[0] != '':
             err = f'Could not get generator list from {inj_grp}.  Result = {result[0]}'
             action = 'Error'
             logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
             return[err, action, [None, None, None, None]]
         # figure out if any of the operating gens are low
-        operating_gens = [[__e[0], __e[1], float(__e[2]), float(__e[3]), __e[4]] for __e in result[1] if (__e[4] == 'Closed')]
-        low_gens = [__e for __e in operating_gens if abs(__e[2]) < .05 * abs(__e[3])]
+        import numpy as np
+        from Powerworld_Functions import decode_rect
+        gens = decode_rect(result[1], PartPointGen_ParamList)
+        operating_gens = gens['Status'] == 'Closed'
+        low_gens = operating_gens & (np.abs(gens['GenMW']) < .05 * np.abs(gens['GenMWMax']))
         
         #if current MW is less than 10 or there are low gens, set all gens to max MW
-        if intial_inj_grp_mw < 10 or len(low_gens)>0:            
+        if intial_inj_grp_mw < 10 or low_gens.any():            
             # Set all gens in Injection Group to GenMaxMW
             logger.log(logging.DEBUG, f'Setting gens in {inj_grp} to GenMWMax', extra = extra)
             result = pw_com_object.RunScriptCommand('SetData(Gen, [GenMW], [@GenMWMax], "<DEVICE>InjectionGroup ' + f"'{inj_grp}'" + '");')
@@ -791,6 +996,143 @@ def scale_inj_grp_mw(inj_grp, level, pw_com_object, enforce_limits = True, reset
         return[err, action, [None, None, None, None]]
 
 
+'''*************************************************************************'''
+def solve_and_read_slack(slack_inj_grp, balance_data, pw_com_object):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Solve, then read the slack injection group's MW and min MW into "balance_data"
+    # Returns [err, action]
+    logger.log(logging.INFO, f'Solving Powerflow', extra = extra)
+    result = solve_twice(extra, pw_com_object)
+    balance_data['solves'] += 1
+    if result[0:2] != ['', '']:
+        err = f'Error in solve_twice.'
+        action = 'Error'
+        logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+        return[err, action]
+    
+    # Check current slack level, min gen level
+    logger.log(logging.INFO, f'Checking {slack_inj_grp} MW level, Min MW', extra = extra)
+    result = pw_com_object.GetParametersSingleElement('InjectionGroup', ['Name','MW', 'GenMWMin'], [slack_inj_grp, 0.0, 0.0])
+    if result[0] != '':
+        err = f'Error gathering slack data. Result = {result[0]}'
+        action = 'Error'
+        logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+        return[err, action]
+    balance_data['current_slack_mw'] = float(result[1][1])
+    balance_data['current_slack_min_mw'] = float(result[1][2])
+    logger.log(logging.DATA, f'current_slack_mw = {balance_data["current_slack_mw"]:.1f}, current_slack_min_mw = {balance_data["current_slack_min_mw"]:.1f}', extra = extra)
+    return['', '']
+
+
+'''*************************************************************************'''
+def balance_slack(balance_inj_grps, slack_inj_grp, initial_slack_mw, slack_error, max_slack_deviation, pw_com_object, max_iterations = 5):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Move the balance injection groups, in order, until the slack injection
+    #   group is back within "max_slack_deviation" of "initial_slack_mw".
+    # Each move is sized from the slack response per MW of injection group
+    #   change seen on the previous moves (secant step), starting from -1 MW/MW,
+    #   so the slack is usually balanced in one or two solves.  A group that is
+    #   at a limit passes the rest of the error to the next group.  The case is
+    #   solved after every move, including one that stopped at a limit.
+    # Returns [err, action, balance_data], where balance_data is
+    #   {'current_slack_mw', 'current_slack_min_mw', 'iterations', 'solves', 'balanced'}.
+    #   err is '' when the slack is balanced; action is 'Warning' when every
+    #   group is at a limit first, and 'Not Balanced' when "max_iterations"
+    #   moves were not enough.
+    balance_data = {'current_slack_mw': initial_slack_mw + slack_error, 'current_slack_min_mw': None, 'iterations': 0, 'solves': 0, 'balanced': False}
+    
+    try:
+        balance_inj_grp_idx = 0
+        # Slack MW change per MW of balance injection group change
+        sensitivity = -1.0
+        while balance_data['iterations'] < max_iterations:
+            balance_data['iterations'] += 1
+            balance_inj_grp = balance_inj_grps[balance_inj_grp_idx]
+            lim_txt = ''
+            moved = True
+            
+            # Move the injection group by the step expected to cancel the slack error (but respect MW limits), and do not go below zero
+            adj_mw = -slack_error / sensitivity
+            logger.log(logging.DATA, f'Iteration {balance_data["iterations"]}: {balance_inj_grp} adj_mw = {adj_mw:.1f} (sensitivity = {sensitivity:.3f})', extra = extra)
+            result = adjust_inj_grp_mw(balance_inj_grp, adj_mw, pw_com_object, limit_min_to_zero = True)
+            if result[1] in ['Error', 'Exception']:
+                err = f'Error adjusting {balance_inj_grp}.'
+                action = 'Error'
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action, balance_data]
+            elif result[1] in ['Warning', 'At Limit']:
+                # 'At Limit': the group was already at the limit and did not move
+                # 'Warning': the group moved and stopped at the limit
+                moved = result[1] == 'Warning'
+                if 'max' in result[0]:
+                    lim_txt = 'max'
+                elif 'min' in result[0]:
+                    lim_txt = 'min'
+            
+            if moved:
+                result = solve_and_read_slack(slack_inj_grp, balance_data, pw_com_object)
+                if result[0:2] != ['', '']:
+                    return[result[0], result[1], balance_data]
+                
+                # Secant update of the sensitivity.  A response with the wrong sign or far
+                #   off -1 (e.g. the group hit a limit part way) is not used.
+                new_slack_error = balance_data['current_slack_mw'] - initial_slack_mw
+                if abs(adj_mw) > 0.1:
+                    response = (new_slack_error - slack_error) / adj_mw
+                    if -5.0 < response < -0.2:
+                        sensitivity = response
+                slack_error = new_slack_error
+                logger.log(logging.DATA, f'slack_error = {slack_error:.1f}, max_slack_deviation = {max_slack_deviation:.1f}', extra = extra)
+                if abs(slack_error) <= max_slack_deviation:
+                    # If slack is close, exit loop
+                    logger.log(logging.DEBUG, f'Exiting slack balance loop on "Slack balanced"', extra = extra)
+                    balance_data['balanced'] = True
+                    break
+            
+            # Move to the next balance injection group when this one is at a limit
+            if lim_txt == 'max' or lim_txt == 'min':
+                if lim_txt == 'max':
+                    lim_sgn = -1
+                else:
+                    lim_sgn = 1
+                balance_inj_grp_idx += lim_sgn
+                sensitivity = -1.0
+                if (balance_inj_grp_idx >= len(balance_inj_grps)) or (balance_inj_grp_idx < 0):
+                    # if there are no more balance injection groups, exit loop
+                    logger.log(logging.DEBUG, f'Exiting slack balance loop on "All injection groups at {lim_txt} gen"', extra = extra)
+                    break
+        # End of slack balancing while loop
+        else:
+            # This will only execute if the while loop exits on iteration overflow
+            err = f'Failed to balance slack after {max_iterations} iterations.'
+            action = 'Not Balanced'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            return[err, action, balance_data]
+        
+        if not balance_data['balanced']:
+            if balance_data['solves'] == 0:
+                # No group moved; the case still needs a solve (and the slack a fresh read)
+                result = solve_and_read_slack(slack_inj_grp, balance_data, pw_com_object)
+                if result[0:2] != ['', '']:
+                    return[result[0], result[1], balance_data]
+                slack_error = balance_data['current_slack_mw'] - initial_slack_mw
+                balance_data['balanced'] = abs(slack_error) <= max_slack_deviation
+            if not balance_data['balanced']:
+                err = f'All balance injection groups at {lim_txt} MW.  slack_error = {slack_error:.1f}, max_slack_deviation = {max_slack_deviation:.1f}'
+                action = 'Warning'
+                logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action, balance_data]
+        
+        logger.log(logging.SUBINFO, f'Slack balancing: {balance_data["iterations"]} iterations, {balance_data["solves"]} solves, slack_error = {slack_error:.1f}', extra = extra)
+        return['', '', balance_data]
+    
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return[err, action, balance_data]
+
+
 '''*************************************************************************'''
 def scale_area_load_mw(area_num, new_load, pw_com_object, enforce_agc = False):
     extra = {"qThreadName": 'def ' + cf().f_code.co_name}
@@ -885,68 +1227,939 @@ def save_pw_case(dir_name, save_name, pw_com_object):
         logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
         return [err, action, []]
 
-def worker1_function(worker1_data_dict):
+'''*************************************************************************'''
+# In a pool process running seasons in parallel, the Excel instance kept for
+#   the life of the process (see "season_process_setup")
+excel_app = None
+
+
+'''*************************************************************************'''
+def season_process_setup(use_stub = False, results_format = 'excel', simulator_options = None, cache_reads = False):
+    # Pool process setup for parallel seasons.  Each process keeps its own
+    #   simulator and its own Excel instance, so the seasons don't share either.
+    import atexit
+    from Powerworld_Functions import simulator_process_setup
+    global excel_app
+    simulator_process_setup(use_stub, simulator_options, cache_reads)
+    if results_format == 'excel':
+        import xlwings as xw  # Loads a suite of functions to contol Excel from Python
+        excel_app = xw.App(visible = False, add_book = False)
+        atexit.register(excel_app.quit)
+
+
+'''*************************************************************************'''
+def run_load_level(pw_com_object, level_data):
     extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Open the season's base case, scale the two areas to one load level, solve,
+    #   and read the object tables to post.
+    # Called by "run_season" for each load level, or in a pool process through
+    #   "Powerworld_Functions.simulator_call" when the load levels run in parallel.
+    #   With "copy_base", the level opens its own copy of the base case.
+    #   With "snapshot", the base case is already open with its filters made and
+    #   a state saved ("run_season"), so the level only restores that state.
+    #   With "warm_start", the level is scaled from the case as the previous
+    #   level left it (load level sweep); nothing is reset.
+    # Returns [err, action, tables].  "tables" holds the data (list of lists)
+    #   for each of "pw_calls", or None where the table could not be read.
+    import os
+    import shutil
+    import time
     
-    '''****************************************************************************
-    *******************************************************************************
-    ****                                                                       ****
-    ****                                                                       ****
-    ****                           Import Block                                ****
-    ****                                                                       ****
-    ****                                                                       ****
-    *******************************************************************************
-    ****************************************************************************'''
+    global G_prefix
     
-    from datetime import datetime  # date and time functions
-    Starttime = datetime.now()
+    try:
+        case = level_data['case']
+        case_load_name = level_data['case_load_name']
+        load_level = level_data['load_level']
+        study_dir = level_data['study_dir']
+        study_file = level_data['study_file']
+        G_prefix = level_data['G_prefix']
+        if 'solve_options' in level_data and solve_engine is None:
+            solve_options.update(level_data['solve_options'])
+        extra = {'qThreadName': f'Scale base case and solve powerflow.  Case: "{case_load_name}"'}
+        logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+        
+        open_file = study_file
+        if level_data['copy_base']:
+            open_file = f'{study_dir}\\{case}{case_load_name}_Base_copy.pwb'
+            logger.log(logging.DEBUG, f'Copying {study_file} to {open_file}', extra = extra)
+            shutil.copyfile(study_file, open_file)
+        
+        try:
+            reset_start = time.time()
+            if level_data.get('warm_start', False):
+                # Scale from the previous level's solved case
+                logger.log(logging.INFO, f'Warm start from the previous load level.', extra = extra)
+            elif level_data.get('snapshot', False):
+                # Back to the prepared base case; filters and injection groups are kept
+                logger.log(logging.INFO, f'Restoring base case state.', extra = extra)
+                result = pw_com_object.LoadState()
+                if result[0] != '':
+                    err = f'Cannot restore base case state. error = {result[0]}'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, []]
+            else:
+                #Load the Powerworld case file
+                logger.log(logging.INFO, f'Opening: {open_file}', extra = extra)
+                result = pw_com_object.OpenCase(open_file)    #open case
+                if result[0] != '':
+                    err = f'Error loading case. {open_file}. result = {result[0]}.'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, []]
+                
+                result = sync_filters(level_data['filters_data'], pw_com_object)
+                if result[0:2] != ['', '']:
+                    err = f'Failed to create one or more advanced filters. Result = {result[2]}'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, []]
+            logger.log(logging.SUBINFO, f'Base case ready in {time.time() - reset_start:.2f} s', extra = extra)
+            
+            #scale load in areas
+            for area_num, area_load in level_data['areas_data']:
+                
+                # Calculate new Area Load MW
+                new_load = area_load + load_level
+                
+                # Call scale_area_load_mw
+                logger.log(logging.INFO, f'Scaling Area {area_num} load from {area_load:.1f} to {new_load:.1f}', extra = extra)
+                result = scale_area_load_mw(area_num, new_load, pw_com_object, enforce_agc = True)
+                if result[0:2] != ['', '']:
+                    err = f'Error in scale_area_load_mw. Result = {result[0]}'
+                    action = 'Study Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, []]
+            
+                logger.log(logging.INFO, f'Solving Powerflow', extra = extra)
+                result = solve_twice(extra, pw_com_object, case_name = f'{case}{case_load_name}', case_file = study_file)
+                if result[0:2] != ['', '']:
+                    err = f'Error in solve_twice.'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, []]
+            
+            # Same save name with or without a copy of the base case
+            if (level_data['saved_scaled_cases'] == True):
+                result = pw_com_object.RunScriptCommand(r'SaveCase("' + study_dir + '\\' + case + case_load_name + '.pwb", PWB);')
+            if result[0] != '':
+                logger.log(logging.ERROR, f'Error saving scaled case: ' + study_dir + '\\' + case + case_load_name + '.pwb', extra = extra)
+            
+            # Gather the object data as typed columns; large tables come back through a file export
+            from Powerworld_Functions import get_columns, column_rows
+            tables = []
+            for obj, params, pw_filt in level_data['pw_calls']:
+                logger.log(logging.INFO, f'Gathering {obj.lower()} data.', extra = extra)
+                transport = 'file' if obj in level_data.get('export_objects', []) else 'com'
+                export_file = f'{study_dir}\\{case}{case_load_name}_{obj}_Export.csv'
+                result = get_columns(pw_com_object, obj, params, pw_filt, transport = transport, export_file = export_file)
+                if result[0] != '':
+                    err = f'Error reading {obj.lower()} data. {level_data["initial_case"]}. result = {result[0]}.'
+                    action = 'Table Skipped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    tables += [None]
+                    continue
+                # Rows of typed values, so numbers are posted as numbers
+                rows = column_rows(result[1], params)
+                if len(rows) == 0:
+                    logger.log(logging.WARNING, f'No {obj.lower()} objects in {pw_filt}.  Table skipped.', extra = extra)
+                    tables += [None]
+                    continue
+                tables += [rows]
+            
+            return ['', '', tables]
+        
+        finally:
+            if level_data['copy_base']:
+                # The copy can only be removed once the case is closed
+                pw_com_object.CloseCase()
+                try:
+                    os.remove(open_file)
+                except OSError:
+                    logger.log(logging.WARNING, f'Could not remove {open_file}', extra = extra)
     
-    print(f'\n\n{" "*0}********* Loading Libraries ************')
-    import pythoncom
-    #import glob as gl
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        return [err, action, []]
+
+
+'''*************************************************************************'''
+def run_season(pw_com_object, season_data):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    # Develop the base case for one season, then scale, solve and post each load
+    #   level to the season's results workbook.
+    # Called by "worker1_function" for each season, or in a pool process through
+    #   "Powerworld_Functions.simulator_call" when the seasons run in parallel.
+    # "season_data" holds the study settings made in "worker1_function" plus the
+    #   season's "case" (save name) and "initial_case" (starting case file).
+    # Returns [err, action, stop_study].  "stop_study" is True when the
+    #   remaining seasons should not be run.
     import os
     from sys import exit as s_exit
-    import xlwings as xw  # Loads a suite of functions to contol Excel from Python
-    #import math
-    #from operator import itemgetter  #Reference:  https://wiki.python.org/moin/HowTo/Sorting
-    #import sys
-    import logging
-    import pandas as pd
-    #from copy import deepcopy
-    pythoncom.CoInitialize()
-    #import csv
-    
-    global logging
-    global logger
-    logger = worker1_data_dict['logger']
-    import win32com.client # loads a suite of tools access to windows routines
-    try:  # 'try', 'except', and 'finally' are an iteration structure for error handling
-        pw_com_object = win32com.client.Dispatch('pwrworld.SimulatorAuto') # win32com.client.dispatch is a function that returns a Powerworld case object
-    except Exception as e:
-        err = f'Exception (Loading Libraries) = {e}, {print_exception()}'
-        action = f'Exception'
-        logger.log(logging.CRITICAL, f'{err}\n{" "*0}*********** {action} ***********', extra = extra)
-        # End the program here
-#        s_exit("Cannot establish pw_com_object.  Exiting program")
-        #(f'{err}\n{" "*16}*********** {action} ***********')
-        # Signal main thread that the code is done
-#       self.progress_report.emit(['Exception', 'none', '0 of 0', 0, 'none', '0 of 0', 0])
-#       self.finished.emit()
-#       return
     
-    pd.set_option('display.max_columns', 25) # sets the max number of columns to display
-    pd.set_option('display.width', 1000) # sets the max number of chars per line
+    global G_prefix
     
-    '''
-    ****************************************************************************************
-    # A Powerflow study automation algorithm
-    ****************************************************************************************
-    '''
     try:
-        ''' 
-        *************************
-        Settings block
-        *************************
+        case = season_data['case']
+        initial_case = season_data['initial_case']
+        cwd = season_data['cwd']
+        G_prefix = season_data['G_prefix']
+        filters_data = season_data['filters_data']
+        case_inputs = season_data['case_inputs']
+        case_load_names = season_data['case_load_names']
+        saved_scaled_cases = season_data['saved_scaled_cases']
+        Study_Results_dir = season_data['Study_Results_dir']
+        cancel_token = season_data['cancel_token']
+        if 'solve_options' in season_data and solve_engine is None:
+            solve_options.update(season_data['solve_options'])
+        
+        '''
+        ***********************************************************************************************************************************************
+        Develop base case from starting case
+        ***********************************************************************************************************************************************
+        '''
+        extra = {'qThreadName': f'Develop base case from starting case'}
+        logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+        
+        # Create a directory for the study, if it already exists, then use it
+        if os.path.exists(f'{case}'):
+            logger.log(logging.DEBUG, f'Directory for case files already exists; good.', extra = extra)
+        else:
+            logger.log(logging.INFO, f'Creating directory in working directory for case files: {case}', extra = extra)
+            os.mkdir(f'{case}')
+            
+        study_dir = cwd + '\\' + case
+        study_file = f'{study_dir}\\{case}_Base.pwb'
+        
+        # Load the Powerworld case file
+        logger.log(logging.DATA, f'case = {case}', extra = extra)
+        logger.log(logging.INFO, f'Opening: {initial_case}', extra = extra)
+        result = pw_com_object.OpenCase(initial_case)
+        if result[0] != '':
+            err = f'Error loading starting case {initial_case}. result = {result[0]}.'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, False]
+#                s_exit(err)
+        
+        # Create filters
+        result = sync_filters(filters_data, pw_com_object)
+        if result[0:2] != ['', '']:
+            err = f'Failed to create one or more advanced filters. Result = {result[2]}'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, False]
+#                s_exit(err)
+    
+        # Some Dummy Powerworld calls
+        #  Use a script command to create an area abject within the case
+        logger.log(logging.INFO, f'Dummy Powerworld call #1.', extra = extra)
+        result = pw_com_object.RunScriptCommand(r'CreateData(Area, [Number, Name], ["02", "Another Area"]);')
+        if result[0] != '':
+            err = f'Error creating area 02. result = {result[0]}.'
+            action = 'Study Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, False]
+#                s_exit(err)
+    
+        # Use "GetParametersMultipleElement" to get some "Branch" object data from the case
+        logger.log(logging.INFO, f'Dummy Powerworld call #2.', extra = extra)
+        TerminalBus_ParamList = ["BusNumFrom", "BusNumTo"]
+        result = pw_com_object.GetParametersMultipleElement('Branch', TerminalBus_ParamList, f'{G_prefix}_Branches_filter_1')
+        if result[0] != '':
+            err = f'Error gathering bus data for elements in "Branches_filter_1". result = {result[0]}.'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, False]
+        Terminal_Bus = result[1]
+        
+        # Create Bus_List from contents of Terminal_Bus
+        Bus_List = [bus for buses in Terminal_Bus for bus in buses]
+        
+#        Bus_List = []
+#        for x in range(len(Terminal_Bus[0])):
+#            Bus_List.append(Terminal_Bus[0][x])
+#            Bus_List.append(Terminal_Bus[1][x])
+            
+        logger.log(logging.DATA, f'len(Bus_List) = {len(Bus_List)}', extra = extra)
+        Bus_List = list(set(Bus_List)) # remove duplicates in Bus_list
+        logger.log(logging.DATA, f'len(Bus_List) = {len(Bus_List)}', extra = extra)
+        
+        # Move all buses in Bus_List to area 02 in case
+        logger.log(logging.INFO, f'Adding buses to area 02.', extra = extra)
+        Bus_List = [[__e,'02'] for __e in Bus_List]
+        WriteBusAreaNum_ParamList = ["Number", "AreaNumber"]
+        result = pw_com_object.ChangeParametersMultipleElementRect("Bus", WriteBusAreaNum_ParamList, Bus_List)
+        if result[0] != '':
+            err = f'Error moving buses to area 02. result = {result[0]}.'
+            action = 'Study Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        
+        # make Area Gen injection groups for Area 01 and 02
+        # Another example of calling a script command
+        #  I sometimes create loops like this when running a similar algorithm
+        area_data = [1, "{G_prefix}_Area_01_Gens"],[2, "{G_prefix}_Area_02_Gens"]
+        for area_num, inj_grp_name in area_data:
+            logger.log(logging.INFO, f'Making area {area_num} gen injection group', extra = extra)
+            script_str = f'InjectionGroupCreate("{inj_grp_name}", GEN, MAX GEN MW, <DEVICE> Area "{area_num}",NO);'
+            result = pw_com_object.RunScriptCommand(script_str)
+            if result[0] != '':
+                err = f'Error creating Gen Inj Grp for Area {area_num}. Result = {result[0]}.'
+                action = 'Case Stopped'
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                pw_com_object.CloseCase()
+                return[err, action, True]
+#                    s_exit(err)
+        
+        # Save case as base in study directory
+        # DEBUG: Consider using save_case function
+        # I sometimes use a "DEBUG:" comment when there is something to improve or fix.
+        study_file = f'{study_dir}\\{case}_Base.pwb'
+        logger.log(logging.INFO, f'Saving case to {study_file}', extra = extra)
+        result = pw_com_object.RunScriptCommand('SaveCase("' + study_file + '");')
+        if result[0] != '':
+            err = f'Error saving base case: {study_file}.  Result = {result[0]}.'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        
+        # Debug save case
+        if False:
+            logger.log(logging.DEBUG, f'Saving pre ACE correction case.', extra = extra)
+            dir_name = f'{cwd}\\Error_Cases'
+            save_name = f'\\pre_ACE_correction_case_{case}_Base.pwb'
+            logger.log(logging.DEBUG, f'Calling save_pw_case.', extra = extra)
+            result = save_pw_case(dir_name, save_name, pw_com_object)
+                                
+        logger.log(logging.INFO, f'Performing "Clear transaction table and auto-insert tieline transactions".', extra = extra)
+        result = pw_com_object.RunScriptCommand('AutoInsertTieLineTransactions;')
+        if result[0] != '':
+            err = f'Error resetting area transactions. Result = {result[0]}.'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        
+        # Debug save case
+        if False:
+            logger.log(logging.DEBUG, f'Saving post ACE correction case.', extra = extra)
+            dir_name = f'{cwd}\\Error_Cases'
+            save_name = f'\\post_ACE_correction_case_{case}_Base.pwb'
+            logger.log(logging.DEBUG, f'Calling save_pw_case.', extra = extra)
+            result = save_pw_case(dir_name, save_name, pw_com_object)
+        
+        # Debug exit
+        if False:
+            err = f'Debug exit active.'
+            action = 'Case Stopped'
+            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        
+        # Powerworld can make a copy of its current state in case something goes wrong
+        # Set a reference case
+        logger.log(logging.DEBUG, f'Saving reference state.', extra = extra)
+        result = pw_com_object.SaveState()
+        if result[0] != '':
+            err = f'Cannot save reference state. error = {result[0]}'
+            action = f'Warning only'
+            logger.log(logging.CRITICAL, f'{err}\n{" "*21}*********** {action} ***********', extra = extra)
+        
+        # Solve case twice
+        # This is typically where things go wrong
+        logger.log(logging.INFO, f'Solving Powerflow', extra = extra)
+        result = solve_twice(extra, pw_com_object, case_name = f'{case}_Base', case_file = study_file)
+        if result[0:2] != ['', '']:
+            err = f'Error in solve_twice.'
+            action = 'Case Skipped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            # Restore reference case
+            logger.log(logging.DEBUG, f'Restoring reference state.', extra = extra)
+            result = pw_com_object.LoadState()
+            if result[0] != '':
+                err = f'Cannot restore saved case state. error = {result[0]}'
+                action = f'Case Stopped'
+                logger.log(logging.CRITICAL, f'{err}\n{" "*21}*********** {action} ***********', extra = extra)
+            else:
+                # Save an error case
+                dir_name = f'{cwd}\\Error_Cases'
+                save_name = f'\\Error_case_{case}_Base.pwb'
+                logger.log(logging.DEBUG, f'Calling save_pw_case.', extra = extra)
+                result = save_pw_case(dir_name, save_name, pw_com_object)
+            return[err, action, False]
+        
+        '''
+        #save case as base in study directory
+        study_file = f'{study_dir}\\{case}_Base.pwb'
+        '''
+        logger.log(logging.INFO, f'Saving case to ' + study_file, extra = extra)
+        result = pw_com_object.RunScriptCommand('SaveCase("' + study_file + '");')
+        if result[0] != '':
+            err = f'Error saving base case: {study_file}. Result = {result[0]}.'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        
+        # Gather Area Load MW for areas 01 and 02 in a single call to GetParametersMultipleElementRect
+        AreaLoad_ParamList = ['Number', 'LoadMW']
+        result = pw_com_object.GetParametersMultipleElementRect('Area', AreaLoad_ParamList, f'{G_prefix}_Area_01_or_02')
+        if result[0] != '':
+            logger.log(logging.ERROR, f'Error gathering Area load.  Skipping study')
+            err = f'Error gathering Area 01 load.  Result = {result[0]}.'
+            action = 'Case Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        from Powerworld_Functions import decode_rect
+        Area_loads = decode_rect(result[1], AreaLoad_ParamList)
+        Area_01_load = float(Area_loads['LoadMW'][Area_loads['Number'] == 1][0])
+        Area_02_load = float(Area_loads['LoadMW'][Area_loads['Number'] == 2][0])
+        logger.log(logging.DATA, f'Area_01_load = {Area_01_load:.1f}, Area_02_load = {Area_02_load:.1f}', extra = extra)
+        
+        logger.log(logging.INFO, f'Close Powerworld case', extra = extra)
+        pw_com_object.CloseCase()
+        
+        # Debug exit
+        # Sometimes I want to break or continue.                    
+        if False:
+            if False:
+                # Debug Continue
+                err = f'Debug continue active.'
+                action = 'Case Stopped'
+                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action, False]
+            if False:
+                # Debug Break
+                err = f'Debug break active.'
+                action = 'Case Loop Stopped'
+                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action, True]
+            err = f'Debug exit active.'
+            action = 'Study Stopped'
+            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+#            return [err, action, None, None]
+            pw_com_object.CloseCase()
+            s_exit(err)
+        
+        '''
+        ***********************************************************************************************************************************************
+        Prepare results directory and excel file
+        ***********************************************************************************************************************************************
+        '''
+        extra = {'qThreadName': f'Prepare results directory and excel file'}
+        logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+        
+        # Create a directory for the study, if it already exists, then use it
+        if os.path.exists(f'{Study_Results_dir}'):
+            logger.log(logging.DEBUG, f'Directory for results files already exists; good.', extra = extra)
+        else:
+            logger.log(logging.INFO, f'Creating directory in working directory for results files: {Study_Results_dir}', extra = extra)
+            # Another season's process may create it first
+            os.makedirs(f'{Study_Results_dir}', exist_ok = True)
+        
+        # 'excel': a results workbook per season; 'csv': a CSV file per table (no Excel needed)
+        results_format = season_data.get('results_format', 'excel')
+        wb = None
+        def save_results():
+            if wb is not None:
+                wb.save()
+        
+        # Set the file name for the current Study results excel file
+        Study_Results = f'{Study_Results_dir}{case}_Study_Results.xlsx'
+        logger.log(logging.DATA, f'Study_Results = {Study_Results}', extra = extra)
+        # look for an existing excel file.  If it exists open it, otherwise create it
+        if results_format != 'excel':
+            logger.log(logging.INFO, f'Results are written as CSV files in {Study_Results_dir}', extra = extra)
+        elif os.path.isfile(Study_Results):
+            import xlwings as xw  # Loads a suite of functions to contol Excel from Python
+            #open it
+            if excel_app is not None:
+                # Parallel seasons: this process's own Excel instance
+                wb = excel_app.books.open(Study_Results)
+            else:
+                wb = xw.Book(Study_Results)
+            logger.log(logging.DEBUG, f'opened', extra = extra)
+        else:
+            import xlwings as xw  # Loads a suite of functions to contol Excel from Python
+            # create a new workbook, delete the extra sheet, and rename the first sheet to the current study, then save it
+            if excel_app is not None:
+                wb = excel_app.books.add()
+            else:
+                wb = xw.Book()
+            wb.sheets[0].name = 'Curve'
+            wb.save(Study_Results)
+            logger.log(logging.DEBUG, f'Results worksheet created.', extra = extra)
+        if wb is not None:
+            wb.activate()
+        
+        # Debug exit
+        if False:
+            if False:
+                # Debug Continue
+                err = f'Debug continue active.'
+                action = 'Case Stopped'
+                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action, False]
+            if False:
+                # Debug Break
+                err = f'Debug break active.'
+                action = 'Case Stopped'
+                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action, True]
+            err = f'Debug exit active.'
+            action = 'Study Stopped'
+            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+            pw_com_object.CloseCase()
+            return[err, action, True]
+#                s_exit(err)
+        #load each load level including base case level
+        
+        '''
+        ***********************************************************************************************************************************************
+        Scale base case and solve powerflow
+        ***********************************************************************************************************************************************
+        '''
+        #set Excel header names for Full AC ATC results
+        Shunt_xl_hdr = ["Number of Bus", "Name of Bus", "ID", "Reg Bus Num", "Reg Bus Name", "Status", "Control Mode", "Regulates", "Nominal Mvar", "Actual Mvar", "Owner Number  1"]
+        Branch_xl_hdr = ["From Number", "From Name", "From Area Name", "From Nom kV", "To Number", "To Name", "To Nom kV", "Circuit", "Status", "Xfrmr", "MW From", "MW To", "MW Loss", "Owner Name  1", "Owner Number  1", "Value", "Final Losses"]
+        AreaTieLine_xl_hdr = ["Tie Type", "Near Area Name", "Near Number", "Near Name", "Far Area Name", "Far Number", "Far Name", "Ckt", "Meter MW", "Imports", "Exports"]
+        Areas_xl_hdr = ["Area Num", "Area Name", "AGC Status", "Inj Grp Slack Name", "Gen MW", "Load MW", "Shunt MW", "Tot Sched MW","Int MW","ACE MW","Lambda","Loss MW"]
+            
+        Shunt_ParamList = ["BusNum", "BusName", "ID", "RegBusNum", "RegName", "Status", "ShuntMode", "RegulationType", "MvarNom", "Mvar", "OwnerNum1"]
+        Branch_ParamList = ["BusNumFrom", "BusNameFrom", "AreaNameFrom", "NomkVFrom", "BusNumTo", "BusNameTo", "NomkVTo", "Circuit", "Status", "IsXF", "MWFrom", "MWTo", "LossMW", "OwnerName1", "OwnerNum1"]
+        AreaTieLine_ParamList = ["TieType", "AreaNameNear", "BusNumNear", "BusNameNear", "AreaNameFar", "BusNumFar", "BusNameFar", "Circuit", "MWMeter"]
+        Areas_ParamList = ["Number","Name", "AGC", "SlackInjectionGroup", "GenMW", "LoadMW", "ShuntMW", "ExportMWSched", "ExportMW", "ACE", "EconDispLambda", "LossMW"]
+        
+        obj_calcs_dict = {
+                'Shunt': [],
+                'Branch': ['=Censored Excel Calculation String',
+                           '=P{row}*M{row}'],
+                'AreaTieLine': ['=Censored Excel Calculation String', 
+                                '=Censored Excel Calculation String'],
+                'Area': []
+                }
+        
+        
+        pw_call_data = [['Shunt', Shunt_ParamList, f'{G_prefix}_Shunts_Reactors_Active_Area_02', '_Reactors', Shunt_xl_hdr, [['I:J', '0']]], 
+                        ['Branch', Branch_ParamList, f'{G_prefix}_Branches_Owners_List', '_Losses', Branch_xl_hdr, [['K:L', '0'], ['M:M', '0.00'], ['Q:Q', '0.00']]], 
+                        ['AreaTieLine', AreaTieLine_ParamList, f'{G_prefix}_Tielines_Area_02', '_AreaTieLine', AreaTieLine_xl_hdr, [['I:K', '0']]], 
+                        ['Area', Areas_ParamList, f'{G_prefix}_Area_02', '_Area', Areas_xl_hdr, [['E:J', '0'], ['L:L', '0']]]]
+        
+        # Settings for "run_load_level", one per load level
+        levels_data = []
+        for load_level, case_load_name in case_inputs:
+            levels_data += [{'case' : case,
+                             'case_load_name' : case_load_name,
+                             'load_level' : load_level,
+                             'study_dir' : study_dir,
+                             'study_file' : study_file,
+                             'areas_data' : [[1, Area_01_load], [2, Area_02_load]],
+                             'filters_data' : filters_data,
+                             'saved_scaled_cases' : saved_scaled_cases,
+                             'G_prefix' : G_prefix,
+                             'initial_case' : initial_case,
+                             'pw_calls' : [__e[0:3] for __e in pw_call_data],
+                             'solve_options' : solve_options,
+                             'export_objects' : season_data.get('export_objects', []),
+                             'copy_base' : False}]
+        
+        def post_level(level_idx, level_result):
+            # Post one load level's object tables to the season workbook
+            # Returns [err, action, stop_season]
+            case_load_name = levels_data[level_idx]['case_load_name']
+            extra = {'qThreadName': 'Post Data for scaled case'}
+            if level_result[0:2] != ['', '']:
+                return [level_result[0], level_result[1], True]
+            logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} "{case_load_name}" ************', extra = extra)
+            
+            for (obj, params, pw_filt, sht_txt, xl_hdr, fmt_lst), obj_data in zip(pw_call_data, level_result[2]):
+                if obj_data is None:
+                    # The table could not be read; logged by "run_load_level"
+                    continue
+                
+                if obj_calcs_dict[obj] != []:
+                    # Create Excel calculation strings for each data element
+                    calc_rows = []
+                    for row in range(len(obj_data)):
+                        calc_row = []
+                        for calc in obj_calcs_dict[obj]:
+                            calc_row += [calc.replace('{row}', f'{row + 3}')]
+                        calc_rows += [calc_row]
+                
+                    # Add required calcs for each data element
+                    obj_data = [__e + calc_rows[__i] for __i, __e in enumerate(obj_data)]
+                
+                # Develop tab name
+                tab_name = f'{case}{case_load_name}{sht_txt}'[0:31]
+                
+                # Post data table to Excel (or its CSV file)
+                if wb is None:
+                    result = Post2Csv(Study_Results_dir, tab_name, sht_txt, xl_hdr, obj_data)
+                else:
+                    result = Post2Excel(tab_name, sht_txt, xl_hdr, obj_data, fmt_lst, wb)
+                if result[0:2] != ['', '']:
+                    return [result[0], result[1], True]
+            return ['', '', False]
+        
+        # Load levels in pool processes; not from inside a pool process (parallel seasons)
+        import multiprocessing
+        parallel_levels = season_data.get('parallel_levels', False) and not multiprocessing.current_process().daemon
+        if season_data.get('parallel_levels', False) and not parallel_levels:
+            logger.log(logging.WARNING, f'Load levels run one at a time inside a parallel season process.', extra = extra)
+        
+        if parallel_levels:
+            extra = {'qThreadName': f'Scale base case and solve powerflow in parallel processes.  Case: "{case}"'}
+            logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+            if season_data.get('level_reset', 'reopen') in ['snapshot', 'sweep']:
+                # Each pool task starts from a closed case, so there is no state to keep
+                logger.log(logging.WARNING, f'{season_data["level_reset"].capitalize()} reset is not used with parallel load levels; each level opens its own copy.', extra = extra)
+            import functools
+            import Multiprocess_Functions
+            Multiprocess_Functions.logger = logger
+            from Multiprocess_Functions import pool_supervisor
+            from Powerworld_Functions import simulator_call, simulator_process_setup
+            from General_Functions import Cancel_Token
+            
+            # Each level opens its own copy of the base case
+            level_cases = [[run_load_level, [dict(__e, copy_base = True)]] for __e in levels_data]
+            # Stops the remaining levels after a failed level; the study's Pause
+            #   and Cancel reach the pool through it
+            level_token = Cancel_Token(cancel_token)
+            # First failed level [err, action]
+            level_errors = []
+            def release_level(level_idx, level_result):
+                if len(level_errors) > 0:
+                    return
+                result = post_level(level_idx, level_result)
+                if result[2]:
+                    level_errors.append(result[0:2])
+                    level_token.cancel()
+                elif cancel_token is not None and cancel_token.is_cancelled():
+                    level_errors.append([f'Study cancelled after load level "{levels_data[level_idx]["case_load_name"]}".', 'Cancelled'])
+            
+            result = pool_supervisor(simulator_call, level_cases, season_data.get('level_processes', 'auto'),
+                                     process_setup = functools.partial(simulator_process_setup, season_data.get('use_stub_simulator', False), season_data.get('simulator_options', None), season_data.get('cache_reads', False)),
+                                     cancel_token = level_token, ordered_callback = release_level)
+            if result[1] == 'Exception':
+                level_errors.append([f'Pool supervisor failed. Result = {result[0]}', 'Study Stopped'])
+            elif len(level_errors) == 0 and cancel_token is not None and cancel_token.is_cancelled():
+                level_errors.append(['Study cancelled before all load levels ran.', 'Cancelled'])
+            if len(level_errors) > 0:
+                err, action = level_errors[0]
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                save_results()
+                return[err, action, True]
+        
+        else:
+            # Snapshot reset: open and prepare the base case once, save its state,
+            #   and restore that state for each level instead of reopening the case
+            # Sweep: as snapshot, but the levels are run from the base case outward
+            #   and each level is scaled from the previous level's solved case, so
+            #   each solve starts close to its answer.  The base state is restored
+            #   only when the sweep turns around.
+            level_reset = season_data.get('level_reset', 'reopen')
+            level_order = list(range(len(levels_data)))
+            if level_reset in ['snapshot', 'sweep']:
+                extra = {'qThreadName': f'Prepare base case snapshot.  Case: "{case}"'}
+                logger.log(logging.INFO, f'Opening: {study_file}', extra = extra)
+                result = pw_com_object.OpenCase(study_file)    #open case
+                if result[0] != '':
+                    err = f'Error loading case. {study_file}. result = {result[0]}.'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, True]
+                
+                result = sync_filters(filters_data, pw_com_object)
+                if result[0:2] != ['', '']:
+                    err = f'Failed to create one or more advanced filters. Result = {result[2]}'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, True]
+                
+                logger.log(logging.DEBUG, f'Saving base case state.', extra = extra)
+                result = pw_com_object.SaveState()
+                if result[0] != '':
+                    err = f'Cannot save base case state. error = {result[0]}'
+                    action = 'Case Stopped'
+                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, True]
+                levels_data = [dict(__e, snapshot = True) for __e in levels_data]
+            
+            if level_reset == 'sweep':
+                # Up from the base case, then down from it
+                up_idxs = sorted([__i for __i, __e in enumerate(levels_data) if __e['load_level'] >= 0], key = lambda __i: levels_data[__i]['load_level'])
+                down_idxs = sorted([__i for __i, __e in enumerate(levels_data) if __e['load_level'] < 0], key = lambda __i: -levels_data[__i]['load_level'])
+                level_order = up_idxs + down_idxs
+                for level_idx in level_order:
+                    # The first level of each direction restores the base state
+                    if level_idx not in up_idxs[0:1] + down_idxs[0:1]:
+                        levels_data[level_idx]['warm_start'] = True
+                logger.log(logging.DATA, f'Sweep order = {[levels_data[__i]["case_load_name"] for __i in level_order]}', extra = extra)
+            
+            # Levels are posted in level order, whatever order they run in
+            level_errors = []
+            def release_level(level_idx, level_result):
+                if len(level_errors) > 0:
+                    return
+                result = post_level(level_idx, level_result)
+                if result[2]:
+                    level_errors.append(result[0:2])
+            from Multiprocess_Functions import Reorder_Buffer
+            level_buffer = Reorder_Buffer(release_level)
+            
+            for level_idx in level_order:
+                level_data = levels_data[level_idx]
+                case_load_name = level_data['case_load_name']
+                extra = {'qThreadName': f'Scale base case and solve powerflow.  Case: "{case_load_name}"'}
+                # Waits here while paused.  Load levels already run are posted and kept.
+                if cancel_token is not None and cancel_token.checkpoint():
+                    err = f'Study cancelled before load level "{case_load_name}".'
+                    action = 'Cancelled'
+                    logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+                    level_buffer.flush()
+                    save_results()
+                    pw_com_object.CloseCase()
+                    return[err, action, True]
+                
+                result = run_load_level(pw_com_object, level_data)
+                if result[0:2] != ['', '']:
+                    pw_com_object.CloseCase()
+                    return[result[0], result[1], True]
+                level_buffer.add(level_idx, result)
+                if len(level_errors) > 0:
+                    pw_com_object.CloseCase()
+                    return[level_errors[0][0], level_errors[0][1], True]
+#                    s_exit(err)
+#                wb.save()
+                # Debug exit
+                if False:
+                    if False:
+                        # Debug Continue
+                        err = f'Debug continue active.'
+                        action = 'Case Stopped'
+                        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                        continue
+                    if False:
+                        # Debug Break
+                        err = f'Debug break active.'
+                        action = 'Case Stopped'
+                        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                        break
+                    err = f'Debug exit active.'
+                    action = 'Study Stopped'
+                    logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action, True]
+#                    s_exit(err)
+            
+            if level_reset in ['snapshot', 'sweep']:
+                pw_com_object.CloseCase()
+        
+        '''
+        ***********************************************************************************************************************************************
+        Prepare HS-Curve worksheet
+        ***********************************************************************************************************************************************
+        '''
+        extra = {'qThreadName': 'Prepare HS-Curve worksheet.'}
+        logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+        
+        if wb is None:
+            # The curve is Excel formulas over the level sheets; nothing to write for CSV results
+            logger.log(logging.INFO, f'No Curve sheet for CSV results.', extra = extra)
+            import multiprocessing
+            if multiprocessing.current_process().daemon and solve_engine is not None:
+                solve_engine.log_summary(logging.SUBINFO)
+            return ['', '', False]
+        
+        #find or create the HS-Curve worksheet
+        if 'Curve' in [__e.name for __e in wb.sheets]:
+            sht = wb.sheets['Curve']  #sets the active sheet to tab_name if the sheet name exists
+            logger.log(logging.INFO, f'Found Curve Sheet', extra = extra)
+        else:
+            sht = wb.sheets.add('Curve') #adds a sheet named tab_name if the sheet does not already exist
+            logger.log(logging.INFO, f'Added Curve Sheet', extra = extra)
+        
+        #move Curve sheet to first sheet in workbook
+        sht.api.Move(Before = wb.sheets[0].api)
+        
+        # fill Curve formulas
+        sht.range(1, 1).value = ['','stuff','Losses','','%']
+        for idx, case_load_name in enumerate(case_load_names):
+            
+            sht.range(12-idx, 1).value = [case_load_name,
+                                               "=Censored calcs",
+                                               "=Censored calcs",
+                                               '',
+                                               f'=C{12-idx}/B{12-idx}']
+    
+        sht.range(14, 1).value = ['','','','Average','=AVERAGE(E2:E11)']
+        sht.range('B:D').number_format = '0.00'
+        sht.range('E:E').number_format = '0.00%'
+        sht.range('A:A').api.ColumnWidth = 16.0
+        sht.range('B:E').api.ColumnWidth = 9.0
+        
+        #save the workbook for this study
+        wb.save()
+        
+        import multiprocessing
+        if multiprocessing.current_process().daemon and solve_engine is not None:
+            # Parallel season: this process's solves
+            solve_engine.log_summary(logging.SUBINFO)
+        
+        return ['', '', False]
+    
+    except Exception as e:
+        err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
+        action = 'Exception'
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        pw_com_object.CloseCase()
+        return [err, action, True]
+
+
+def worker1_function(worker1_data_dict):
+    extra = {"qThreadName": 'def ' + cf().f_code.co_name}
+    
+    '''****************************************************************************
+    *******************************************************************************
+    ****                                                                       ****
+    ****                                                                       ****
+    ****                           Import Block                                ****
+    ****                                                                       ****
+    ****                                                                       ****
+    *******************************************************************************
+    ****************************************************************************'''
+    
+    from datetime import datetime  # date and time functions
+    Starttime = datetime.now()
+    
+    print(f'\n\n{" "*0}********* Loading Libraries ************')
+    #import glob as gl
+    import os
+    from sys import exit as s_exit
+    #import math
+    #from operator import itemgetter  #Reference:  https://wiki.python.org/moin/HowTo/Sorting
+    #import sys
+    import logging
+    import pandas as pd
+    #from copy import deepcopy
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        # Not Windows: runs with a stand-in simulator (see "use_stub_simulator")
+        pass
+    #import csv
+    
+    global logging
+    global logger
+    logger = worker1_data_dict['logger']
+    # Simulator call profile ("profile_com_calls") and where it is saved
+    com_profiler = None
+    com_profile_file = None
+    # Session recording ("record_file")
+    simulator_recorder = None
+    # Read-through cache of simulator reads ("cache_reads")
+    query_cache = None
+    try:  # 'try', 'except', and 'finally' are an iteration structure for error handling
+        import Powerworld_Functions
+        Powerworld_Functions.logger = logger
+        from Powerworld_Functions import dispatch_simulator
+        # Returns the Powerworld case object, or a stub in its place where Simulator is not installed
+        # True for a stub, 'local' for the local stand-in simulator (synthetic network),
+        #   'replay' to play back the session recorded in "replay_file"
+        use_stub_simulator = worker1_data_dict.get('use_stub_simulator', False)
+        if type(use_stub_simulator) == str:
+            # Preload values are strings
+            use_stub_simulator = use_stub_simulator.strip().lower()
+            if use_stub_simulator not in ['local', 'replay']:
+                use_stub_simulator = 'true' in use_stub_simulator
+        simulator_options = worker1_data_dict.get('local_simulator_options', None)
+        if use_stub_simulator == 'replay':
+            simulator_options = {'replay_file': worker1_data_dict['replay_file'], 'replay_speed': worker1_data_dict.get('replay_speed', 'fast')}
+        result = dispatch_simulator(use_stub_simulator, simulator_options)
+        if result[0:2] != ['', '']:
+            err = f'Cannot start the simulator. {result[0]}'
+            action = 'Study Stopped'
+            logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+            return[err, action]
+        pw_com_object = result[2]
+        
+        # Record every simulator call and response for replay ("record_file")
+        if worker1_data_dict.get('record_file', '') not in ['', None]:
+            simulator_recorder = Powerworld_Functions.Recording_Simulator(pw_com_object, worker1_data_dict['record_file'])
+            pw_com_object = simulator_recorder
+        
+        # Time every simulator call, per method and per study stage
+        profile_com_calls = worker1_data_dict.get('profile_com_calls', False)
+        if type(profile_com_calls) == str:
+            profile_com_calls = 'true' in profile_com_calls.lower()
+        if profile_com_calls:
+            com_profiler = Powerworld_Functions.Com_Profiler(pw_com_object)
+            logger.addFilter(com_profiler.stage_filter)
+            pw_com_object = com_profiler
+        
+        # Answer repeated reads of the same solved state from memory (outermost,
+        #   so the profile and recording only hold calls that reach Simulator)
+        cache_reads = worker1_data_dict.get('cache_reads', True)
+        if type(cache_reads) == str:
+            cache_reads = 'true' in cache_reads.lower()
+        if cache_reads:
+            query_cache = Powerworld_Functions.Query_Cache(pw_com_object)
+            pw_com_object = query_cache
+    except Exception as e:
+        err = f'Exception (Loading Libraries) = {e}, {print_exception()}'
+        action = f'Exception'
+        logger.log(logging.CRITICAL, f'{err}\n{" "*0}*********** {action} ***********', extra = extra)
+        # End the program here
+#        s_exit("Cannot establish pw_com_object.  Exiting program")
+        #(f'{err}\n{" "*16}*********** {action} ***********')
+        # Signal main thread that the code is done
+#       self.progress_report.emit(['Exception', 'none', '0 of 0', 0, 'none', '0 of 0', 0])
+#       self.finished.emit()
+#       return
+        # There is no "pw_com_object" to run the study with
+        if simulator_recorder is not None:
+            simulator_recorder.close()
+        return[err, action]
+    
+    pd.set_option('display.max_columns', 25) # sets the max number of columns to display
+    pd.set_option('display.width', 1000) # sets the max number of chars per line
+    
+    '''
+    ****************************************************************************************
+    # A Powerflow study automation algorithm
+    ****************************************************************************************
+    '''
+    try:
+        ''' 
+        *************************
+        Settings block
+        *************************
         '''
         extra = {'qThreadName': 'Settings Block'}
         logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
@@ -967,6 +2180,59 @@ def worker1_function(worker1_data_dict):
 #        gui_active = worker1_data_dict['gui_active']
 #        use_multi_proc = worker1_data_dict['use_multi_proc']
 #        debug_options = worker1_data_dict['debug_options']
+        # When true, each season runs in its own process with its own simulator and Excel
+        parallel_seasons = worker1_data_dict.get('parallel_seasons', False)
+        if type(parallel_seasons) == str:
+            # Preload values are strings
+            parallel_seasons = 'true' in parallel_seasons.lower()
+        # When true, the load levels of a season run in pool processes.  Ignored
+        #   with parallel_seasons: the season processes are daemonic pool workers,
+        #   which can't start a pool of their own
+        parallel_levels = worker1_data_dict.get('parallel_levels', False)
+        if type(parallel_levels) == str:
+            parallel_levels = 'true' in parallel_levels.lower()
+        # A session recording (and its replay) is one ordered stream of calls, and
+        #   the COM profile is kept in this process, so with these the study's
+        #   calls are all made here
+        serial_reasons = []
+        if simulator_recorder is not None:
+            serial_reasons += ['record_file']
+        if use_stub_simulator == 'replay':
+            serial_reasons += ["use_stub_simulator 'replay'"]
+        if com_profiler is not None:
+            serial_reasons += ['profile_com_calls']
+        if parallel_seasons and len(serial_reasons) > 0:
+            logger.log(logging.WARNING, f'parallel_seasons is ignored with {" and ".join(serial_reasons)}; the seasons run one at a time', extra = extra)
+            parallel_seasons = False
+        if parallel_levels and len(serial_reasons) > 0:
+            logger.log(logging.WARNING, f'parallel_levels is ignored with {" and ".join(serial_reasons)}; the load levels run one at a time', extra = extra)
+            parallel_levels = False
+        level_processes = worker1_data_dict.get('level_processes', 'auto')
+        if type(level_processes) == str and level_processes.strip().isdigit():
+            level_processes = int(level_processes)
+        # 'reopen' opens the base case for each load level; 'snapshot' opens it once
+        #   and restores a saved state for each level; 'sweep' runs the levels from
+        #   the base case outward, each scaled from the previous solved level
+        level_reset = worker1_data_dict.get('level_reset', 'reopen').strip().lower()
+        # Solve engine settings ("Powerworld_Functions.Solve_Engine"), e.g.
+        #   {'mismatch_tolerance': 0.5, 'max_solves': 2, 'fallbacks': [['Flat start', 'ResetToFlatStart; SolvePowerFlow(RECTNEWT);']]}
+        global solve_options, solve_engine
+        solve_options = worker1_data_dict.get('solve_options', {})
+        if type(solve_options) == str:
+            # Preload values are strings
+            import ast
+            solve_options = ast.literal_eval(solve_options) if solve_options.strip() != '' else {}
+        solve_engine = None
+        # 'excel' posts each season to a results workbook (xlwings); 'csv' writes a
+        #   CSV file per table, so a study can run where Excel is not installed
+        results_format = worker1_data_dict.get('results_format', 'excel').strip().lower()
+        # Objects whose tables are read through a SaveData file export instead of
+        #   over COM (large tables), e.g. 'Branch' or ['Branch', 'Shunt']
+        export_objects = worker1_data_dict.get('export_objects', [])
+        if type(export_objects) == str:
+            export_objects = [__e.strip() for __e in export_objects.split(',') if __e.strip() != '']
+        # When called from the GUI, the Cancel and Pause buttons act through this token
+        cancel_token = worker1_data_dict.get('cancel_token', None)
         
         python_dir = os.getcwd()
         
@@ -1038,6 +2304,7 @@ def worker1_function(worker1_data_dict):
         
         #Set the directory name to save the full AC results
         Study_Results_dir = cwd + '\\Results\\'
+        com_profile_file = f'{Study_Results_dir}Com_Profile.json'
         
         # Close any orphan cases
         # This is a call to Powerworld to close the current open case.
@@ -1060,9 +2327,9 @@ def worker1_function(worker1_data_dict):
         else:
             logger.log(logging.INFO, f'Spring case not found:\n{" "*21}Case: {spring_case}\n{" "*21}Creating case from {summer_case}.', extra = extra)
             # Load HS case
-            logger.log(logging.DEBUG, f'Loading {spring_case}', extra = extra)
-            if os.path.isfile(spring_case):
-                result = pw_com_object.OpenCase(spring_case)
+            logger.log(logging.DEBUG, f'Loading {summer_case}', extra = extra)
+            if os.path.isfile(summer_case):
+                result = pw_com_object.OpenCase(summer_case)
                 if result[0] != '':
                     err = f'Error loading Summer case. Result = {result[0]}'
                     action = 'Study Stopped'
@@ -1071,7 +2338,7 @@ def worker1_function(worker1_data_dict):
                     return[err, action]
 #                    s_exit(err)
             else:
-                err = f'File not found: {spring_case}'
+                err = f'File not found: {summer_case}'
                 action = 'Study Stopped'
                 logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
                 pw_com_object.CloseCase()
@@ -1185,79 +2452,17 @@ def worker1_function(worker1_data_dict):
         
             # Adjust injection groups until either min gen or slack is balanced
             balance_inj_grps = ["Inj_Grp_1", "Inj_Grp_2"]
-            iteration = 0
             max_iterations = 5
-            balance_inj_grp_idx = 0
-            lim_txt = ''
-            # while max_iteration not exceeded
-            while iteration < max_iterations:
-                # increment counter
-                iteration += 0
-                balance_inj_grp = balance_inj_grps[balance_inj_grp_idx]
-                
-                # reduce (or increase) injection group by slack error (but respect MW limits), and do not go below zero
-                result = adjust_inj_grp_mw(balance_inj_grp, slack_error, pw_com_object, limit_min_to_zero = True)
-                if result[1] in ['Error', 'Exception']:
-                    err = f'Error adjusting {balance_inj_grp}.'
-                    action = 'Study Stopped'
-                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-    #                return [err, action, None, None]
-                    pw_com_object.CloseCase()
-                    s_exit(err)
-                elif result[1] in ['Warning']:
-                    if 'max' in result[0]:
-                        lim_txt = 'max'
-                    elif 'min' in result[0]:
-                        lim_txt = 'min'
-            
-                # Solve twice
-                logger.log(logging.INFO, f'Solving Powerflow', extra = extra)
-                result = solve_twice(extra, pw_com_object)
-                if result[0:2] != ['', '']:
-                    err = f'Error in solve_twice.'
-                    action = 'Study Stopped'
-                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                    pw_com_object.CloseCase()
-                    return[err, action]
-#                    s_exit(err)
-                
-                # Check current slack level, min gen level
-                logger.log(logging.INFO, f'Checking {slack_inj_grp} MW level, Min MW', extra = extra)
-                result = pw_com_object.GetParametersSingleElement('InjectionGroup', ['Name','MW', 'GenMWMin'], [slack_inj_grp, 0.0, 0.0])
-                if result[0] != '':
-                    err = f'Error gathering slack data. Result = {result[0]}'
-                    action = 'Study Stopped'
-                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                    pw_com_object.CloseCase()
-                    return[err, action]
-#                    s_exit(err)
-                
-                current_slack_mw = float(result[1][1])
-                current_slack_min_mw = float(result[1][1])
-                logger.log(logging.DATA, f'current_slack_mw = {current_slack_mw:.1f}, current_slack_min_mw = {current_slack_min_mw:.1f}', extra = extra)
-            
-                # Calculate slack error
-                slack_error = current_slack_mw - initial_slack_mw
-                logger.log(logging.DATA, f'slack_error = {slack_error:.1f}, max_slack_deviation = {max_slack_deviation:.1f}', extra = extra)
-                if abs(slack_error) <= max_slack_deviation:
-                    # If slack is close, exit loop
-                    logger.log(logging.DEBUG, f'Exiting slack balance loop on "Slack balanced"', extra = extra)
-                    break
-                
-                # Check current balance_inj_grp level, min gen level
-                if lim_txt == 'max' or lim_txt == 'min':
-                    if lim_txt == 'max':
-                        lim_sgn = -1
-                    else:
-                        lim_sgn = 1
-                    balance_inj_grp_idx += lim_sgn
-                    if (balance_inj_grp_idx >= len(balance_inj_grps)) or (balance_inj_grp_idx < 0):
-                        # if there are no more balance injection groups, exit loop
-                        logger.log(logging.DEBUG, f'Exiting slack balance loop on "All injection groups at {lim_txt} gen"', extra = extra)
-                        break
-            # End of slack balancing while loop
-            else:
-                # This will only execute if the while loop exits on iteration overflow
+            result = balance_slack(balance_inj_grps, slack_inj_grp, initial_slack_mw, slack_error, max_slack_deviation, pw_com_object, max_iterations = max_iterations)
+            balance_data = result[2]
+            logger.log(logging.DATA, f'Slack balancing used {balance_data["iterations"]} iterations and {balance_data["solves"]} solves', extra = extra)
+            if result[1] in ['Error', 'Exception']:
+                err = f'Error balancing slack. Result = {result[0]}'
+                action = 'Study Stopped'
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                pw_com_object.CloseCase()
+                return[err, action]
+            elif result[1] == 'Not Balanced':
                 err = f'Failed to balance slack after {max_iterations} iterations.'
                 action = 'Study Stopped'
                 logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
@@ -1274,6 +2479,11 @@ def worker1_function(worker1_data_dict):
                 pw_com_object.CloseCase()
                 return[err, action]
 #                s_exit(err)
+            elif result[1] == 'Warning':
+                # Every balance injection group is at a limit; the solved case is kept with the slack error left
+                logger.log(logging.WARNING, f'Spring case slack not balanced: {result[0]}', extra = extra)
+            current_slack_mw = balance_data['current_slack_mw']
+            current_slack_min_mw = balance_data['current_slack_min_mw']
                 
             if current_slack_mw < current_slack_min_mw:
                 err = f'Final Injection Group Slack level below InjGrp MinGen.  current_slack_mw = {current_slack_mw}, current_slack_min_mw = {current_slack_min_mw}'
@@ -1305,502 +2515,117 @@ def worker1_function(worker1_data_dict):
 #            s_exit(err)
         
         
-        extra = {'qThreadName': f'Run Cases'}
-        debug_ctr = 0
-        for case, initial_case in list(zip(save_casenames, initial_cases)):
+        # Settings used by "run_season" for every season
+        season_settings = {'cwd' : cwd,
+                           'G_prefix' : G_prefix,
+                           'filters_data' : filters_data,
+                           'case_inputs' : case_inputs,
+                           'case_load_names' : case_load_names,
+                           'saved_scaled_cases' : saved_scaled_cases,
+                           'Study_Results_dir' : Study_Results_dir,
+                           'cancel_token' : cancel_token,
+                           'parallel_levels' : parallel_levels,
+                           'level_processes' : level_processes,
+                           'level_reset' : level_reset,
+                           'solve_options' : solve_options,
+                           'export_objects' : export_objects,
+                           'results_format' : results_format,
+                           'use_stub_simulator' : use_stub_simulator,
+                           'simulator_options' : simulator_options,
+                           'cache_reads' : cache_reads}
+        
+        if parallel_seasons:
             '''
             ***********************************************************************************************************************************************
-            Develop base case from starting case
+            Run seasons in parallel processes
             ***********************************************************************************************************************************************
             '''
-            # Debug break after x runs
-            if False:
-                logger.log(logging.WARNING, f'Debug break active', extra = extra)
-                debug_ctr += 1
-                if debug_ctr > 1:
-                    break
-            
-            extra = {'qThreadName': f'Develop base case from starting case'}
+            extra = {'qThreadName': f'Run seasons in parallel processes'}
             logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
             
-            # Create a directory for the study, if it already exists, then use it
-            if os.path.exists(f'{case}'):
-                logger.log(logging.DEBUG, f'Directory for case files already exists; good.', extra = extra)
-            else:
-                logger.log(logging.INFO, f'Creating directory in working directory for case files: {case}', extra = extra)
-                os.mkdir(f'{case}')
-                
-            study_dir = cwd + '\\' + case
-            study_file = f'{study_dir}\\{case}_Base.pwb'
-            
-            # Load the Powerworld case file
-            logger.log(logging.DATA, f'case = {case}', extra = extra)
-            logger.log(logging.INFO, f'Opening: {initial_case}', extra = extra)
-            result = pw_com_object.OpenCase(initial_case)
-            if result[0] != '':
-                err = f'Error loading starting case {initial_case}. result = {result[0]}.'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                continue
-#                s_exit(err)
-            
-            # Create filters
-            result = create_filters(filters_data, pw_com_object)
-            if result[0:2] != ['', '']:
-                err = f'Failed to create one or more advanced filters. Result = {result[2]}'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                continue
-#                s_exit(err)
-        
-            # Some Dummy Powerworld calls
-            #  Use a script command to create an area abject within the case
-            logger.log(logging.INFO, f'Dummy Powerworld call #1.', extra = extra)
-            result = pw_com_object.RunScriptCommand(r'CreateData(Area, [Number, Name], ["02", "Another Area"]);')
-            if result[0] != '':
-                err = f'Error creating area 02. result = {result[0]}.'
-                action = 'Study Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                continue
-#                s_exit(err)
-        
-            # Use "GetParametersMultipleElement" to get some "Branch" object data from the case
-            logger.log(logging.INFO, f'Dummy Powerworld call #2.', extra = extra)
-            TerminalBus_ParamList = ["BusNumFrom", "BusNumTo"]
-            result = pw_com_object.GetParametersMultipleElement('Branch', TerminalBus_ParamList, f'{G_prefix}_Branches_filter_1')
-            if result[0] != '':
-                err = f'Error gathering bus data for elements in "Branches_filter_1". result = {result[0]}.'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                continue
-            Terminal_Bus = result[1]
+            # The seasons are independent, so each one runs in its own pool process
+            #   with its own simulator, Excel instance and results workbook.
+            # The cancel token can't be sent to another process.  The supervisor
+            #   holds back seasons that have not started; started seasons finish.
+            import functools
+            import Multiprocess_Functions
+            Multiprocess_Functions.logger = logger
+            from Multiprocess_Functions import pool_supervisor
+            from Powerworld_Functions import simulator_call
             
-            # Create Bus_List from contents of Terminal_Bus
-            Bus_List = [bus for buses in Terminal_Bus for bus in buses]
+            pw_com_object.CloseCase()
+            season_cases = []
+            for case, initial_case in list(zip(save_casenames, initial_cases)):
+                season_data = dict(season_settings, case = case, initial_case = initial_case, cancel_token = None)
+                season_cases += [[run_season, [season_data]]]
             
-    #        Bus_List = []
-    #        for x in range(len(Terminal_Bus[0])):
-    #            Bus_List.append(Terminal_Bus[0][x])
-    #            Bus_List.append(Terminal_Bus[1][x])
-                
-            logger.log(logging.DATA, f'len(Bus_List) = {len(Bus_List)}', extra = extra)
-            Bus_List = list(set(Bus_List)) # remove duplicates in Bus_list
-            logger.log(logging.DATA, f'len(Bus_List) = {len(Bus_List)}', extra = extra)
+            # Season results by season name
+            season_results = {}
+            def collect_season(season_idx, season_result):
+                season_results[save_casenames[season_idx]] = season_result
             
-            # Move all buses in Bus_List to area 02 in case
-            logger.log(logging.INFO, f'Adding buses to area 02.', extra = extra)
-            Bus_List = [[__e,'02'] for __e in Bus_List]
-            WriteBusAreaNum_ParamList = ["Number", "AreaNumber"]
-            result = pw_com_object.ChangeParametersMultipleElementRect("Bus", WriteBusAreaNum_ParamList, Bus_List)
-            if result[0] != '':
-                err = f'Error moving buses to area 02. result = {result[0]}.'
+            result = pool_supervisor(simulator_call, season_cases, len(season_cases),
+                                     process_setup = functools.partial(season_process_setup, use_stub_simulator, results_format, simulator_options, cache_reads),
+                                     cancel_token = cancel_token, ordered_callback = collect_season)
+            if result[1] == 'Exception':
+                err = f'Pool supervisor failed. Result = {result[0]}'
                 action = 'Study Stopped'
                 logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                return[err, action]
-#                s_exit(err)
-            
-            # make Area Gen injection groups for Area 01 and 02
-            # Another example of calling a script command
-            #  I sometimes create loops like this when running a similar algorithm
-            area_data = [1, "{G_prefix}_Area_01_Gens"],[2, "{G_prefix}_Area_02_Gens"]
-            for area_num, inj_grp_name in area_data:
-                logger.log(logging.INFO, f'Making area {area_num} gen injection group', extra = extra)
-                script_str = f'InjectionGroupCreate("{inj_grp_name}", GEN, MAX GEN MW, <DEVICE> Area "{area_num}",NO);'
-                result = pw_com_object.RunScriptCommand(script_str)
-                if result[0] != '':
-                    err = f'Error creating Gen Inj Grp for Area {area_num}. Result = {result[0]}.'
-                    action = 'Case Stopped'
-                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                    pw_com_object.CloseCase()
-                    return[err, action]
-#                    s_exit(err)
-            
-            # Save case as base in study directory
-            # DEBUG: Consider using save_case function
-            # I sometimes use a "DEBUG:" comment when there is something to improve or fix.
-            study_file = f'{study_dir}\\{case}_Base.pwb'
-            logger.log(logging.INFO, f'Saving case to {study_file}', extra = extra)
-            result = pw_com_object.RunScriptCommand('SaveCase("' + study_file + '");')
-            if result[0] != '':
-                err = f'Error saving base case: {study_file}.  Result = {result[0]}.'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                return[err, action]
-#                s_exit(err)
-            
-            # Debug save case
-            if False:
-                logger.log(logging.DEBUG, f'Saving pre ACE correction case.', extra = extra)
-                dir_name = f'{cwd}\\Error_Cases'
-                save_name = f'\\pre_ACE_correction_case_{case}_Base.pwb'
-                logger.log(logging.DEBUG, f'Calling save_pw_case.', extra = extra)
-                result = save_pw_case(dir_name, save_name, pw_com_object)
-                                    
-            logger.log(logging.INFO, f'Performing "Clear transaction table and auto-insert tieline transactions".', extra = extra)
-            result = pw_com_object.RunScriptCommand('AutoInsertTieLineTransactions;')
-            if result[0] != '':
-                err = f'Error resetting area transactions. Result = {result[0]}.'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                return[err, action]
-#                s_exit(err)
-            
-            # Debug save case
-            if False:
-                logger.log(logging.DEBUG, f'Saving post ACE correction case.', extra = extra)
-                dir_name = f'{cwd}\\Error_Cases'
-                save_name = f'\\post_ACE_correction_case_{case}_Base.pwb'
-                logger.log(logging.DEBUG, f'Calling save_pw_case.', extra = extra)
-                result = save_pw_case(dir_name, save_name, pw_com_object)
-            
-            # Debug exit
-            if False:
-                err = f'Debug exit active.'
-                action = 'Case Stopped'
-                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
                 return[err, action]
-#                s_exit(err)
-            
-            # Powerworld can make a copy of its current state in case something goes wrong
-            # Set a reference case
-            logger.log(logging.DEBUG, f'Saving reference state.', extra = extra)
-            result = pw_com_object.SaveState()
-            if result[0] != '':
-                err = f'Cannot save reference state. error = {result[0]}'
-                action = f'Warning only'
-                logger.log(logging.CRITICAL, f'{err}\n{" "*21}*********** {action} ***********', extra = extra)
             
-            # Solve case twice
-            # This is typically where things go wrong
-            logger.log(logging.INFO, f'Solving Powerflow', extra = extra)
-            result = solve_twice(extra, pw_com_object)
-            if result[0:2] != ['', '']:
-                err = f'Error in solve_twice.'
-                action = 'Case Skipped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                # Restore reference case
-                logger.log(logging.DEBUG, f'Restoring reference state.', extra = extra)
-                result = pw_com_object.LoadState()
-                if result[0] != '':
-                    err = f'Cannot restore saved case state. error = {result[0]}'
-                    action = f'Case Stopped'
-                    logger.log(logging.CRITICAL, f'{err}\n{" "*21}*********** {action} ***********', extra = extra)
+            # Merge the season status and errors
+            season_errors = []
+            for case in save_casenames:
+                season_result = season_results.get(case, None)
+                if season_result is None:
+                    logger.log(logging.WARNING, f'Season "{case}": not run', extra = extra)
+                elif season_result[0:2] == ['', '']:
+                    logger.log(logging.INFO, f'Season "{case}": done', extra = extra)
                 else:
-                    # Save an error case
-                    dir_name = f'{cwd}\\Error_Cases'
-                    save_name = f'\\Error_case_{case}_Base.pwb'
-                    logger.log(logging.DEBUG, f'Calling save_pw_case.', extra = extra)
-                    result = save_pw_case(dir_name, save_name, pw_com_object)
-                continue
-            
-            '''
-            #save case as base in study directory
-            study_file = f'{study_dir}\\{case}_Base.pwb'
-            '''
-            logger.log(logging.INFO, f'Saving case to ' + study_file, extra = extra)
-            result = pw_com_object.RunScriptCommand('SaveCase("' + study_file + '");')
-            if result[0] != '':
-                err = f'Error saving base case: {study_file}. Result = {result[0]}.'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
-                return[err, action]
-#                s_exit(err)
-            
-            # Gather Area Load MW for areas 01 and 02 in a single call to GetParametersMultipleElementRect
-            AreaLoad_ParamList = ['Number', 'LoadMW']
-            result = pw_com_object.GetParametersMultipleElementRect('Area', AreaLoad_ParamList, f'{G_prefix}_Area_01_or_02')
-            if result[0] != '':
-                logger.log(logging.ERROR, f'Error gathering Area load.  Skipping study')
-                err = f'Error gathering Area 01 load.  Result = {result[0]}.'
-                action = 'Case Stopped'
-                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
+                    logger.log(logging.ERROR, f'Season "{case}": {season_result[1]}. {season_result[0]}', extra = extra)
+                    season_errors += [f'{case}: {season_result[0]}']
+            if cancel_token is not None and cancel_token.is_cancelled():
+                err = f'Study cancelled.  Seasons finished: {[__e for __e in season_results if season_results[__e][0:2] == ["", ""]]}'
+                action = 'Cancelled'
+                logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
                 return[err, action]
-#                s_exit(err)
-            Area_loads = result[1]
-            Area_01_load = [float(__e[1]) for __e in Area_loads if '01' in __e[0]][0]
-            Area_02_load = [float(__e[1]) for __e in Area_loads if '02' in __e[0]][0]
-            logger.log(logging.DATA, f'Area_01_load = {Area_01_load:.1f}, Area_02_load = {Area_02_load:.1f}', extra = extra)
-            
-            logger.log(logging.INFO, f'Close Powerworld case', extra = extra)
-            pw_com_object.CloseCase()
-            
-            # Debug exit
-            # Sometimes I want to break or continue.                    
-            if False:
-                if False:
-                    # Debug Continue
-                    err = f'Debug continue active.'
-                    action = 'Case Stopped'
-                    logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                    continue
-                if False:
-                    # Debug Break
-                    err = f'Debug break active.'
-                    action = 'Case Loop Stopped'
-                    logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                    break
-                err = f'Debug exit active.'
-                action = 'Study Stopped'
-                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-    #            return [err, action, None, None]
-                pw_com_object.CloseCase()
-                s_exit(err)
-            
-            '''
-            ***********************************************************************************************************************************************
-            Prepare results directory and excel file
-            ***********************************************************************************************************************************************
-            '''
-            extra = {'qThreadName': f'Prepare results directory and excel file'}
-            logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
-            
-            # Create a directory for the study, if it already exists, then use it
-            if os.path.exists(f'{Study_Results_dir}'):
-                logger.log(logging.DEBUG, f'Directory for results files already exists; good.', extra = extra)
-            else:
-                logger.log(logging.INFO, f'Creating directory in working directory for results files: {Study_Results_dir}', extra = extra)
-                os.mkdir(f'{Study_Results_dir}')
-            
-            # Set the file name for the current Study results excel file
-            Study_Results = f'{Study_Results_dir}{case}_Study_Results.xlsx'
-            logger.log(logging.DATA, f'Study_Results = {Study_Results}', extra = extra)
-            # look for an existing excel file.  If it exists open it, otherwise create it
-            if os.path.isfile(Study_Results):
-                #open it
-                wb = xw.Book(Study_Results)
-                logger.log(logging.DEBUG, f'opened', extra = extra)
-            else:
-                # create a new workbook, delete the extra sheet, and rename the first sheet to the current study, then save it
-                wb = xw.Book()
-                wb.sheets[0].name = 'Curve'
-                wb.save(Study_Results)
-                logger.log(logging.DEBUG, f'Results worksheet created.', extra = extra)
-            wb.activate()
-            
-            # Debug exit
-            if False:
-                if False:
-                    # Debug Continue
-                    err = f'Debug continue active.'
-                    action = 'Case Stopped'
-                    logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                    continue
-                if False:
-                    # Debug Break
-                    err = f'Debug break active.'
-                    action = 'Case Stopped'
-                    logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                    break
-                err = f'Debug exit active.'
+            if len(season_errors) > 0:
+                err = f'{len(season_errors)} of {len(save_casenames)} seasons failed. ' + ' '.join(season_errors)
                 action = 'Study Stopped'
-                logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                pw_com_object.CloseCase()
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
                 return[err, action]
-#                s_exit(err)
-            #load each load level including base case level
-            
-            '''
-            ***********************************************************************************************************************************************
-            Scale base case and solve powerflow
-            ***********************************************************************************************************************************************
-            '''
-            for load_level, case_load_name in case_inputs:
-                extra = {'qThreadName': f'Scale base case and solve powerflow.  Case: "{case_load_name}"'}
-                logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
-                        
-                #Load the Powerworld case file
-                logger.log(logging.INFO, f'Opening: {study_file}', extra = extra)
-                result = pw_com_object.OpenCase(study_file)    #open case
-                if result[0] != '':
-                    err = f'Error loading case. {study_file}. result = {result[0]}.'
-                    action = 'Case Stopped'
-                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                    pw_com_object.CloseCase()
-                    return[err, action]
-#                    s_exit(err)
-                
-                result = create_filters(filters_data, pw_com_object)
-                if result[0:2] != ['', '']:
-                    err = f'Failed to create one or more advanced filters. Result = {result[2]}'
-                    action = 'Case Stopped'
-                    logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                    pw_com_object.CloseCase()
-                    return[err, action]
-#                    s_exit(err)
-                
-                #scale load in areas
-                areas_data = [[1, Area_01_load], [2, Area_02_load]]
-                for area_num, area_load in areas_data:
-                    
-                    # Calculate new Area Load MW
-                    new_load = area_load + load_level
-                    
-                    # Call scale_area_load_mw
-                    logger.log(logging.INFO, f'Scaling Area {area_num} load from {area_load:.1f} to {new_load:.1f}', extra = extra)
-                    result = scale_area_load_mw(area_num, new_load, pw_com_object, enforce_agc = True)
-                    if result[0:2] != ['', '']:
-                        err = f'Error in scale_area_load_mw. Result = {result[0]}'
-                        action = 'Study Stopped'
-                        logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                        pw_com_object.CloseCase()
-                        return[err, action]
-#                        s_exit(err)
-                
-                    logger.log(logging.INFO, f'Solving Powerflow', extra = extra)
-                    result = solve_twice(extra, pw_com_object)
-                    if result[0:2] != ['', '']:
-                        err = f'Error in solve_twice.'
-                        action = 'Case Stopped'
-                        logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                        pw_com_object.CloseCase()
-                        return[err, action]
-#                        s_exit(err)
-                
-                if (saved_scaled_cases == True):
-                    result = pw_com_object.RunScriptCommand(r'SaveCase("' + study_dir + '\\' + case + case_load_name + '.pwb", PWB);')
-                if result[0] != '':
-                    logger.log(logging.ERROR, f'Error saving scaled case: ' + study_dir + '\\' + case + case_load_name + '.pwb')
-                
+        
+        else:
+            extra = {'qThreadName': f'Run Cases'}
+            debug_ctr = 0
+            for case, initial_case in list(zip(save_casenames, initial_cases)):
                 '''
                 ***********************************************************************************************************************************************
-                Post Data for scaled case
+                Develop base case from starting case
                 ***********************************************************************************************************************************************
                 '''
-                extra = {'qThreadName': 'Post Data for scaled case'}
-                logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
-                
-                #set Excel header names for Full AC ATC results
-                Shunt_xl_hdr = ["Number of Bus", "Name of Bus", "ID", "Reg Bus Num", "Reg Bus Name", "Status", "Control Mode", "Regulates", "Nominal Mvar", "Actual Mvar", "Owner Number  1"]
-                Branch_xl_hdr = ["From Number", "From Name", "From Area Name", "From Nom kV", "To Number", "To Name", "To Nom kV", "Circuit", "Status", "Xfrmr", "MW From", "MW To", "MW Loss", "Owner Name  1", "Owner Number  1", "Value", "Final Losses"]
-                AreaTieLine_xl_hdr = ["Tie Type", "Near Area Name", "Near Number", "Near Name", "Far Area Name", "Far Number", "Far Name", "Ckt", "Meter MW", "Imports", "Exports"]
-                Areas_xl_hdr = ["Area Num", "Area Name", "AGC Status", "Inj Grp Slack Name", "Gen MW", "Load MW", "Shunt MW", "Tot Sched MW","Int MW","ACE MW","Lambda","Loss MW"]
-                    
-                Shunt_ParamList = ["BusNum", "BusName", "ID", "RegBusNum", "RegName", "Status", "ShuntMode", "RegulationType", "MvarNom", "Mvar", "OwnerNum1"]
-                Branch_ParamList = ["BusNumFrom", "BusNameFrom", "AreaNameFrom", "NomkVFrom", "BusNumTo", "BusNameTo", "NomkVTo", "Circuit", "Status", "IsXF", "MWFrom", "MWTo", "LossMW", "OwnerName1", "OwnerNum1"]
-                AreaTieLine_ParamList = ["TieType", "AreaNameNear", "BusNumNear", "BusNameNear", "AreaNameFar", "BusNumFar", "BusNameFar", "Circuit", "MWMeter"]
-                Areas_ParamList = ["Number","Name", "AGC", "SlackInjectionGroup", "GenMW", "LoadMW", "ShuntMW", "ExportMWSched", "ExportMW", "ACE", "EconDispLambda", "LossMW"]
-                
-                obj_calcs_dict = {
-                        'Shunt': [],
-                        'Branch': ['=Censored Excel Calculation String',
-                                   '=P{row}*M{row}'],
-                        'AreaTieLine': ['=Censored Excel Calculation String', 
-                                        '=Censored Excel Calculation String'],
-                        'Area': []
-                        }
-                
-                
-                pw_call_data = [['Shunt', Shunt_ParamList, f'{G_prefix}_Shunts_Reactors_Active_Area_02', '_Reactors', Shunt_xl_hdr, [['I:J', '0']]], 
-                                ['Branch', Branch_ParamList, f'{G_prefix}_Branches_Owners_List', '_Losses', Branch_xl_hdr, [['K:L', '0'], ['M:M', '0.00'], ['Q:Q', '0.00']]], 
-                                ['AreaTieLine', AreaTieLine_ParamList, f'{G_prefix}_Tielines_Area_02', '_AreaTieLine', AreaTieLine_xl_hdr, [['I:K', '0']]], 
-                                ['Area', Areas_ParamList, f'{G_prefix}_Area_02', '_Area', Areas_xl_hdr, [['E:J', '0'], ['L:L', '0']]]]
+                # Waits here while paused.  Seasons already finished are saved.
+                if cancel_token is not None and cancel_token.checkpoint():
+                    err = f'Study cancelled before season "{case}".'
+                    action = 'Cancelled'
+                    logger.log(logging.WARNING, f'{err} \n *********** {action} ***********', extra = extra)
+                    pw_com_object.CloseCase()
+                    return[err, action]
                 
-                # Get/post object data loop
-                for obj, params, pw_filt, sht_txt, xl_hdr, fmt_lst in pw_call_data:
-                    # Gather the object data
-                    logger.log(logging.INFO, f'Gathering {obj.lower()} data.', extra = extra)
-                    result = pw_com_object.GetParametersMultipleElementRect(obj, params, pw_filt)
-                    if result[0] != '':
-                        err = f'Error reading {obj.lower()} data. {initial_case}. result = {result[0]}.'
-                        action = 'Case Stopped'
-                        logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
-                        pw_com_object.CloseCase()
-                        continue
-                    # translate result[1] from tuple of tuples into list of lists
-                    obj_data = [[__e for __e in __f] for __f in result[1]]
-                    
-                    if obj_calcs_dict[obj] != []:
-                        # Create Excel calculation strings for each data element
-                        calc_rows = []
-                        for row in range(len(obj_data)):
-                            calc_row = []
-                            for calc in obj_calcs_dict[obj]:
-                                calc_row += [calc.replace('{row}', f'{row + 3}')]
-                            calc_rows += [calc_row]
-                    
-                        # Add required calcs for each data element
-                        obj_data = [__e + calc_rows[__i] for __i, __e in enumerate(obj_data)]
-                    
-                    # Develop tab name
-                    tab_name = f'{case}{case_load_name}{sht_txt}'[0:31]
-                    
-                    # Post data table to Excel
-                    result2 = Post2Excel(tab_name, sht_txt, xl_hdr, obj_data, fmt_lst, wb)
-                    if result2[0:2] != ['', '']:
-                        err = result[0]
-                        pw_com_object.CloseCase()
-                        return[err, action]
-#                        s_exit(err)
-    #            wb.save()
-                # Debug exit
+                # Debug break after x runs
                 if False:
-                    if False:
-                        # Debug Continue
-                        err = f'Debug continue active.'
-                        action = 'Case Stopped'
-                        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                        continue
-                    if False:
-                        # Debug Break
-                        err = f'Debug break active.'
-                        action = 'Case Stopped'
-                        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+                    logger.log(logging.WARNING, f'Debug break active', extra = extra)
+                    debug_ctr += 1
+                    if debug_ctr > 1:
                         break
-                    err = f'Debug exit active.'
-                    action = 'Study Stopped'
-                    logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
-                    pw_com_object.CloseCase()
-                    return[err, action]
-#                    s_exit(err)
-            
-            '''
-            ***********************************************************************************************************************************************
-            Prepare HS-Curve worksheet
-            ***********************************************************************************************************************************************
-            '''
-            extra = {'qThreadName': 'Prepare HS-Curve worksheet.'}
-            logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
-            
-            #find or create the HS-Curve worksheet
-            if 'Curve' in [xw.sheets[i].name for i in wb.sheets]:
-                sht = xw.sheets[[i.name for i in wb.sheets].index('Curve')]  #sets the active sheet to tab_name if the sheet name exists
-                logger.log(logging.INFO, f'Found Curve Sheet', extra = extra)
-            else:
-                sht = wb.sheets.add('Curve') #adds a sheet named tab_name if the sheet does not already exist
-                logger.log(logging.INFO, f'Added Curve Sheet', extra = extra)
-            
-            #move Curve sheet to first sheet in workbook
-            sht.api.Move(Before = xw.sheets[0].api)
-            
-            # fill Curve formulas
-            debug_ctr = 0
-            sht.range(1, 1).value = ['','stuff','Losses','','%']
-            for idx, case_load_name in enumerate(case_load_names):
                 
-                sht.range(12-idx, 1).value = [case_load_name,
-                                                   "=Censored calcs",
-                                                   "=Censored calcs",
-                                                   '',
-                                                   f'=C{12-idx}/B{12-idx}']
-        
-            sht.range(14, 1).value = ['','','','Average','=AVERAGE(E2:E11)']
-            sht.range('B:D').number_format = '0.00'
-            sht.range('E:E').number_format = '0.00%'
-            sht.range('A:A').api.ColumnWidth = 16.0
-            sht.range('B:E').api.ColumnWidth = 9.0
-            
-            #save the workbook for this study
-            wb.save()
+                result = run_season(pw_com_object, dict(season_settings, case = case, initial_case = initial_case))
+                if result[2]:
+                    return[result[0], result[1]]
+        
+        # Solves made in this process
+        if solve_engine is not None:
+            solve_engine.log_summary()
         '''
         #wb.close()
         wb.app.quit
@@ -1826,6 +2651,21 @@ def worker1_function(worker1_data_dict):
         return[err, action]
 #        s_exit(err)
     
+    finally:
+        if query_cache is not None:
+            query_cache.log_summary()
+        if simulator_recorder is not None:
+            simulator_recorder.close()
+            logger.log(logging.INFO, f'Recorded {simulator_recorder.num_calls} simulator calls to {simulator_recorder.session_file}', extra = extra)
+        if com_profiler is not None:
+            # Profile of the simulator calls made in this process
+            logger.removeFilter(com_profiler.stage_filter)
+            com_profiler.log_summary()
+            if com_profile_file is not None and os.path.isdir(os.path.dirname(com_profile_file)):
+                result = com_profiler.save(com_profile_file)
+                if result[0:2] != ['', '']:
+                    logger.log(logging.WARNING, f'{result[0]} \n *********** {result[1]} ***********', extra = extra)
+    
 def setup_logging():
     import logging
     '''****************************************************************************
@@ -1978,6 +2818,20 @@ def main():
                         'saved_scaled_cases' : True, # When true, saves all of the load deviation cases used in the study
                         'gui_active' : True, # True when the function is called from a GUI (enables progress reporting emits)
                         'use_multi_proc' : False, # When true, and the option is programmed, the function will use a multiprocessing pool to complete studies faster
+                        'use_stub_simulator' : False, # When true, a stub stands in for Simulator (for testing where Simulator is not installed); 'local' for the local stand-in simulator
+                        'record_file' : '', # When set, every simulator call and response is recorded to this file (.gz to compress)
+                        'replay_file' : '', # Session to play back when use_stub_simulator is 'replay'
+                        'replay_speed' : 'fast', # 'fast' or 'recorded'
+                        'local_simulator_options' : {'buses_per_area' : 50, 'latency' : {'OpenCase' : 0.5, 'SolvePowerFlow' : 0.2}}, # Local stand-in network size and call latency (seconds)
+                        'parallel_seasons' : False, # When true, each season runs in its own process (ignored with record_file, replay or profile_com_calls)
+                        'parallel_levels' : False, # When true, the load levels of a season run in pool processes (ignored with parallel_seasons, whose daemonic pool processes can't start a pool, and with record_file, replay or profile_com_calls)
+                        'level_processes' : 'auto', # Number of processes for the load levels
+                        'solve_options' : {'mismatch_tolerance' : 0.5, 'max_solves' : 2}, # Solve engine settings
+                        'results_format' : 'excel', # 'excel' for a results workbook per season, 'csv' for CSV files (no Excel needed)
+                        'export_objects' : [], # Objects read through a file export instead of over COM, e.g. ['Branch']
+                        'cache_reads' : True, # When true, reads within one solved state are merged and answered from memory (4 instead of 6 reads per balance_slack iteration)
+                        'profile_com_calls' : False, # When true, simulator calls are timed and a profile is saved with the results
+                        'level_reset' : 'snapshot', # 'reopen', 'snapshot' or 'sweep': how each load level gets back to the base case
                         'debug_options' : [False, False, False, False, False, False, False, False, False, False, False, False, False, False, False],  # Debug option flags potentially used in the case.
                         'logger' : logger
                         }
@@ -336,6 +336,9 @@ class Worker(QObject):
                 
                 # Signal main thread that the code is done
                 emit_txt = 'Finished'
+                cancel_token = self.worker_data_dict.get('cancel_token', None)
+                if cancel_token is not None and cancel_token.is_cancelled():
+                    emit_txt = 'Cancelled'
                 self.progress_report.emit([emit_txt, 'none', '0 of 0', 0, 'none', '0 of 0', 0])
                 self.finished.emit()
                 return
@@ -370,14 +373,24 @@ class Worker(QObject):
         try:
                 
             from Template_Multiprocess_Function_v0 import worker2_function
+            
+            # The pool supervisor streams per-case completions back through
+            #   this callback.  The signal is queued to the main thread, so
+            #   the GUI stays responsive while the pool runs.
+            worker_data_dict = dict(self.worker_data_dict)
+            worker_data_dict['progress_callback'] = self.progress_report.emit
                 
             # Call the worker function
-            result = worker2_function(self.worker_data_dict)
+            result = worker2_function(worker_data_dict)
                 
             logger.log(logging.DEBUG, f'Completed: worker1_function.  Result: {result}', extra=extra)
                 
             # Signal main thread that the code is done
-            self.progress_report.emit(['Finished', 'none', '0 of 0', 0, 'none', '0 of 0', 0])
+            emit_txt = 'Finished'
+            cancel_token = worker_data_dict.get('cancel_token', None)
+            if cancel_token is not None and cancel_token.is_cancelled():
+                emit_txt = 'Cancelled'
+            self.progress_report.emit([emit_txt, 'none', '0 of 0', 0, 'none', '0 of 0', 0])
             self.finished.emit()
         
         except Exception as e:
@@ -446,6 +459,20 @@ class My_Application(QMainWindow, Ui_My_App_Window):
                         'saved_scaled_cases' : True,
                         'gui_active' : True,
                         'use_multi_proc' : False,
+                        'use_stub_simulator' : False,
+                        'record_file' : '',
+                        'replay_file' : '',
+                        'replay_speed' : 'fast',
+                        'local_simulator_options' : {'buses_per_area' : 50, 'latency' : {'OpenCase' : 0.5, 'SolvePowerFlow' : 0.2}},
+                        'parallel_seasons' : False,
+                        'parallel_levels' : False,
+                        'level_processes' : 'auto',
+                        'level_reset' : 'snapshot',
+                        'profile_com_calls' : False,
+                        'results_format' : 'excel',
+                        'export_objects' : [],
+                        'cache_reads' : True,
+                        'solve_options' : {'mismatch_tolerance' : 0.5, 'max_solves' : 2},
                         'debug_options' : [False, False, False, False, False, False, False, False, False, False, False, False, False, False, False],
                         'logger' : None
                         }
@@ -453,7 +480,13 @@ class My_Application(QMainWindow, Ui_My_App_Window):
     worker2_data_dict = {
                         'start_level' : 100000000,
                         'number_cases' : 10,
-                        'use_multi_proc' : False, # When true, and the option is programmed, the function will use a multiprocessing pool to complete studies faster
+                        'use_multi_proc' : False, # When true, and the option is programmed, the function will use a multiprocessing pool to complete studies faster (the warm pool starts on the first run)
+                        'cores' : 'auto', # Pool size; 'auto' picks it from the machine's cores and RAM, or enter a number
+                        'pool_service' : None, # Warm pool created once by the application and leased to each run
+                        'journal_file' : './Results/worker2_case_journal.jsonl', # Completed cases are saved here as they finish ('' to disable)
+                        'resume' : False, # When true, cases already in the journal are not run again
+                        'runtime_history_file' : './Results/worker2_runtime_history.json', # Case runtimes used to run the longest cases first ('' to disable)
+                        'case_timeout' : 600, # Seconds a case may run in the pool before the pool is restarted without it (0 for no limit)
                         'debug_options' : [False, False, False, False, False, False, False, False, False, False, False, False, False, False, False],  # Debug option flags potentially used in the case.
                         'logger' : None
                         }
@@ -489,6 +522,9 @@ class My_Application(QMainWindow, Ui_My_App_Window):
             
             # a status indicator for the loop
             self.statuss = 0
+            # Cancel/pause token for the running worker (see "General_Functions.Cancel_Token")
+            self.cancel_token = None
+            self.worker_running = False
         except Exception as e:
             self.log_text.appendHtml(f"<div style='color: purple;'> CRITICAL Exception in Application init = {e} </div>")
             
@@ -617,10 +653,14 @@ class My_Application(QMainWindow, Ui_My_App_Window):
             self.checkbox2.stateChanged.connect(self.checkbox2_changed)
             self.worker2_button.clicked.connect(self.run_worker2)
             self.exit_button.clicked.connect(self.run_exit)
+            self.pause_button.toggled.connect(self.pause_worker)
+            self.cancel_button.clicked.connect(self.cancel_worker)
             self.percent.valueChanged.connect(self.percent_changed)
             
             self.worker1_button.setEnabled(True)
             self.worker2_button.setEnabled(True)
+            self.pause_button.setEnabled(False)
+            self.cancel_button.setEnabled(False)
             
         except Exception as e:
             logger.log(logging.CRITICAL, f'Exception in GUI init = {e}, {print_exception()}', extra = self.extra)
@@ -942,8 +982,13 @@ class My_Application(QMainWindow, Ui_My_App_Window):
             self.thread = QThread()
             # Give the thread a name
             self.thread.setObjectName('Loss_Factor_Study')
+            # A new token for each run lets the Cancel and Pause buttons reach the worker
+            from General_Functions import Cancel_Token
+            self.cancel_token = Cancel_Token()
+            worker_data_dict = dict(self.worker1_data_dict)
+            worker_data_dict['cancel_token'] = self.cancel_token
             # Create a worker object by calling the "Worker" class defined above
-            self.worker = Worker(self.worker1_data_dict)
+            self.worker = Worker(worker_data_dict)
             # Move worker to the thread just created
             self.worker.moveToThread(self.thread)
             
@@ -978,6 +1023,9 @@ class My_Application(QMainWindow, Ui_My_App_Window):
             # when the thread has finished
             self.thread.finished.connect(lambda: self.worker1_button.setEnabled(True))
             self.thread.finished.connect(lambda: self.worker2_button.setEnabled(True))
+            # Pause and Cancel are only available while the worker runs
+            self.start_run_controls()
+            self.thread.finished.connect(self.stop_run_controls)
             # sets the stepLabel text when the thread has finished
             #self.thread.finished.connect(lambda: self.stepLabel.setText("Long-Running Step: 0"))
             
@@ -991,8 +1039,26 @@ class My_Application(QMainWindow, Ui_My_App_Window):
             self.thread = QThread()
             # Give the thread a name
             self.thread.setObjectName('Create_Cases_Thread')
+            # A new token for each run lets the Cancel and Pause buttons reach the worker
+            from General_Functions import Cancel_Token
+            self.cancel_token = Cancel_Token()
+            # Multiprocessing is opt in ("use_multi_proc").  The warm pool is started on
+            #   the first run that uses it and kept for the later runs.  The worker
+            #   module is imported by each pool process when it starts.
+            use_multi_proc = self.worker2_data_dict['use_multi_proc']
+            if type(use_multi_proc) == str:
+                # Preload values are strings
+                use_multi_proc = 'true' in use_multi_proc.lower()
+            self.worker2_data_dict['use_multi_proc'] = use_multi_proc
+            if use_multi_proc and self.worker2_data_dict['pool_service'] is None:
+                import Multiprocess_Functions
+                Multiprocess_Functions.logger = logger
+                from Multiprocess_Functions import get_pool_service
+                self.worker2_data_dict['pool_service'] = get_pool_service(logger, preload_modules = ['Template_Multiprocess_Function_v0'])
+            worker_data_dict = dict(self.worker2_data_dict)
+            worker_data_dict['cancel_token'] = self.cancel_token
             # Create a worker object by calling the "Worker" class defined above
-            self.worker = Worker(self.worker2_data_dict)
+            self.worker = Worker(worker_data_dict)
             # Move worker to the thread just created
             self.worker.moveToThread(self.thread)
             
@@ -1027,12 +1093,60 @@ class My_Application(QMainWindow, Ui_My_App_Window):
             # when the thread has finished
             self.thread.finished.connect(lambda: self.worker1_button.setEnabled(True))
             self.thread.finished.connect(lambda: self.worker2_button.setEnabled(True))
+            # Pause and Cancel are only available while the worker runs
+            self.start_run_controls()
+            self.thread.finished.connect(self.stop_run_controls)
             # sets the stepLabel text when the thread has finished
             #self.thread.finished.connect(lambda: self.stepLabel.setText("Long-Running Step: 0"))
                 
         except Exception as e:
             logger.log(logging.ERROR, f'Exception in run_worker2 = {e}, {print_exception()}', extra = self.extra)
         
+    # Turn the Pause and Cancel buttons on while a worker runs
+    def start_run_controls(self):
+        self.pause_button.setChecked(False)
+        self.pause_button.setText('Pause')
+        self.pause_button.setEnabled(True)
+        self.cancel_button.setEnabled(True)
+        self.worker_running = True
+        
+    # Turn the Pause and Cancel buttons off when the worker thread finishes
+    def stop_run_controls(self):
+        self.pause_button.setChecked(False)
+        self.pause_button.setText('Pause')
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        self.worker_running = False
+        
+    # The worker stops at its next check between cases or load levels.
+    #   Finished cases are kept.
+    def cancel_worker(self):
+        try:
+            if self.cancel_token is not None:
+                logger.log(logging.WARNING, 'Cancel requested.  The run will stop after the cases in progress.', extra = self.extra)
+                self.cancel_token.cancel()
+                self.pause_button.setEnabled(False)
+                self.cancel_button.setEnabled(False)
+                
+        except Exception as e:
+            logger.log(logging.ERROR, f'Exception in cancel_worker = {e}, {print_exception()}', extra = self.extra)
+        
+    # The worker waits at its next check between cases or load levels until resumed
+    def pause_worker(self, checked):
+        try:
+            if self.cancel_token is not None:
+                if checked:
+                    logger.log(logging.WARNING, 'Pause requested.  The run will wait after the cases in progress.', extra = self.extra)
+                    self.cancel_token.pause()
+                    self.pause_button.setText('Resume')
+                else:
+                    logger.log(logging.WARNING, 'Resuming.', extra = self.extra)
+                    self.cancel_token.resume()
+                    self.pause_button.setText('Pause')
+                
+        except Exception as e:
+            logger.log(logging.ERROR, f'Exception in pause_worker = {e}, {print_exception()}', extra = self.extra)
+        
     # Quits the event loop and closes the window when the Exit
     # button is pressed.
     def run_exit(self):
@@ -1043,12 +1157,26 @@ class My_Application(QMainWindow, Ui_My_App_Window):
         except Exception as e:
             logger.log(logging.ERROR, f'Exception in run_exit = {e}, {print_exception()}', extra = self.extra)
         
+    # Stop a running worker and shut down the warm pool when the window is closed
+    def closeEvent(self, event):
+        try:
+            self.force_quit()
+            from Multiprocess_Functions import shutdown_pool_service
+            shutdown_pool_service()
+            
+        except Exception as e:
+            logger.log(logging.ERROR, f'Exception in closeEvent = {e}, {print_exception()}', extra = self.extra)
+        event.accept()
+        
     def force_quit(self):
         try:
-            pass
-            # For use when the window is closed
-            #if self.worker_thread.isRunning():
-                #self.kill_thread()
+            # For use when the window is closed.  Cancel the running worker and
+            #   give it time to finish the cases in progress and close its files.
+            if self.worker_running and self.cancel_token is not None:
+                logger.log(logging.WARNING, 'Stopping the running worker before closing.', extra = self.extra)
+                self.cancel_token.cancel()
+                if not self.thread.wait(60000):
+                    logger.log(logging.ERROR, 'The worker did not stop within 60 seconds.', extra = self.extra)
                 
         except Exception as e:
             logger.log(logging.ERROR, f'Exception in force_quit = {e}, {print_exception()}', extra = self.extra)
@@ -1101,6 +1229,11 @@ def main():
 
 if __name__ == '__main__':      
     
+    # Needed for multiprocessing pools when the GUI is frozen into an
+    #   executable on Windows.  Does nothing otherwise.
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
     # creating a dummy variable ("m") to accept the 
     # object returned from "main" will prevent problems
     # with the kernal dying while running under Spyder.
@@ -196,10 +196,10 @@ def run_cases(case):
     extra = {"qThreadName": 'def ' + cf().f_code.co_name}
 
     try:
-        use_multi_proc = case[2]
-        if not use_multi_proc:
-            logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}', extra = extra)
-            logger.log(logging.DATA, f'case = {case}', extra = extra)
+        # When run in a pool, "logger" is set up by the pool supervisor to
+        #   forward records to the main process.
+        logger.log(logging.DEBUG, f'Starting {extra["qThreadName"]}', extra = extra)
+        logger.log(logging.DATA, f'case = {case}', extra = extra)
         
         import timeit
         # For an input of 100000000, the function takes about 10 seconds
@@ -219,8 +219,7 @@ def run_cases(case):
     except Exception as e:
         err = f'Exception ({extra["qThreadName"]}) = {e}, {print_exception()}'
         action = 'Exception'
-        if not use_multi_proc:
-            logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
+        logger.log(logging.CRITICAL, f'{err} \n *********** {action} ***********', extra = extra)
         return [err, action, []]
         
 
@@ -245,7 +244,7 @@ def worker2_function(worker2_data_dict):
 #    import glob as gl
 #    import os
 #    from sys import exit as s_exit
-    import multiprocessing
+#    import multiprocessing
 #    import xlwings as xw  # Loads a suite of functions to contol Excel from Python
 #    import math
 #    from operator import itemgetter  #Reference:  https://wiki.python.org/moin/HowTo/Sorting
@@ -298,6 +297,11 @@ def worker2_function(worker2_data_dict):
         use_multi_proc = worker2_data_dict['use_multi_proc']
 #        debug_options = worker2_data_dict['debug_options']
         logger = worker2_data_dict['logger']
+        # When called from the GUI, this is the worker's "progress_report.emit"
+        progress_callback = worker2_data_dict.get('progress_callback', None)
+        from Multiprocess_Functions import make_progress_report
+        # When called from the GUI, the Cancel and Pause buttons act through this token
+        cancel_token = worker2_data_dict.get('cancel_token', None)
         
         '''
         ***********************************************************************************************************************************************
@@ -314,7 +318,61 @@ def worker2_function(worker2_data_dict):
         cases_array = [[__e, start_level + __e, use_multi_proc] for __e in range(number_cases)]
         logger.log(logging.DATA, f'cases_array = {cases_array}', extra = extra)
         
+        # Runtimes from previous runs are used to run the longest cases first
+        runtime_history = None
+        runtime_history_file = worker2_data_dict.get('runtime_history_file', '')
+        if runtime_history_file:
+            import Multiprocess_Functions
+            Multiprocess_Functions.logger = logger
+            from Multiprocess_Functions import Runtime_History
+            # The runtime of a case depends on its level ("case[1]")
+            runtime_history = Runtime_History(runtime_history_file, key_params = lambda case: case[1], feature = lambda case: case[1])
+            runtime_history.load()
         
+        '''
+        ***********************************************************************************************************************************************
+        Open Case Journal
+        ***********************************************************************************************************************************************
+        '''
+        # Each completed case is written to the journal as soon as it finishes.
+        #   With "resume" set, cases already in the journal are not run again.
+        journal = None
+        journal_file = worker2_data_dict.get('journal_file', '')
+        if journal_file:
+            extra = {'qThreadName': 'Open Case Journal'}
+            logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
+            resume = worker2_data_dict.get('resume', False)
+            if type(resume) == str:
+                # Preload values are strings
+                resume = 'true' in resume.lower()
+            import Multiprocess_Functions
+            Multiprocess_Functions.logger = logger
+            from Multiprocess_Functions import Case_Journal
+            # "use_multi_proc" does not change a case result, so leave it out of the hash
+            journal = Case_Journal(journal_file, resume = resume, key_params = lambda case: case[0:2])
+            result = journal.open()
+            if result[0:2] != ['', '']:
+                err = f'Could not open the case journal {journal_file}. Result = {result[0]}'
+                action = 'Study Stopped'
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action]
+        
+        
+        
+        # The result lines are written as each case is released in case order,
+        #   while the later cases are still running
+        result_lines = []
+        result_sum = 0
+        def release_result(case_idx, result):
+            nonlocal result_sum
+            if result[0:2] != ['', '']:
+                # e.g. 'exception' or 'timed out'
+                line = result[1].lower()
+            else:
+                line = result[2][0]
+                result_sum += result[2][1]
+            result_lines.append(line)
+            logger.log(logging.SUBINFO, f'Case index {case_idx}: {line.strip()}', extra = extra)
         
         # How do I determine how many processors are available automatically?
         # Generally, I set this manually for my machine, setting the value to
@@ -328,27 +386,30 @@ def worker2_function(worker2_data_dict):
             '''
             extra = {'qThreadName': f'Run cases using multiprocessing'}
             logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
-            results = []
-            # How do I get multiprocessing to work with my PyQT GIU?
-            
-            # It would be nice to be able to detect the number of cores available 
-            # automatically.
-            cores = 6 # 12 is faster on my machine, but some engineers have older machines
-            pool = multiprocessing.Pool(cores)
-            results_mp = pool.imap_unordered(run_cases, cases_array)
-    
-            # logs the results in the main process as soon as say are ready
-            # but results are not in order!
-            
-            for result in results_mp:
-                # I don't know why the logger doesn't work here
-                logger.log(logging.DATA, f'result = {result}', extra = extra)
-#                print(f'result = {result}')
-                results += [result]
-                
-            # Join after printing all results
-            pool.close()
-            pool.join()
+            # The pool supervisor owns the pool and streams each completion
+            #   back as it finishes.  This works from the headless "main()"
+            #   and from a GUI worker hosted in a QThread.
+            # 'auto' lets the supervisor detect the cores and RAM available and
+            #   adjust the pool size after measuring the first few cases.
+            #   A number (e.g. 6) fixes the pool size.
+            cores = worker2_data_dict.get('cores', 'auto')
+            import Multiprocess_Functions
+            Multiprocess_Functions.logger = logger
+            from Multiprocess_Functions import pool_supervisor
+            # The GUI passes its warm pool service so the pool is not rebuilt on every run
+            pool_service = worker2_data_dict.get('pool_service', None)
+            # A case running longer than this is recorded as timed out and the pool restarted (0 for no limit)
+            case_timeout = float(worker2_data_dict.get('case_timeout', 0)) or None
+            result = pool_supervisor(run_cases, cases_array, cores, progress_callback = progress_callback, pool_service = pool_service,
+                                     journal = journal, runtime_history = runtime_history, case_timeout = case_timeout,
+                                     cancel_token = cancel_token, ordered_callback = release_result)
+            if result[1] == 'Exception':
+                err = f'Pool supervisor failed. Result = {result[0]}'
+                action = 'Study Stopped'
+                logger.log(logging.ERROR, f'{err} \n *********** {action} ***********', extra = extra)
+                return[err, action]
+            # results are not in order!  "release_result" got them in order.
+            results = result[2]
         
         else:
             '''
@@ -360,23 +421,43 @@ def worker2_function(worker2_data_dict):
             logger.log(logging.INFO, f'\n\n{" "*0}********* {extra["qThreadName"]} ************', extra = extra)
             
             results = []
-            for case in cases_array:
+            for case_idx, case in enumerate(cases_array):
+                # Waits here while paused
+                if cancel_token is not None and cancel_token.checkpoint():
+                    logger.log(logging.WARNING, f'Run cancelled after {len(results)} of {len(cases_array)} cases.', extra = extra)
+                    break
+                journaled = journal.completed(case_idx, case) if journal is not None else None
+                if journaled is not None:
+                    logger.log(logging.DEBUG, f'Case index {case_idx} found in the journal', extra = extra)
+                    results += [journaled]
+                    release_result(case_idx, journaled)
+                    continue
                 result = run_cases(case)
                 logger.log(logging.DATA, f'result = {result}', extra = extra)
                 results += [result]
+                release_result(case_idx, result)
+                if journal is not None:
+                    journal.record(case_idx, case, result)
+                if runtime_history is not None and result[0:2] == ['', '']:
+                    runtime_history.record(case, result[2][1])
+                if progress_callback is not None:
+                    progress_callback(make_progress_report(f'Case index {case_idx} done', f'Case index {case_idx}', case_idx + 1, len(cases_array)))
+            if runtime_history is not None:
+                runtime_history.save()
         elapsed_time = timeit.default_timer() - start
+        if journal is not None:
+            journal.close()
         # Generally, I do something with the results like save them to an excel file
         result_message = [f'{"*"*30}', 'Results:']
-        result_sum = 0
-        for result in results:
-            if result[0:2] != ['', '']:
-                result_message += ['exception']
-            else:
-                result_message += [result[2][0]]
-                result_sum += result[2][1]
+        result_message += result_lines
         result_message += ['']
         result_message += [f'Total Processor Time: {result_sum:.3f}']
         result_message += [f'{" "*8}Elapsed Time: {elapsed_time:.3f}']
+        if runtime_history is not None and runtime_history.last_makespan is not None:
+            # Longest-first schedule: predicted vs. actual time in the pool
+            makespan = runtime_history.last_makespan
+            result_message += [f'Predicted Pool Time: {makespan["predicted"]:.3f} ({makespan["cores"]} in flight)']
+            result_message += [f'{" "*3}Actual Pool Time: {makespan["actual"]:.3f}']
         result_message += [f'{"*"*30}']
         result_message = '\n\n' + '\n'.join(result_message) + '\n\n'
         logger.log(logging.INFO, result_message, extra = extra)
@@ -552,6 +633,12 @@ def main():
                         'start_level' : 100000000,
                         'number_cases' : 10,
                         'use_multi_proc' : True, # When true, and the option is programmed, the function will use a multiprocessing pool to complete studies faster
+                        'cores' : 'auto', # Pool size; 'auto' picks it from the machine's cores and RAM, or enter a number
+                        'pool_service' : None, # A warm "Pool_Service" to lease instead of building a new pool for this run
+                        'journal_file' : './Results/worker2_case_journal.jsonl', # Completed cases are saved here as they finish ('' to disable)
+                        'resume' : False, # When true, cases already in the journal are not run again
+                        'runtime_history_file' : './Results/worker2_runtime_history.json', # Case runtimes used to run the longest cases first ('' to disable)
+                        'case_timeout' : 600, # Seconds a case may run in the pool before the pool is restarted without it (0 for no limit)
                         'debug_options' : [False, False, False, False, False, False, False, False, False, False, False, False, False, False, False],  # Debug option flags potentially used in the case.
                         'logger' : logger
                         }